@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
 import os
+import tempfile
 from pathlib import Path
 
 
@@ -16,11 +17,73 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        # asyncpg sürücüsü ile aynı veritabanı (async router'lar için)
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+    # Connection pool (worker başına)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # saniye - havuzda boş bağlantı beklenecek süre
+    DB_POOL_RECYCLE: int = 1800  # saniye - bu süreden eski bağlantılar yenilenir
+    DB_POOL_PRE_PING: bool = True
+    # PgBouncer (transaction pooling) uyumlu mod: sunucu tarafı prepared statement tutulmaz
+    DB_PGBOUNCER_MODE: bool = False
+    # Açılışta şema sürümü kontrol edilir; True ise önce bekleyen migration'lar uygulanır
+    # (geliştirme ortamı için - production'da deploy adımında scripts/migrate.py upgrade)
+    DB_MIGRATE_ON_STARTUP: bool = False
+
+    # Arka plan export job'ları
+    EXPORT_ARTIFACT_DIR: str = str(Path(tempfile.gettempdir()) / "sma_panel_exports")
+    EXPORT_ARTIFACT_TTL: int = 3600  # saniye - üretilen dosyaların saklanma süresi
+    EXPORT_WORKERS: int = 2  # worker başına eşzamanlı export sayısı
+    EXPORT_MAX_PENDING: int = 20  # kuyrukta bekleyebilecek en fazla job
+
     # JWT
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Şifre doğrulama (bcrypt) - event loop dışında, sınırlı thread havuzunda
+    BCRYPT_ROUNDS: int = 12  # daha düşük work factor'lü hash'ler girişte yeniden hash'lenir
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # bu kadar bekleyen doğrulama varsa login 503 döner
+
+    # get_current_user kullanıcı cache'i (worker başına)
+    AUTH_CACHE_TTL: int = 60  # saniye - diğer worker'lardaki değişiklikler en geç bu sürede yansır
+    AUTH_CACHE_SIZE: int = 1024  # en fazla tutulacak kullanıcı sayısı (LRU)
+
+    # Referans verisi cache'i (izin türleri, yıllık izin kuralları, renk skalası)
+    REFERENCE_CACHE_LISTEN: bool = True  # Postgres LISTEN/NOTIFY ile anında yenile (PgBouncer transaction modunda çalışmaz)
+    REFERENCE_CACHE_POLL_INTERVAL: int = 30  # saniye - NOTIFY kaçarsa sürüm tablosu en geç bu aralıkla kontrol edilir
+
+    # Günlük rapor snapshot'ları (daily_reports) - biten günler worker içindeki zamanlayıcıyla kapatılır
+    DAILY_REPORT_SCHEDULER: bool = True
+    DAILY_REPORT_CHECK_INTERVAL: int = 600  # saniye - eksik günler bu aralıkla kontrol edilir
+    DAILY_REPORT_CATCHUP_DAYS: int = 31  # zamanlayıcının geriye dönük tamamladığı gün sayısı (daha eskisi: scripts/backfill_daily_reports.py)
+
+    # Çalışan sıralaması cache'i (worker başına, dönem başına)
+    LEADERBOARD_CACHE_TTL: int = 60  # saniye
+    LEADERBOARD_CACHE_SIZE: int = 256  # en fazla tutulacak dönem/çalışan sonucu (LRU)
+
+    # Bu haftanın canlı sayaçları (haftanın yıldızı, haftalık sıralama)
+    WEEK_COUNTERS_NOTIFY: bool = True  # değişiklikleri NOTIFY ile diğer worker'lara bildir
+    WEEK_COUNTERS_RECONCILE_INTERVAL: int = 300  # saniye - sayaçlar en geç bu aralıkla veritabanıyla eşitlenir
+
+    # Günlük rapor sayfası canlı olayları (GET /daily-visits/events, SSE)
+    LIVE_EVENTS_LISTEN: bool = True  # Postgres LISTEN/NOTIFY ile worker'lar arası iletim (PgBouncer transaction modunda çalışmaz)
+    LIVE_EVENTS_HEARTBEAT: int = 15  # saniye - olay yokken bağlantıyı canlı tutan yorum satırı aralığı
+    LIVE_EVENTS_QUEUE_SIZE: int = 256  # istemci başına bekleyen olay; dolarsa bağlantı kapatılır, istemci yeniden bağlanır
+
+    # Toplu ziyaret gönderimi (POST /daily-visits/batch) - istek başına en fazla ziyaret
+    VISIT_BATCH_MAX_ITEMS: int = 200
+
+    # Eczane arama (autocomplete)
+    PHARMACY_SEARCH_LIMIT: int = 20  # varsayılan sonuç sayısı
+    PHARMACY_SEARCH_MAX_LIMIT: int = 50
+    PHARMACY_SEARCH_IN_MEMORY: bool = False  # worker başına bellekte ön ek indeksi (eşleşme yoksa veritabanına düşer)
+
     # CORS
     BACKEND_CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:8000"]
 
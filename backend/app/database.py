@@ -1,19 +1,138 @@
+import threading
+import time
+from uuid import uuid4
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from .config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+
+class PoolWaitStats:
+    """
+    Havuzdan bağlantı alma (checkout) süreleri - pool boyutlandırması için
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += waited
+            if waited > self.max_wait:
+                self.max_wait = waited
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+            }
+
+
+class _InstrumentedPoolMixin:
+    """connect() süresini ölçer (bekleme + gerekirse yeni bağlantı + pre-ping)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _async_database_url():
+    url = make_url(settings.ASYNC_DATABASE_URL)
+    if settings.DB_PGBOUNCER_MODE:
+        # SQLAlchemy tarafındaki prepared statement cache'i kapat
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+    return url
+
+
+def _async_connect_args() -> dict:
+    if not settings.DB_PGBOUNCER_MODE:
+        return {}
+    # PgBouncer transaction pooling: asyncpg statement cache kapalı,
+    # prepared statement isimleri bağlantılar arasında çakışmasın
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
+
+if "sqlite" in settings.DATABASE_URL:
+    engine = create_engine(
+        settings.DATABASE_URL,
+        connect_args={"check_same_thread": False}
+    )
+else:
+    engine = create_engine(
+        settings.DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        **_pool_options()
+    )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+# Async engine (asyncpg) - async def router'lar event loop'u bloklamadan sorgu atar
+async_engine = create_async_engine(
+    _async_database_url(),
+    poolclass=InstrumentedAsyncQueuePool,
+    connect_args=_async_connect_args(),
+    **_pool_options()
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
+Base = declarative_base()
 
 def get_db():
     """
@@ -26,9 +145,39 @@ def get_db():
         db.close()
 
 
-def init_db():
+async def get_async_db():
     """
-    Initialize database tables
+    Dependency that provides an async database session
     """
-    from . import models  # Import all models
-    Base.metadata.create_all(bind=engine)
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_pool_stats() -> dict:
+    """
+    Sync ve async engine havuzlarının anlık durumu
+    """
+    def _describe(pool) -> dict:
+        stats = {
+            "pool_class": type(pool).__name__,
+        }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "timeout": pool.timeout(),
+            })
+        wait_stats = getattr(pool, "wait_stats", None)
+        if wait_stats is not None:
+            stats["wait"] = wait_stats.snapshot()
+        return stats
+
+    return {
+        "pgbouncer_mode": settings.DB_PGBOUNCER_MODE,
+        "sync": _describe(engine.pool),
+        "async": _describe(async_engine.sync_engine.pool),
+    }
+
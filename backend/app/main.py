@@ -3,7 +3,13 @@ from fastapi.middleware.cors import CORSMiddleware
 
 try:
     from app.config import settings
-    from app.database import init_db
+    from app.database import SessionLocal, engine
+    from app.services.daily_reports import daily_report_scheduler
+    from app.services.export_jobs import export_jobs
+    from app.services.live_events import live_events
+    from app.services.reference_data import reference_data, seed_default_visit_color_scales
+    from app.services.schema_version import check_schema_version, upgrade as upgrade_schema
+    from app.utils.pagination import NEXT_CURSOR_HEADER
     from app.routers import (
         auth_router,
         employees_router,
@@ -19,6 +25,8 @@ try:
         leave_types_router,
         leave_requests_router,
         annual_leave_rules_router,
+        system_router,
+        export_jobs_router,
     )
 except ImportError:
     # For direct execution from IDE
@@ -27,7 +35,13 @@ except ImportError:
     sys.path.insert(0, str(Path(__file__).parent.parent))
 
     from app.config import settings
-    from app.database import init_db
+    from app.database import SessionLocal, engine
+    from app.services.daily_reports import daily_report_scheduler
+    from app.services.export_jobs import export_jobs
+    from app.services.live_events import live_events
+    from app.services.reference_data import reference_data, seed_default_visit_color_scales
+    from app.services.schema_version import check_schema_version, upgrade as upgrade_schema
+    from app.utils.pagination import NEXT_CURSOR_HEADER
     from app.routers import (
         auth_router,
         employees_router,
@@ -43,6 +57,8 @@ except ImportError:
         leave_types_router,
         leave_requests_router,
         annual_leave_rules_router,
+        system_router,
+        export_jobs_router,
     )
 
 app = FastAPI(
@@ -58,6 +74,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
 )
 
 # Include routers
@@ -75,14 +92,45 @@ app.include_router(settings_router)
 app.include_router(leave_types_router)
 app.include_router(leave_requests_router)
 app.include_router(annual_leave_rules_router)
+app.include_router(system_router)
+app.include_router(export_jobs_router)
 
 
 @app.on_event("startup")
 def on_startup():
     """
-    Initialize database on startup
+    Check the schema version on startup (migrations run in the deploy step)
     """
-    init_db()
+    if settings.DB_MIGRATE_ON_STARTUP:
+        upgrade_schema(engine)
+    check_schema_version(engine)
+
+    db = SessionLocal()
+    try:
+        seed_default_visit_color_scales(db)
+    finally:
+        db.close()
+
+    # Referans verisi cache'i: ilk yükleme + diğer worker'lardan değişiklik bildirimleri
+    reference_data.refresh(force=True)
+    reference_data.start_listener()
+
+    # Günlük rapor sayfası canlı olayları (SSE) - diğer worker'lardaki yazımlar dahil
+    live_events.start_listener()
+
+    # Biten günlerin rapor snapshot'ları (daily_reports)
+    daily_report_scheduler.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    """
+    Stop background export workers, the reference data and live event listeners and the daily report scheduler
+    """
+    export_jobs.shutdown()
+    reference_data.stop()
+    live_events.stop()
+    daily_report_scheduler.stop()
 
 
 @app.get("/")
@@ -8,7 +8,12 @@ from .pharmacy_visit import PharmacyVisit
 from .leave_type import LeaveType, GenderRestriction
 from .leave_balance import LeaveBalance
 from .leave_request import LeaveRequest, LeaveRequestStatus
+from .leave_ledger import LeaveLedgerEntry, LeaveLedgerEntryType
 from .annual_leave_rule import AnnualLeaveRule
+from .daily_activity import DailyActivityRollup
+from .daily_report import DailyReport
+from .table_version import TableVersion
+from .settings import VisitColorScale
 
 __all__ = [
     "Employee",
@@ -25,5 +30,11 @@ __all__ = [
     "LeaveBalance",
     "LeaveRequest",
     "LeaveRequestStatus",
+    "LeaveLedgerEntry",
+    "LeaveLedgerEntryType",
     "AnnualLeaveRule",
+    "DailyActivityRollup",
+    "DailyReport",
+    "TableVersion",
+    "VisitColorScale",
 ]
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Date
+from datetime import datetime
+from ..database import Base
+
+
+class DailyActivityRollup(Base):
+    """
+    Çalışan başına günlük ziyaret özeti (dashboard'lar ham ziyaret tabloları yerine bunu okur)
+    daily_visits router'ındaki create/update/delete/onay işlemleri aynı transaction içinde
+    günceller (services/activity_rollup.py). Tutarsızlık olursa
+    scripts/rebuild_activity_rollup.py ile yeniden hesaplanır.
+    """
+    __tablename__ = "daily_activity_rollups"
+
+    employee_id = Column(Integer, ForeignKey("employees.id"), primary_key=True)
+    activity_date = Column(Date, primary_key=True, index=True)
+
+    doctor_visit_count = Column(Integer, nullable=False, default=0)
+    pharmacy_visit_count = Column(Integer, nullable=False, default=0)
+    product_count = Column(Integer, nullable=False, default=0)  # Eczane ziyaretlerindeki satılan ürün toplamı
+    mf_count = Column(Integer, nullable=False, default=0)  # Eczane ziyaretlerindeki MF toplamı
+    pharmacy_approved_count = Column(Integer, nullable=False, default=0)
+    pharmacy_pending_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -6,6 +6,11 @@ from ..database import Base
 
 
 class DailyReport(Base):
+    """
+    Biten günün şirket geneli snapshot'ı (gün başına tek satır)
+    services/daily_reports.py tarafından yazılır; gün kapandıktan sonra o güne
+    ait ziyaret/satış değişirse satır silinir ve bir sonraki çalıştırmada yeniden üretilir.
+    """
     __tablename__ = "daily_reports"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -16,6 +21,7 @@ class DailyReport(Base):
     open_cases_count = Column(Integer, default=0)
     summary_json = Column(JSONB, nullable=True)  # JSON formatında detaylı rapor
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     top_employee = relationship("Employee")
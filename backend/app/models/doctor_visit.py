@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Text, Boolean, Time
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Text, Boolean, Time, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -9,7 +9,7 @@ class DoctorVisit(Base):
     __tablename__ = "doctor_visits"
 
     id = Column(Integer, primary_key=True, index=True)
-    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)  # ix_doctor_visits_employee_date ile indeksli
     visit_date = Column(Date, nullable=False, index=True)  # Hangi gün
 
     # Hekim bilgileri
@@ -27,6 +27,13 @@ class DoctorVisit(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Çalışanın tarih aralığındaki ziyaretleri
+        Index("ix_doctor_visits_employee_date", "employee_id", "visit_date"),
+        # Onay bekleyenler (tablonun küçük bir kısmı)
+        Index("ix_doctor_visits_pending", "visit_date", postgresql_where=text("is_approved = false")),
+    )
+
     # Relationships
     employee = relationship("Employee", back_populates="doctor_visits")
 
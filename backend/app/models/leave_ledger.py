@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Index
+from datetime import datetime
+import enum
+from ..database import Base
+
+
+class LeaveLedgerEntryType(str, enum.Enum):
+    ACCRUAL = "ACCRUAL"  # Hak edilen gün (days: hakkın değişimi)
+    USAGE = "USAGE"  # Kullanılan gün (days: kullanımın değişimi, iade/iptalde negatif)
+
+
+class LeaveLedgerEntry(Base):
+    """
+    İzin bakiyesi hareketleri (sadece ekleme yapılır, güncellenmez/silinmez)
+    leave_balances tablosu bu hareketlerden hesaplanır (services/leave_balances.py);
+    tutarsızlık olursa scripts/rebuild_leave_balances.py ile yeniden hesaplanır.
+    """
+    __tablename__ = "leave_ledger_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+    leave_type_id = Column(Integer, ForeignKey("leave_types.id"), nullable=False)
+    service_year = Column(Integer, nullable=False)
+    entry_type = Column(Enum(LeaveLedgerEntryType), nullable=False)
+    days = Column(Integer, nullable=False)
+    leave_request_id = Column(Integer, ForeignKey("leave_requests.id"), nullable=True)  # Kullanım hareketlerinde ilgili talep
+    created_by = Column(Integer, ForeignKey("employees.id"), nullable=True)  # Hareketi oluşturan (sistem hareketlerinde boş)
+    note = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_leave_ledger_employee_type_year", "employee_id", "leave_type_id", "service_year"),
+    )
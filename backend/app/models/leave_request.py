@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -40,6 +40,11 @@ class LeaveRequest(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Çalışan + durum + tarih aralığı (izin listeleri, "bugün izinde mi" kontrolleri)
+        Index("ix_leave_requests_employee_status_dates", "employee_id", "status", "start_date", "end_date"),
+    )
+
     # Relationships
     employee = relationship("Employee", foreign_keys=[employee_id], backref="leave_requests")
     leave_type = relationship("LeaveType", back_populates="leave_requests")
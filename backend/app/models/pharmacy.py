@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -15,9 +15,22 @@ class Pharmacy(Base):
     street = Column(String, nullable=True)  # Sokak (küçük harf, "sk." yasak)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=True, index=True)  # İlk ekleyen satıcı
     is_approved = Column(Boolean, default=False, nullable=False)  # Manager/Admin onayı
+    # Arama anahtarı: ad + semt, Türkçe harfler katlanmış ("Şifa Eczanesi", "Kadıköy" -> "sifa eczanesi kadikoy")
+    # services/pharmacy_search.py pharmacy_search_key() ile yazılır
+    search_key = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Ön ek araması (search_key LIKE 'terim%')
+        Index("ix_pharmacies_search_key_prefix", "search_key", postgresql_ops={"search_key": "text_pattern_ops"}),
+        # Kelime içi ve benzerlik araması (LIKE '%terim%', similarity)
+        Index(
+            "ix_pharmacies_search_key_trgm", "search_key",
+            postgresql_using="gin", postgresql_ops={"search_key": "gin_trgm_ops"}
+        ),
+    )
+
     # Relationships
     sales = relationship("Sale", back_populates="pharmacy")
     employee = relationship("Employee", foreign_keys=[employee_id])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Text, Boolean, Time
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Text, Boolean, Time, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -9,8 +9,8 @@ class PharmacyVisit(Base):
     __tablename__ = "pharmacy_visits"
 
     id = Column(Integer, primary_key=True, index=True)
-    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False, index=True)
-    pharmacy_id = Column(Integer, ForeignKey("pharmacies.id"), nullable=False, index=True)  # Foreign Key
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)  # ix_pharmacy_visits_employee_date ile indeksli
+    pharmacy_id = Column(Integer, ForeignKey("pharmacies.id"), nullable=False)  # Foreign Key - ix_pharmacy_visits_pharmacy_totals ile indeksli
     visit_date = Column(Date, nullable=False, index=True)  # Hangi gün
 
     # Eczane bilgileri (ziyaret sırasında snapshot olarak kaydedilir)
@@ -28,6 +28,23 @@ class PharmacyVisit(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Çalışanın tarih aralığındaki ziyaretleri
+        Index("ix_pharmacy_visits_employee_date", "employee_id", "visit_date"),
+        # Eczane listesi toplamları index-only scan ile okunur
+        Index(
+            "ix_pharmacy_visits_pharmacy_totals", "pharmacy_id",
+            postgresql_include=["product_count", "mf_count", "employee_id"]
+        ),
+        # Onay bekleyenler (tablonun küçük bir kısmı)
+        Index("ix_pharmacy_visits_pending", "visit_date", postgresql_where=text("is_approved = false")),
+        # pharmacy_name ILIKE '%...%' aramaları (pg_trgm)
+        Index(
+            "ix_pharmacy_visits_pharmacy_name_trgm", "pharmacy_name",
+            postgresql_using="gin", postgresql_ops={"pharmacy_name": "gin_trgm_ops"}
+        ),
+    )
+
     # Relationships
     employee = relationship("Employee", back_populates="pharmacy_visits")
     pharmacy = relationship("Pharmacy")
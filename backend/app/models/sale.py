@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Numeric
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Numeric, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -18,6 +18,10 @@ class Sale(Base):
     notes = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_sales_employee_date", "employee_id", "sale_date"),
+    )
+
     # Relationships
     employee = relationship("Employee", back_populates="sales")
     pharmacy = relationship("Pharmacy", back_populates="sales")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class TableVersion(Base):
+    """
+    Tablo bazlı değişiklik sayacı
+    Referans tablolarını (izin türleri, yıllık izin kuralları, renk skalası)
+    değiştiren her işlem aynı transaction içinde sayacı artırır; worker'lar
+    cache'lerinin güncel olup olmadığını bu sayaçtan anlar
+    (services/reference_data.py).
+    """
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Boolean, Text, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -10,7 +10,7 @@ class WeeklyProgram(Base):
     __tablename__ = "weekly_programs"
 
     id = Column(Integer, primary_key=True, index=True)
-    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)  # ix_weekly_programs_employee_week ile indeksli
     week_start = Column(Date, nullable=False, index=True)  # Haftanın ilk günü (Pazartesi)
     week_end = Column(Date, nullable=False)  # Haftanın son günü (Pazar)
 
@@ -21,6 +21,10 @@ class WeeklyProgram(Base):
     submitted_at = Column(DateTime, nullable=True)  # Ne zaman gönderildi
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_weekly_programs_employee_week", "employee_id", "week_start"),
+    )
+
     # Relationships
     employee = relationship("Employee", back_populates="weekly_programs")
 
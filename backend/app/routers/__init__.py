@@ -12,6 +12,8 @@ from .settings import router as settings_router
 from .leave_types import router as leave_types_router
 from .leave_requests import router as leave_requests_router
 from .annual_leave_rules import router as annual_leave_rules_router
+from .system import router as system_router
+from .export_jobs import router as export_jobs_router
 
 __all__ = [
     "auth_router",
@@ -28,4 +30,6 @@ __all__ = [
     "leave_types_router",
     "leave_requests_router",
     "annual_leave_rules_router",
+    "system_router",
+    "export_jobs_router",
 ]
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -9,22 +9,34 @@ from ..schemas.annual_leave_rule import (
     AnnualLeaveRuleResponse,
     AnnualLeaveRulesBulkUpdate
 )
+from ..services.leave_balances import annual_leave_entitlement
+from ..services.reference_data import ANNUAL_LEAVE_RULES, bump_table_version, reference_data
 from ..utils.dependencies import get_current_user
+from ..utils.http_cache import etag_for, not_modified
 
 router = APIRouter(prefix="/annual-leave-rules", tags=["Annual Leave Rules"])
 
 
 @router.get("/", response_model=List[AnnualLeaveRuleResponse])
 def get_annual_leave_rules(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
     current_user: Employee = Depends(get_current_user)
 ):
     """
     Yıllık izin kurallarını listele
     Herkes görebilir
+    If-None-Match güncelse 304
     """
-    rules = db.query(AnnualLeaveRule).order_by(AnnualLeaveRule.year_of_service).all()
-    return rules
+    snapshot = reference_data.snapshot()
+    cached = not_modified(
+        request, response,
+        etag_for(ANNUAL_LEAVE_RULES, snapshot.versions[ANNUAL_LEAVE_RULES]),
+        snapshot.modified_at.get(ANNUAL_LEAVE_RULES)
+    )
+    if cached:
+        return cached
+    return snapshot.annual_leave_rules
 
 
 @router.put("/", response_model=List[AnnualLeaveRuleResponse])
@@ -57,7 +69,9 @@ def update_annual_leave_rules(
         db.add(rule)
         new_rules.append(rule)
 
+    bump_table_version(db, ANNUAL_LEAVE_RULES)
     db.commit()
+    reference_data.invalidate()
 
     # Refresh all
     for rule in new_rules:
@@ -74,7 +88,7 @@ def calculate_annual_leave_days(hire_date, current_year: int, db: Session) -> in
     Args:
         hire_date: İşe giriş tarihi
         current_year: Hesaplama yapılacak yıl
-        db: Database session
+        db: Kullanılmıyor (geriye uyumluluk için duruyor)
 
     Returns:
         Hak edilen yıllık izin günü
@@ -93,21 +107,14 @@ def calculate_annual_leave_days(hire_date, current_year: int, db: Session) -> in
     # Yıllık izin yılını 1'den başlat (1. yıl, 2. yıl vs.)
     year_index = years_of_service + 1
 
-    # Kurallara göre hak edilen günü bul
-    rule = db.query(AnnualLeaveRule).filter(
-        AnnualLeaveRule.year_of_service == year_index
-    ).first()
-
-    if rule:
-        return rule.days_entitled
+    # Kurallara göre hak edilen günü bul (referans verisi cache'inden)
+    rules = reference_data.snapshot().annual_leave_days
+    if year_index in rules:
+        return rules[year_index]
 
     # Kural yoksa en yüksek yıla ait kuralı kullan
-    max_rule = db.query(AnnualLeaveRule).order_by(
-        AnnualLeaveRule.year_of_service.desc()
-    ).first()
-
-    if max_rule:
-        return max_rule.days_entitled
+    if rules:
+        return rules[max(rules)]
 
     # Hiç kural yoksa varsayılan
     return 14
@@ -126,7 +133,7 @@ def calculate_annual_leave_days_by_service_year(service_year: int, db: Session)
 
     Args:
         service_year: Kaç yıldönümü geçti (0, 1, 2, 3...)
-        db: Database session
+        db: Kullanılmıyor (geriye uyumluluk için duruyor)
 
     Returns:
         Hak edilen yıllık izin günü
@@ -137,33 +144,5 @@ def calculate_annual_leave_days_by_service_year(service_year: int, db: Session)
         service_year = 5 -> 20 gün (5. yıldönümü geçti, year_of_service=5 kuralı)
         service_year = 15 -> 26 gün (15. yıldönümü geçti, year_of_service=15 kuralı)
     """
-    if service_year < 0:
-        service_year = 0
-
-    # Henüz yıldönümü gelmediyse hak yok
-    if service_year == 0:
-        return 0
-
-    # service_year = year_of_service (bire bir eşleşiyor)
-    # service_year = 1 → year_of_service = 1 (1. yıldönümü)
-    # service_year = 2 → year_of_service = 2 (2. yıldönümü)
-    year_of_service = service_year
-
-    # Kurallara göre hak edilen günü bul
-    rule = db.query(AnnualLeaveRule).filter(
-        AnnualLeaveRule.year_of_service == year_of_service
-    ).first()
-
-    if rule:
-        return rule.days_entitled
-
-    # Kural yoksa en yüksek yıla ait kuralı kullan
-    max_rule = db.query(AnnualLeaveRule).order_by(
-        AnnualLeaveRule.year_of_service.desc()
-    ).first()
-
-    if max_rule:
-        return max_rule.days_entitled
-
-    # Hiç kural yoksa varsayılan
-    return 14
+    # service_year = year_of_service (bire bir eşleşiyor), kurallar cache'ten okunur
+    return annual_leave_entitlement(service_year, reference_data.snapshot().annual_leave_days)
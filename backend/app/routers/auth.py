@@ -1,25 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from ..database import get_db
+from ..database import get_async_db
 from ..schemas.auth import Token, UserLogin
-from ..utils.auth import authenticate_user, create_access_token
+from ..utils.auth import PasswordQueueFull, authenticate_user_async, create_access_token
 from ..config import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+async def _authenticate(db: AsyncSession, email: str, password: str):
+    try:
+        return await authenticate_user_async(db, email, password)
+    except PasswordQueueFull:
+        # Yoğun giriş anında kuyruğu sınırsız büyütmek yerine istemciyi tekrar denemeye yönlendir
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = authenticate_user(db, form_data.username, form_data.password)  # username field'ı email olarak kullanılıyor
+    user = await _authenticate(db, form_data.username, form_data.password)  # username field'ı email olarak kullanılıyor
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -43,11 +55,11 @@ async def login_for_access_token(
 
 
 @router.post("/login", response_model=Token)
-async def login(user_login: UserLogin, db: Session = Depends(get_db)):
+async def login(user_login: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Alternative login endpoint using JSON body
     """
-    user = authenticate_user(db, user_login.email, user_login.password)
+    user = await _authenticate(db, user_login.email, user_login.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,54 +1,180 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from typing import List, Optional
-from datetime import date, datetime, timedelta
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-import io
-
-from ..database import get_db
+from sqlalchemy import delete, func, insert, select, tuple_
+from typing import Iterator, List, Optional
+from datetime import date, datetime
+
+from ..config import settings
+from ..database import SessionLocal, get_db
 from ..models.employee import Employee, EmployeeRole
 from ..models.doctor_visit import DoctorVisit
+from ..models.pharmacy import Pharmacy
 from ..models.pharmacy_visit import PharmacyVisit
 from ..schemas.daily_visit import (
+    DailyVisitBatch,
+    DailyVisitBatchResponse,
     DoctorVisitCreate,
     DoctorVisitResponse,
     PharmacyVisitCreate,
     PharmacyVisitResponse
 )
-from ..utils.dependencies import get_current_user
+from ..services.activity_rollup import (
+    apply_rollup_deltas,
+    doctor_visit_delta,
+    pharmacy_visit_delta,
+)
+from ..services.exports import build_pharmacy_visits_export
+from ..services.live_events import (
+    DOCTOR_VISIT_CREATED,
+    DOCTOR_VISIT_DELETED,
+    DOCTOR_VISIT_UPDATED,
+    PHARMACY_VISIT_APPROVAL,
+    PHARMACY_VISIT_CREATED,
+    PHARMACY_VISIT_DELETED,
+    PHARMACY_VISIT_UPDATED,
+    live_events,
+    publish_event,
+    publish_events,
+    viewer_changed,
+)
+from ..services.stats import PERIOD_PATTERN, StatsSpec, stats_query
+from ..services.week_activity import week_activity
+from ..utils.dependencies import get_current_user, get_stream_user
+from ..utils.pagination import decode_cursor, set_next_cursor
 
 router = APIRouter(prefix="/daily-visits", tags=["Daily Visits"])
 
+# NDJSON akışında veritabanından okunan / response'a tek seferde yazılan satır sayısı
+STREAM_CHUNK_SIZE = 500
+
+
+def _scope_to_viewer(query, model, current_user: Employee, employee_id: Optional[int]):
+    """Çalışan sadece kendi ziyaretlerini görür; manager/admin employee_id ile filtreleyebilir"""
+    if current_user.role not in [EmployeeRole.ADMIN, EmployeeRole.MANAGER]:
+        return query.filter(model.employee_id == current_user.id)
+    if employee_id:
+        return query.filter(model.employee_id == employee_id)
+    return query
+
+
+def _filter_visit_dates(query, model, visit_date: Optional[date], start_date: Optional[date], end_date: Optional[date]):
+    """start_date + end_date varsa aralık, yoksa visit_date ile tek gün"""
+    if start_date and end_date:
+        return query.filter(model.visit_date >= start_date, model.visit_date <= end_date)
+    if visit_date:
+        return query.filter(model.visit_date == visit_date)
+    return query
+
+
+def _pharmacy_visit_dict(visit: PharmacyVisit, employee_name: Optional[str]) -> dict:
+    return {
+        "id": visit.id,
+        "employee_id": visit.employee_id,
+        "pharmacy_id": visit.pharmacy_id,
+        "pharmacy_name": visit.pharmacy_name,
+        "pharmacy_address": visit.pharmacy_address,
+        "start_time": visit.start_time.isoformat() if visit.start_time else None,
+        "end_time": visit.end_time.isoformat() if visit.end_time else None,
+        "product_count": visit.product_count,
+        "mf_count": visit.mf_count,
+        "notes": visit.notes,
+        "visit_date": visit.visit_date,
+        "created_at": visit.created_at,
+        "employee_name": employee_name,
+        "is_approved": visit.is_approved
+    }
+
+
+def _ensure_pharmacy_exists(db: Session, pharmacy_id: int):
+    """Tekil ve toplu gönderimde aynı kontrol: olmayan eczaneye ziyaret yazılmaz"""
+    if db.scalar(select(Pharmacy.id).where(Pharmacy.id == pharmacy_id)) is None:
+        raise HTTPException(status_code=404, detail="Eczane bulunamadı")
+
+
+def _delete_locked_visit(db: Session, db_visit):
+    """
+    with_for_update ile okunmuş ziyareti siler. Eşzamanlı bir silme kazanmışsa
+    transaction geri alınır: rollup delta'sı ikinci kez uygulanmaz.
+    """
+    model = type(db_visit)
+    result = db.execute(delete(model).where(model.id == db_visit.id).execution_options(synchronize_session=False))
+    if result.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Visit not found")
+    db.expunge(db_visit)
+
+
+def _doctor_visit_event(event_type: str, visit: DoctorVisit) -> tuple:
+    return event_type, visit.employee_id, DoctorVisitResponse.model_validate(visit).model_dump()
+
+
+def _pharmacy_visit_event(db: Session, event_type: str, visit: PharmacyVisit, employee_name: Optional[str] = None) -> tuple:
+    """Olay verisi listeleme endpoint'indeki satırla aynı (istemci doğrudan yerine koyar)"""
+    if employee_name is None:
+        employee_name = db.scalar(select(Employee.full_name).where(Employee.id == visit.employee_id))
+    return event_type, visit.employee_id, _pharmacy_visit_dict(visit, employee_name)
+
+
+def _deleted_visit_event(event_type: str, visit) -> tuple:
+    return event_type, visit.employee_id, {"id": visit.id, "employee_id": visit.employee_id, "visit_date": visit.visit_date}
+
+
+def _keyset_visits(response: Response, query, model, limit: int, cursor: Optional[str], visit_of=lambda row: row):
+    """
+    (visit_date, id) azalan sırada keyset sayfalama.
+    İlk sayfada tablonun o anki en büyük id'si cursor'a yazılır (snapshot_id);
+    sonraki sayfalar sayfalama başladıktan sonra eklenen ziyaretleri
+    göstermez, böylece sayfalar arasında kayma / tekrar olmaz.
+    Sonraki sayfa varsa cursor X-Next-Cursor header'ında döner.
+    """
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            last_date = date.fromisoformat(position["visit_date"])
+            last_id = int(position["id"])
+            snapshot_id = int(position["snapshot_id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(model.visit_date, model.id) < tuple_(last_date, last_id))
+    else:
+        snapshot_id = query.session.query(func.max(model.id)).scalar() or 0
+
+    rows = query.filter(model.id <= snapshot_id).order_by(
+        model.visit_date.desc(), model.id.desc()
+    ).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if has_more:
+        last = visit_of(rows[-1])
+        set_next_cursor(response, {"visit_date": last.visit_date, "id": last.id, "snapshot_id": snapshot_id})
+
+    return rows
+
 
 @router.get("/doctors", response_model=List[DoctorVisitResponse])
 def get_doctor_visits(
+    response: Response,
     visit_date: Optional[date] = None,
     employee_id: Optional[int] = None,
-    skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Önceki cevabın X-Next-Cursor header'ı"),
     db: Session = Depends(get_db),
     current_user: Employee = Depends(get_current_user)
 ):
     """
     Doktor ziyaretlerini listele
+    - (visit_date, id) azalan sırada, cursor ile sayfalı
     """
-    query = db.query(DoctorVisit)
+    query = _scope_to_viewer(db.query(DoctorVisit), DoctorVisit, current_user, employee_id)
+    query = _filter_visit_dates(query, DoctorVisit, visit_date, None, None)
 
-    # Yetki kontrolü
-    if current_user.role not in [EmployeeRole.ADMIN, EmployeeRole.MANAGER]:
-        query = query.filter(DoctorVisit.employee_id == current_user.id)
-    elif employee_id:
-        query = query.filter(DoctorVisit.employee_id == employee_id)
-
-    # Tarih filtresi
-    if visit_date:
-        query = query.filter(DoctorVisit.visit_date == visit_date)
-
-    visits = query.order_by(DoctorVisit.visit_date.desc()).offset(skip).limit(limit).all()
-    return visits
+    return _keyset_visits(response, query, DoctorVisit, limit, cursor)
 
 
 @router.post("/doctors", response_model=DoctorVisitResponse)
@@ -66,6 +192,9 @@ def create_doctor_visit(
     )
 
     db.add(db_visit)
+    db.flush()
+    apply_rollup_deltas(db, doctor_visit_delta(db_visit))
+    publish_event(db, *_doctor_visit_event(DOCTOR_VISIT_CREATED, db_visit))
     db.commit()
     db.refresh(db_visit)
     return db_visit
@@ -132,6 +261,7 @@ def update_doctor_visit(
     for field, value in update_data.items():
         setattr(db_visit, field, value)
 
+    publish_event(db, *_doctor_visit_event(DOCTOR_VISIT_UPDATED, db_visit))
     db.commit()
     db.refresh(db_visit)
     return db_visit
@@ -146,7 +276,7 @@ def delete_doctor_visit(
     """
     Doktor ziyaretini sil
     """
-    db_visit = db.query(DoctorVisit).filter(DoctorVisit.id == visit_id).first()
+    db_visit = db.query(DoctorVisit).filter(DoctorVisit.id == visit_id).with_for_update().first()
 
     if not db_visit:
         raise HTTPException(status_code=404, detail="Visit not found")
@@ -156,7 +286,9 @@ def delete_doctor_visit(
         if db_visit.employee_id != current_user.id:
             raise HTTPException(status_code=403, detail="Not authorized")
 
-    db.delete(db_visit)
+    apply_rollup_deltas(db, doctor_visit_delta(db_visit, sign=-1))
+    publish_event(db, *_deleted_visit_event(DOCTOR_VISIT_DELETED, db_visit))
+    _delete_locked_visit(db, db_visit)
     db.commit()
     return {"message": "Visit deleted successfully"}
 
@@ -181,153 +313,42 @@ def export_pharmacy_visits(
             detail="Bu işlem için yetkiniz yok"
         )
 
-    # Query oluştur
-    query = db.query(PharmacyVisit)
-
-    # Employee filtresi
-    if employee_id:
-        query = query.filter(PharmacyVisit.employee_id == employee_id)
-
-    # Eczane adı filtresi
-    if pharmacy_name:
-        search_term = f"%{pharmacy_name.lower().strip()}%"
-        query = query.filter(PharmacyVisit.pharmacy_name.ilike(search_term))
-
-    # Tarih aralığı filtresi
-    if start_date and end_date:
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        query = query.filter(
-            and_(
-                PharmacyVisit.visit_date >= start_datetime,
-                PharmacyVisit.visit_date <= end_datetime
-            )
-        )
-
-    # Onay durumu filtresi
-    if approval_filter == 'approved':
-        query = query.filter(PharmacyVisit.is_approved == True)
-    elif approval_filter == 'pending':
-        query = query.filter(PharmacyVisit.is_approved == False)
-
-    # Verileri çek
-    visits = query.order_by(PharmacyVisit.visit_date.desc()).all()
-
-    # Çalışan bilgisi için
-    employee_name = "tum_calisanlar"
-    if employee_id:
-        employee = db.query(Employee).filter(Employee.id == employee_id).first()
-        if employee:
-            # Türkçe karakterleri düzelt ve boşlukları alt çizgi yap
-            employee_name = employee.full_name.lower()
-            employee_name = employee_name.replace('ı', 'i').replace('ğ', 'g').replace('ü', 'u')
-            employee_name = employee_name.replace('ş', 's').replace('ö', 'o').replace('ç', 'c')
-            employee_name = employee_name.replace(' ', '_')
-
-    # Excel oluştur
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Eczane Ziyaretleri"
-
-    # Header stil
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-
-    # Header
-    headers = [
-        "Çalışan", "Eczane Adı", "Adres", "Ürün Sayısı", "MF Sayısı",
-        "Ziyaret Tarihi", "Başlangıç Saati", "Bitiş Saati", "Notlar", "Onay Durumu"
-    ]
-
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-
-    # Data
-    for row_num, visit in enumerate(visits, 2):
-        ws.cell(row=row_num, column=1, value=visit.employee.full_name if visit.employee else "")
-        ws.cell(row=row_num, column=2, value=visit.pharmacy_name)
-        ws.cell(row=row_num, column=3, value=visit.pharmacy_address or "")
-        ws.cell(row=row_num, column=4, value=visit.product_count)
-        ws.cell(row=row_num, column=5, value=visit.mf_count)
-        ws.cell(row=row_num, column=6, value=visit.visit_date.strftime('%d.%m.%Y') if visit.visit_date else "")
-        ws.cell(row=row_num, column=7, value=visit.start_time.strftime('%H:%M') if visit.start_time else "")
-        ws.cell(row=row_num, column=8, value=visit.end_time.strftime('%H:%M') if visit.end_time else "")
-        ws.cell(row=row_num, column=9, value=visit.notes or "")
-        ws.cell(row=row_num, column=10, value="Onaylandı" if visit.is_approved else "Bekliyor")
-
-    # Sütun genişliklerini ayarla
-    column_widths = [20, 30, 40, 12, 12, 15, 15, 15, 40, 15]
-    for col_num, width in enumerate(column_widths, 1):
-        ws.column_dimensions[chr(64 + col_num)].width = width
-
-    # Excel'i hafızada oluştur
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    # Dosya adı oluştur - Türkçe ay isimleri
-    turkish_months = {
-        1: 'ocak', 2: 'subat', 3: 'mart', 4: 'nisan', 5: 'mayis', 6: 'haziran',
-        7: 'temmuz', 8: 'agustos', 9: 'eylul', 10: 'ekim', 11: 'kasim', 12: 'aralik'
-    }
-
-    # Tarih formatı oluştur
-    if start_date and end_date:
-        start_month = turkish_months[start_date.month]
-        start_day = start_date.day
-        end_month = turkish_months[end_date.month]
-        end_day = end_date.day
-        year = end_date.year
-
-        # Aynı gün mü kontrol et
-        if start_date == end_date:
-            date_str = f"{start_month}{start_day}_{year}"
-        else:
-            date_str = f"{start_month}{start_day}_{end_month}{end_day}_{year}"
-    else:
-        # Tarih yoksa bugünün tarihini kullan
-        today = datetime.now()
-        month = turkish_months[today.month]
-        day = today.day
-        year = today.year
-        date_str = f"{month}{day}_{year}"
-
-    filename = f"eczaneziyaretleri_{employee_name}_{date_str}.xlsx"
-
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    book, filename = build_pharmacy_visits_export(
+        db,
+        start_date=start_date,
+        end_date=end_date,
+        employee_id=employee_id,
+        pharmacy_name=pharmacy_name,
+        approval_filter=approval_filter
     )
 
+    return book.to_response(filename)
+
 
 @router.get("/pharmacies")
 def get_pharmacy_visits(
+    response: Response,
     visit_date: Optional[date] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     employee_id: Optional[int] = None,
     pharmacy_id: Optional[int] = None,
     pharmacy_name: Optional[str] = None,  # Yeni: Eczane adı filtresi
-    skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Önceki cevabın X-Next-Cursor header'ı"),
     db: Session = Depends(get_db),
     current_user: Employee = Depends(get_current_user)
 ):
     """
     Eczane ziyaretlerini listele
+    - (visit_date, id) azalan sırada, cursor ile sayfalı
+    - Çalışan adı aynı sorguda (satır başına ek sorgu yok)
     """
-    query = db.query(PharmacyVisit)
-
-    # Yetki kontrolü
-    if current_user.role not in [EmployeeRole.ADMIN, EmployeeRole.MANAGER]:
-        query = query.filter(PharmacyVisit.employee_id == current_user.id)
-    elif employee_id:
-        query = query.filter(PharmacyVisit.employee_id == employee_id)
+    query = db.query(
+        PharmacyVisit,
+        Employee.full_name.label("employee_name")
+    ).outerjoin(Employee, PharmacyVisit.employee_id == Employee.id)
+    query = _scope_to_viewer(query, PharmacyVisit, current_user, employee_id)
 
     # Pharmacy filtresi
     if pharmacy_id:
@@ -338,50 +359,148 @@ def get_pharmacy_visits(
         search_term = f"%{pharmacy_name.lower().strip()}%"
         query = query.filter(PharmacyVisit.pharmacy_name.ilike(search_term))
 
-    # Tarih filtresi - start_date ve end_date varsa aralık olarak filtrele
-    if start_date and end_date:
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        query = query.filter(
-            and_(
-                PharmacyVisit.visit_date >= start_datetime,
-                PharmacyVisit.visit_date <= end_datetime
-            )
-        )
-    elif visit_date:
-        # Sadece visit_date varsa tek tarih filtresi
-        query = query.filter(PharmacyVisit.visit_date == visit_date)
-
-    visits = query.order_by(PharmacyVisit.visit_date.desc()).offset(skip).limit(limit).all()
-
-    # Employee adını ekle
-    result = []
-    for visit in visits:
-        visit_dict = {
-            "id": visit.id,
-            "employee_id": visit.employee_id,
-            "pharmacy_id": visit.pharmacy_id,
-            "pharmacy_name": visit.pharmacy_name,
-            "pharmacy_address": visit.pharmacy_address,
-            "start_time": visit.start_time.isoformat() if visit.start_time else None,
-            "end_time": visit.end_time.isoformat() if visit.end_time else None,
-            "product_count": visit.product_count,
-            "mf_count": visit.mf_count,
-            "notes": visit.notes,
-            "visit_date": visit.visit_date,
-            "created_at": visit.created_at,
-            "employee_name": visit.employee.full_name if visit.employee else None,
-            "is_approved": visit.is_approved
-        }
-        result.append(visit_dict)
-
-    return result
+    query = _filter_visit_dates(query, PharmacyVisit, visit_date, start_date, end_date)
+
+    rows = _keyset_visits(response, query, PharmacyVisit, limit, cursor, visit_of=lambda row: row[0])
+    return [_pharmacy_visit_dict(visit, employee_name) for visit, employee_name in rows]
+
+
+def _stream_activity_lines(
+    start_date: date,
+    end_date: date,
+    employee_id: Optional[int],
+    visit_type: str
+) -> Iterator[bytes]:
+    """
+    NDJSON satırları: önce hekim, sonra eczane ziyaretleri, her biri (visit_date, id) sırasında.
+    Kendi oturumunu açar (istek dependency'si cevap akarken kapanmış olur);
+    iki sorgu REPEATABLE READ transaction içinde aynı anlık görüntüyü okur.
+    """
+    db = SessionLocal()
+    try:
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+        sources = []
+        if visit_type in ("all", "doctor"):
+            sources.append(("doctor", DoctorVisit))
+        if visit_type in ("all", "pharmacy"):
+            sources.append(("pharmacy", PharmacyVisit))
+
+        buffer = []
+        for kind, model in sources:
+            query = db.query(model, Employee.full_name.label("employee_name")).outerjoin(
+                Employee, model.employee_id == Employee.id
+            ).filter(model.visit_date >= start_date, model.visit_date <= end_date)
+            if employee_id:
+                query = query.filter(model.employee_id == employee_id)
+
+            rows = query.order_by(model.visit_date, model.id).execution_options(
+                stream_results=True
+            ).yield_per(STREAM_CHUNK_SIZE)
+            for visit, employee_name in rows:
+                if kind == "doctor":
+                    item = DoctorVisitResponse.model_validate(visit).model_dump(mode="json")
+                    item["employee_name"] = employee_name
+                else:
+                    item = jsonable_encoder(_pharmacy_visit_dict(visit, employee_name))
+                item["type"] = kind
+                buffer.append(json.dumps(item, ensure_ascii=False))
+
+                if len(buffer) >= STREAM_CHUNK_SIZE:
+                    yield ("\n".join(buffer) + "\n").encode()
+                    buffer = []
+
+        if buffer:
+            yield ("\n".join(buffer) + "\n").encode()
+        db.rollback()
+    finally:
+        db.close()
+
+
+@router.get("/stream")
+def stream_daily_activity(
+    visit_date: Optional[date] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    employee_id: Optional[int] = None,
+    visit_type: str = Query("all", pattern="^(all|doctor|pharmacy)$"),
+    current_user: Employee = Depends(get_current_user)
+):
+    """
+    Tüm çalışanların ziyaretlerini NDJSON olarak akıt (Manager/Admin only)
+    - Varsayılan: bugün; start_date + end_date ile aralık
+    - Her satır bir ziyaret; "type" alanı "doctor" ya da "pharmacy"
+    - Sayfalama yok, bellek kullanımı ziyaret sayısından bağımsız
+    """
+    if current_user.role not in [EmployeeRole.ADMIN, EmployeeRole.MANAGER]:
+        raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok")
+
+    if not (start_date and end_date):
+        start_date = end_date = visit_date or date.today()
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+
+    return StreamingResponse(
+        _stream_activity_lines(start_date, end_date, employee_id, visit_type),
+        media_type="application/x-ndjson"
+    )
+
+
+def _sse(event_type: str, data) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _event_stream(request: Request, viewer: Employee):
+    subscription = live_events.subscribe(viewer)
+    checked_at = time.monotonic()
+    try:
+        # Bağlantı koparsa tarayıcı 5 sn sonra yeniden bağlanır
+        yield "retry: 5000\n" + _sse("ready", {})
+        while True:
+            event = await subscription.next(settings.LIVE_EVENTS_HEARTBEAT)
+            if subscription.overflowed or await request.is_disconnected():
+                break
+            if subscription.viewer_stale or time.monotonic() - checked_at >= settings.LIVE_EVENTS_HEARTBEAT:
+                # Rol/yetki/aktiflik değiştiyse kapat; istemci yeni yetkileriyle yeniden bağlanır
+                subscription.viewer_stale = False
+                checked_at = time.monotonic()
+                if await run_in_threadpool(viewer_changed, viewer):
+                    break
+            if event is None:
+                yield ": ping\n\n"
+                continue
+            yield _sse(event["type"], event["data"])
+    finally:
+        live_events.unsubscribe(subscription)
+
+
+@router.get("/events")
+async def stream_live_events(
+    request: Request,
+    current_user: Employee = Depends(get_stream_user)
+):
+    """
+    Günlük rapor sayfası için canlı olaylar (Server-Sent Events)
+    - Ziyaret ekleme/güncelleme/silme/onay ve izin onay/red/iptal/tarih değişikliği
+    - Çalışan sadece kendi kayıtlarının olaylarını alır
+    - "ready" olayından sonra listeler bir kez çekilir, sonrası olaylarla güncellenir;
+      "resync" gelirse ya da bağlantı koparsa listeler yeniden çekilir
+    - EventSource header gönderemediği için token ?access_token= ile de verilebilir
+    - Kullanıcının rolü, yetkileri ya da aktifliği değişirse bağlantı kapatılır
+    """
+    if not settings.LIVE_EVENTS_LISTEN:
+        raise HTTPException(status_code=503, detail="Canlı olaylar kapalı")
 
+    return StreamingResponse(
+        _event_stream(request, current_user),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/pharmacies/stats")
 def get_pharmacy_visit_stats(
-    period: Optional[str] = None,  # 'day', 'week', 'month', 'year'
+    period: Optional[str] = Query(None, regex=PERIOD_PATTERN),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     employee_id: Optional[int] = None,
@@ -391,82 +510,15 @@ def get_pharmacy_visit_stats(
     """
     Eczane ziyaretleri istatistikleri
     """
-    # Tarih aralığını belirle
-    if not start_date or not end_date:
-        # Period'a göre tarih aralığı belirle
-        end_date_calc = datetime.now().date()
-        start_date_calc = None
-
-        if period == 'day':
-            start_date_calc = end_date_calc
-        elif period == 'week':
-            start_date_calc = end_date_calc - timedelta(days=7)
-        elif period == 'month':
-            start_date_calc = end_date_calc - timedelta(days=30)
-        elif period == 'year':
-            start_date_calc = end_date_calc - timedelta(days=365)
-
-        if not start_date:
-            start_date = start_date_calc
-        if not end_date:
-            end_date = end_date_calc
-
-    # Yetki kontrolü
-    target_employee_id = None
-    if current_user.role == EmployeeRole.EMPLOYEE:
-        target_employee_id = current_user.id
-    elif employee_id:
-        target_employee_id = employee_id
-
-    # Base query
-    query = db.query(PharmacyVisit)
-
-    if target_employee_id:
-        query = query.filter(PharmacyVisit.employee_id == target_employee_id)
-    if start_date:
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        query = query.filter(PharmacyVisit.visit_date >= start_datetime)
-    if end_date:
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        query = query.filter(PharmacyVisit.visit_date <= end_datetime)
-
-    # Toplam ziyaret sayısı
-    total_visits = query.count()
-
-    # Toplam MF sayısı
-    mf_query = db.query(func.sum(PharmacyVisit.mf_count))
-    if target_employee_id:
-        mf_query = mf_query.filter(PharmacyVisit.employee_id == target_employee_id)
-    if start_date:
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        mf_query = mf_query.filter(PharmacyVisit.visit_date >= start_datetime)
-    if end_date:
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        mf_query = mf_query.filter(PharmacyVisit.visit_date <= end_datetime)
-    total_mf = mf_query.scalar() or 0
-
-    # Toplam satılan ürün sayısı
-    products_query = db.query(func.sum(PharmacyVisit.product_count))
-    if target_employee_id:
-        products_query = products_query.filter(PharmacyVisit.employee_id == target_employee_id)
-    if start_date:
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        products_query = products_query.filter(PharmacyVisit.visit_date >= start_datetime)
-    if end_date:
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        products_query = products_query.filter(PharmacyVisit.visit_date <= end_datetime)
-    total_products = products_query.scalar() or 0
-
-    # Onaylanan / Onay bekleyen
-    approved_count = query.filter(PharmacyVisit.is_approved == True).count()
-    pending_count = query.filter(PharmacyVisit.is_approved == False).count()
+    spec = StatsSpec.for_request(current_user, employee_id, period, start_date, end_date)
+    totals = db.execute(stats_query(spec, "activity")).one()
 
     return {
-        "total_visits": total_visits,
-        "total_mf": int(total_mf),
-        "total_products": int(total_products),
-        "approved_count": approved_count,
-        "pending_count": pending_count
+        "total_visits": int(totals.pharmacy_visit_count),
+        "total_mf": int(totals.mf_count),
+        "total_products": int(totals.product_count),
+        "approved_count": int(totals.pharmacy_approved_count),
+        "pending_count": int(totals.pharmacy_pending_count)
     }
 
 @router.post("/pharmacies", response_model=PharmacyVisitResponse)
@@ -478,17 +530,98 @@ def create_pharmacy_visit(
     """
     Yeni eczane ziyareti ekle
     """
+    _ensure_pharmacy_exists(db, visit.pharmacy_id)
     db_visit = PharmacyVisit(
         employee_id=current_user.id,
         **visit.dict()
     )
 
     db.add(db_visit)
+    db.flush()  # product_count/mf_count/is_approved default'ları uygulansın
+    delta = pharmacy_visit_delta(db_visit)
+    apply_rollup_deltas(db, delta)
+    publish_event(db, *_pharmacy_visit_event(db, PHARMACY_VISIT_CREATED, db_visit, current_user.full_name))
     db.commit()
+    week_activity.apply(delta)
     db.refresh(db_visit)
     return db_visit
 
 
+@router.post("/batch", response_model=DailyVisitBatchResponse)
+def create_visits_batch(
+    batch: DailyVisitBatch,
+    db: Session = Depends(get_db),
+    current_user: Employee = Depends(get_current_user)
+):
+    """
+    Hekim ve eczane ziyaretlerini toplu ekle (tek istek, tek transaction)
+    - Her ziyaret için sonuç istekteki sırasıyla döner (index)
+    - Olmayan eczaneye ait kalemler "error" olarak işaretlenir, diğerleri eklenir
+    - Ziyaretler tek bir çok satırlı INSERT ... RETURNING ile yazılır
+    """
+    total = len(batch.doctor_visits) + len(batch.pharmacy_visits)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="Gönderilecek ziyaret yok")
+    if total > settings.VISIT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tek istekte en fazla {settings.VISIT_BATCH_MAX_ITEMS} ziyaret gönderilebilir"
+        )
+
+    doctor_results = {}
+    pharmacy_results = {}
+
+    # Ortak doğrulama: tüm eczaneler tek sorguda
+    pharmacy_ids = {visit.pharmacy_id for visit in batch.pharmacy_visits}
+    existing_pharmacies = set(
+        db.scalars(select(Pharmacy.id).where(Pharmacy.id.in_(pharmacy_ids))).all()
+    ) if pharmacy_ids else set()
+
+    doctor_rows = [
+        (index, {"employee_id": current_user.id, **visit.dict()})
+        for index, visit in enumerate(batch.doctor_visits)
+    ]
+
+    pharmacy_rows = []
+    for index, visit in enumerate(batch.pharmacy_visits):
+        if visit.pharmacy_id not in existing_pharmacies:
+            pharmacy_results[index] = {"index": index, "status": "error", "detail": "Eczane bulunamadı"}
+            continue
+        pharmacy_rows.append((index, {"employee_id": current_user.id, **visit.dict()}))
+
+    deltas = []
+    created_events = []
+    for model, schema, rows, results, make_delta, make_event in (
+        (DoctorVisit, DoctorVisitResponse, doctor_rows, doctor_results, doctor_visit_delta,
+         lambda visit: _doctor_visit_event(DOCTOR_VISIT_CREATED, visit)),
+        (PharmacyVisit, PharmacyVisitResponse, pharmacy_rows, pharmacy_results, pharmacy_visit_delta,
+         lambda visit: _pharmacy_visit_event(db, PHARMACY_VISIT_CREATED, visit, current_user.full_name)),
+    ):
+        if not rows:
+            continue
+        created = db.scalars(
+            insert(model).returning(model, sort_by_parameter_order=True),
+            [values for _, values in rows]
+        ).all()
+        for (index, _), db_visit in zip(rows, created):
+            # Commit nesneleri expire eder; ziyaret başına tekrar SELECT atılmasın diye şimdi serialize edilir
+            results[index] = {"index": index, "status": "created", "visit": schema.model_validate(db_visit)}
+            deltas.append(make_delta(db_visit))
+            created_events.append(make_event(db_visit))
+
+    apply_rollup_deltas(db, *deltas)
+    publish_events(db, created_events)
+    db.commit()
+    week_activity.apply(*deltas)
+
+    return {
+        "created": len(deltas),
+        "failed": total - len(deltas),
+        "doctor_visits": [doctor_results[index] for index in sorted(doctor_results)],
+        "pharmacy_visits": [pharmacy_results[index] for index in sorted(pharmacy_results)],
+    }
+
+
 @router.get("/pharmacies/{visit_id}", response_model=PharmacyVisitResponse)
 def get_pharmacy_visit(
     visit_id: int,
@@ -520,7 +653,7 @@ def delete_pharmacy_visit(
     """
     Eczane ziyaretini sil
     """
-    db_visit = db.query(PharmacyVisit).filter(PharmacyVisit.id == visit_id).first()
+    db_visit = db.query(PharmacyVisit).filter(PharmacyVisit.id == visit_id).with_for_update().first()
 
     if not db_visit:
         raise HTTPException(status_code=404, detail="Visit not found")
@@ -530,8 +663,12 @@ def delete_pharmacy_visit(
         if db_visit.employee_id != current_user.id:
             raise HTTPException(status_code=403, detail="Not authorized")
 
-    db.delete(db_visit)
+    delta = pharmacy_visit_delta(db_visit, sign=-1)
+    apply_rollup_deltas(db, delta)
+    publish_event(db, *_deleted_visit_event(PHARMACY_VISIT_DELETED, db_visit))
+    _delete_locked_visit(db, db_visit)
     db.commit()
+    week_activity.apply(delta)
     return {"message": "Visit deleted successfully"}
 
 
@@ -545,7 +682,7 @@ def update_pharmacy_visit(
     """
     Eczane ziyaretini güncelle - Sadece aynı gün 23:59'a kadar düzenlenebilir
     """
-    db_visit = db.query(PharmacyVisit).filter(PharmacyVisit.id == visit_id).first()
+    db_visit = db.query(PharmacyVisit).filter(PharmacyVisit.id == visit_id).with_for_update().first()
 
     if not db_visit:
         raise HTTPException(status_code=404, detail="Ziyaret bulunamadı")
@@ -570,11 +707,19 @@ def update_pharmacy_visit(
         raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok")
 
     # Güncelle - Tüm güncellenebilir field'ları kaydet
+    if visit_data.pharmacy_id != db_visit.pharmacy_id:
+        _ensure_pharmacy_exists(db, visit_data.pharmacy_id)
+
+    previous = pharmacy_visit_delta(db_visit, sign=-1)
     update_data = visit_data.dict(exclude_unset=True, exclude={'visit_date'})
     for field, value in update_data.items():
         setattr(db_visit, field, value)
 
+    current = pharmacy_visit_delta(db_visit)
+    apply_rollup_deltas(db, previous, current)
+    publish_event(db, *_pharmacy_visit_event(db, PHARMACY_VISIT_UPDATED, db_visit))
     db.commit()
+    week_activity.apply(previous, current)
     db.refresh(db_visit)
     return db_visit
 
@@ -593,12 +738,15 @@ def toggle_pharmacy_visit_approval(
         raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok")
 
     # Ziyareti bul
-    db_visit = db.query(PharmacyVisit).filter(PharmacyVisit.id == visit_id).first()
+    db_visit = db.query(PharmacyVisit).filter(PharmacyVisit.id == visit_id).with_for_update().first()
     if not db_visit:
         raise HTTPException(status_code=404, detail="Ziyaret bulunamadı")
 
     # Toggle approval
+    previous = pharmacy_visit_delta(db_visit, sign=-1)
     db_visit.is_approved = not db_visit.is_approved
+    apply_rollup_deltas(db, previous, pharmacy_visit_delta(db_visit))
+    publish_event(db, *_pharmacy_visit_event(db, PHARMACY_VISIT_APPROVAL, db_visit))
     db.commit()
     db.refresh(db_visit)
 
@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
+from sqlalchemy import func, and_
 from typing import Optional
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 
 from ..database import get_db
 from ..models.employee import Employee, EmployeeRole
-from ..models.doctor_visit import DoctorVisit
-from ..models.pharmacy_visit import PharmacyVisit
-from ..models.sale import Sale
-from ..models.goal import Goal
+from ..models.daily_activity import DailyActivityRollup
+from ..services.chart_buckets import activity_buckets, bucket_start, sales_buckets, shift_buckets
+from ..services.leaderboard import employee_standing, leaderboard, top_employees
+from ..services.stats import PERIOD_PATTERN, StatsSpec, stats_query
+from ..services.week_activity import week_activity
 from ..utils.dependencies import get_current_user
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
@@ -20,7 +21,7 @@ def get_dashboard_stats(
     employee_id: Optional[int] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    period: Optional[str] = Query(None, regex="^(day|week|last-week|month|year)$"),
+    period: Optional[str] = Query(None, regex=PERIOD_PATTERN),
     db: Session = Depends(get_db),
     current_user: Employee = Depends(get_current_user)
 ):
@@ -29,111 +30,34 @@ def get_dashboard_stats(
     - Admin/Manager: Tüm çalışanları veya seçili çalışanı görebilir
     - Employee: Sadece kendisini görebilir
     """
-    # Yetki kontrolü
-    if current_user.role not in [EmployeeRole.ADMIN, EmployeeRole.MANAGER]:
-        employee_id = current_user.id
-    elif employee_id is None:
-        # Admin tüm çalışanları görmek istiyorsa
-        pass
-
-    # Tarih aralığını belirle
-    if not start_date or not end_date:
-        today = date.today()
-        if period == "day":
-            start_date = today
-            end_date = today
-        elif period == "week":
-            # Son 7 gün
-            start_date = today - timedelta(days=7)
-            end_date = today
-        elif period == "last-week":
-            # Geçen hafta: 2 pazar öncesi 00:00'dan geçen pazar 23:59'a kadar
-            weekday = today.weekday()
-            if weekday == 6:
-                days_since_sunday = 0
-            else:
-                days_since_sunday = weekday + 1
-
-            last_sunday = today - timedelta(days=days_since_sunday)
-            prev_sunday = last_sunday - timedelta(days=7)
-            start_date = prev_sunday
-            end_date = last_sunday - timedelta(days=1)  # Geçen cumartesi 23:59
-        elif period == "month":
-            # Son 30 gün
-            start_date = today - timedelta(days=30)
-            end_date = today
-        elif period == "year":
-            # Son 365 gün
-            start_date = today - timedelta(days=365)
-            end_date = today
-        else:
-            # Varsayılan: Son 30 gün
-            start_date = today - timedelta(days=30)
-            end_date = today
-
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-
-    # Ziyaret istatistikleri
-    doctor_visit_query = db.query(DoctorVisit).filter(
-        and_(
-            DoctorVisit.visit_date >= start_datetime,
-            DoctorVisit.visit_date <= end_datetime
-        )
-    )
-    if employee_id:
-        doctor_visit_query = doctor_visit_query.filter(DoctorVisit.employee_id == employee_id)
-
-    pharmacy_visit_query = db.query(PharmacyVisit).filter(
-        and_(
-            PharmacyVisit.visit_date >= start_datetime,
-            PharmacyVisit.visit_date <= end_datetime
-        )
-    )
-    if employee_id:
-        pharmacy_visit_query = pharmacy_visit_query.filter(PharmacyVisit.employee_id == employee_id)
+    # Yetki ve tarih aralığı (varsayılan: son 30 gün), ziyaret toplamları ve hedef tek sorguda
+    spec = StatsSpec.for_request(current_user, employee_id, period, start_date, end_date, default_period="month")
+    start_date, end_date = spec.start_date, spec.end_date
+    totals = db.execute(stats_query(spec, "activity", "goal")).one()
 
-    doctor_visits = doctor_visit_query.count()
-    pharmacy_visits = pharmacy_visit_query.count()
+    doctor_visits = int(totals.doctor_visit_count)
+    pharmacy_visits = int(totals.pharmacy_visit_count)
     total_visits = doctor_visits + pharmacy_visits
 
     # Satış istatistikleri (Eczane ziyaretlerinden product_count toplamı)
-    product_count_query = db.query(func.sum(PharmacyVisit.product_count)).filter(
-        and_(
-            PharmacyVisit.visit_date >= start_date,
-            PharmacyVisit.visit_date <= end_date
-        )
-    )
-    if employee_id:
-        product_count_query = product_count_query.filter(PharmacyVisit.employee_id == employee_id)
-
-    total_sales = product_count_query.scalar() or 0
+    total_sales = int(totals.product_count)
 
     # Gelir hesabı (şimdilik 0, ileride entegre edilecek)
     total_revenue = 0.0
 
-    # Hedef durumu
-    goal_query = db.query(Goal).filter(
-        and_(
-            Goal.start_date <= end_date,
-            Goal.end_date >= start_date
-        )
-    )
-    if employee_id:
-        goal_query = goal_query.filter(Goal.employee_id == employee_id)
-
-    current_goal = goal_query.first()
-
+    # Hedef durumu (dönemle çakışan ilk hedef)
     goal_status = None
-    if current_goal:
-        visit_progress = (total_visits / float(current_goal.target_visits) * 100) if current_goal.target_visits > 0 else 0
-        sales_progress = (total_revenue / float(current_goal.target_sales) * 100) if current_goal.target_sales > 0 else 0
+    if totals.goal_target_visits is not None:
+        target_visits = totals.goal_target_visits
+        target_sales = totals.goal_target_sales or 0
+        visit_progress = (total_visits / float(target_visits) * 100) if target_visits > 0 else 0
+        sales_progress = (total_revenue / float(target_sales) * 100) if target_sales > 0 else 0
 
         goal_status = {
-            "target_visits": current_goal.target_visits,
+            "target_visits": target_visits,
             "current_visits": total_visits,
             "visit_progress": round(visit_progress, 2),
-            "target_sales": current_goal.target_sales,
+            "target_sales": target_sales,
             "current_sales": round(total_revenue, 2),
             "sales_progress": round(sales_progress, 2)
         }
@@ -184,42 +108,17 @@ def get_visits_chart(
     if not end_date:
         end_date = date.today()
 
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-
-    # Gruplama için SQL
-    if group_by == "day":
-        date_trunc = func.date_trunc('day', DoctorVisit.visit_date)
-    elif group_by == "week":
-        date_trunc = func.date_trunc('week', DoctorVisit.visit_date)
-    elif group_by == "month":
-        date_trunc = func.date_trunc('month', DoctorVisit.visit_date)
-    else:  # year
-        date_trunc = func.date_trunc('year', DoctorVisit.visit_date)
-
-    query = db.query(
-        date_trunc.label('period'),
-        func.count(DoctorVisit.id).label('count')
-    ).filter(
-        and_(
-            DoctorVisit.visit_date >= start_datetime,
-            DoctorVisit.visit_date <= end_datetime
-        )
-    )
-
-    if employee_id:
-        query = query.filter(DoctorVisit.employee_id == employee_id)
-
-    results = query.group_by('period').order_by('period').all()
+    # Tüm dilimler tek sorguda, boş dilimler 0 (hafta: Pazar başlangıçlı)
+    buckets = activity_buckets(db, group_by, start_date, end_date, employee_id)
 
     return {
         "group_by": group_by,
         "data": [
             {
-                "period": r.period.isoformat() if r.period else None,
-                "count": r.count
+                "period": bucket.start.isoformat(),
+                "count": int(bucket.values["doctor_visits"])
             }
-            for r in results
+            for bucket in buckets
         ]
     }
 
@@ -246,44 +145,18 @@ def get_sales_chart(
     if not end_date:
         end_date = date.today()
 
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-
-    # Gruplama için SQL
-    if group_by == "day":
-        date_trunc = func.date_trunc('day', Sale.sale_date)
-    elif group_by == "week":
-        date_trunc = func.date_trunc('week', Sale.sale_date)
-    elif group_by == "month":
-        date_trunc = func.date_trunc('month', Sale.sale_date)
-    else:  # year
-        date_trunc = func.date_trunc('year', Sale.sale_date)
-
-    query = db.query(
-        date_trunc.label('period'),
-        func.count(Sale.id).label('count'),
-        func.sum(Sale.total_amount).label('revenue')
-    ).filter(
-        and_(
-            Sale.sale_date >= start_datetime,
-            Sale.sale_date <= end_datetime
-        )
-    )
-
-    if employee_id:
-        query = query.filter(Sale.employee_id == employee_id)
-
-    results = query.group_by('period').order_by('period').all()
+    # Tüm dilimler tek sorguda, boş dilimler 0 (hafta: Pazar başlangıçlı)
+    buckets = sales_buckets(db, group_by, start_date, end_date, employee_id)
 
     return {
         "group_by": group_by,
         "data": [
             {
-                "period": r.period.isoformat() if r.period else None,
-                "count": r.count,
-                "revenue": float(r.revenue) if r.revenue else 0.0
+                "period": bucket.start.isoformat(),
+                "count": int(bucket.values["count"]),
+                "revenue": float(bucket.values["revenue"])
             }
-            for r in results
+            for bucket in buckets
         ]
     }
 
@@ -308,35 +181,8 @@ def get_top_employees(
     if not end_date:
         end_date = date.today()
 
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-
-    # En çok satış yapan çalışanlar
-    results = db.query(
-        Employee.id,
-        Employee.full_name,
-        func.count(DoctorVisit.id).label('visit_count'),
-        func.count(Sale.id).label('sale_count'),
-        func.coalesce(func.sum(Sale.total_amount), 0).label('total_revenue')
-    ).outerjoin(
-        DoctorVisit, and_(
-            DoctorVisit.employee_id == Employee.id,
-            DoctorVisit.visit_date >= start_datetime,
-            DoctorVisit.visit_date <= end_datetime
-        )
-    ).outerjoin(
-        Sale, and_(
-            Sale.employee_id == Employee.id,
-            Sale.sale_date >= start_datetime,
-            Sale.sale_date <= end_datetime
-        )
-    ).filter(
-        Employee.role == EmployeeRole.EMPLOYEE
-    ).group_by(
-        Employee.id, Employee.full_name
-    ).order_by(
-        func.sum(Sale.total_amount).desc()
-    ).limit(limit).all()
+    # Ciroya göre sıralama (ziyaret ve satış ayrı toplanır, RANK() OVER)
+    entries = top_employees(db, start_date, end_date, limit)
 
     return {
         "period": {
@@ -345,13 +191,14 @@ def get_top_employees(
         },
         "employees": [
             {
-                "id": r.id,
-                "name": r.full_name,
-                "visit_count": r.visit_count or 0,
-                "sale_count": r.sale_count or 0,
-                "total_revenue": float(r.total_revenue) if r.total_revenue else 0.0
+                "id": entry.employee_id,
+                "name": entry.employee_name,
+                "rank": entry.rank,
+                "visit_count": entry.visit_count,
+                "sale_count": entry.sale_count,
+                "total_revenue": entry.total_revenue
             }
-            for r in results
+            for entry in entries
         ]
     }
 
@@ -372,110 +219,83 @@ def get_employee_ranking(
     if not end_date:
         end_date = date.today()
 
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-
-    # Tüm çalışanların satış toplamları
-    rankings = db.query(
-        Employee.id,
-        Employee.full_name,
-        func.coalesce(func.sum(Sale.total_amount), 0).label('total_revenue')
-    ).outerjoin(
-        Sale, and_(
-            Sale.employee_id == Employee.id,
-            Sale.sale_date >= start_datetime,
-            Sale.sale_date <= end_datetime
-        )
-    ).filter(
-        Employee.role == EmployeeRole.EMPLOYEE
-    ).group_by(
-        Employee.id, Employee.full_name
-    ).order_by(
-        func.sum(Sale.total_amount).desc()
-    ).all()
-
-    # Kullanıcının sırasını bul
-    user_rank = None
-    for idx, r in enumerate(rankings, 1):
-        if r.id == current_user.id:
-            user_rank = {
-                "rank": idx,
-                "total_employees": len(rankings),
-                "revenue": float(r.total_revenue) if r.total_revenue else 0.0
-            }
-            break
-
     # Admin/Manager ise tüm sıralamayı döndür
     if current_user.role in [EmployeeRole.ADMIN, EmployeeRole.MANAGER]:
-        return {
-            "my_ranking": user_rank,
-            "all_rankings": [
-                {
-                    "rank": idx,
-                    "id": r.id,
-                    "name": r.full_name,
-                    "revenue": float(r.total_revenue) if r.total_revenue else 0.0
-                }
-                for idx, r in enumerate(rankings, 1)
-            ]
-        }
+        entries = leaderboard(db, start_date, end_date)
+        standing = next((entry for entry in entries if entry.employee_id == current_user.id), None)
     else:
+        # Çalışan sadece kendi satırını alır (liste aktarılmaz)
+        entries = None
+        standing = employee_standing(db, start_date, end_date, current_user.id)
+
+    user_rank = None
+    if standing:
+        user_rank = {
+            "rank": standing.rank,
+            "total_employees": standing.total_employees,
+            "revenue": standing.total_revenue
+        }
+
+    if entries is None:
         return {
             "my_ranking": user_rank
         }
 
+    return {
+        "my_ranking": user_rank,
+        "all_rankings": [
+            {
+                "rank": entry.rank,
+                "id": entry.employee_id,
+                "name": entry.employee_name,
+                "revenue": entry.total_revenue
+            }
+            for entry in entries
+        ]
+    }
+
 
 @router.get("/week-star")
 def get_week_star(
-    db: Session = Depends(get_db),
     current_user: Employee = Depends(get_current_user)
 ):
     """
     Haftanın yıldızı - En çok satış yapan çalışan (bu hafta)
     """
-    today = date.today()
-    weekday = today.weekday()
-    if weekday == 6:  # Bugün pazar
-        days_since_sunday = 0
-    else:
-        days_since_sunday = weekday + 1
-
-    last_sunday = today - timedelta(days=days_since_sunday)
-    start_datetime = datetime.combine(last_sunday, datetime.min.time())
-    end_datetime = datetime.combine(today, datetime.max.time())
-
-    # Bu hafta en çok product_count toplayan çalışan
-    result = db.query(
-        Employee.id,
-        Employee.full_name,
-        func.coalesce(func.sum(PharmacyVisit.product_count), 0).label('sales_count')
-    ).join(
-        PharmacyVisit, PharmacyVisit.employee_id == Employee.id
-    ).filter(
-        and_(
-            Employee.role == EmployeeRole.EMPLOYEE,
-            PharmacyVisit.visit_date >= start_datetime,
-            PharmacyVisit.visit_date <= end_datetime
-        )
-    ).group_by(
-        Employee.id, Employee.full_name
-    ).order_by(
-        func.sum(PharmacyVisit.product_count).desc()
-    ).first()
-
-    if not result:
+    star = week_activity.week_star()
+    if not star:
         return {
             "employee_name": "Henüz veri yok",
             "sales_count": 0
         }
 
     return {
-        "employee_id": result.id,
-        "employee_name": result.full_name,
-        "sales_count": int(result.sales_count)
+        "employee_id": star.employee_id,
+        "employee_name": star.employee_name,
+        "sales_count": star.product_count
     }
 
 
+@router.get("/week-leaderboard")
+def get_week_leaderboard(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: Employee = Depends(get_current_user)
+):
+    """
+    Bu haftanın ürün sıralaması (Pazar'dan bugüne) - ilk N çalışan
+    """
+    return [
+        {
+            "rank": standing.rank,
+            "employee_id": standing.employee_id,
+            "employee_name": standing.employee_name,
+            "sales_count": standing.product_count,
+            "pharmacy_visit_count": standing.pharmacy_visit_count
+        }
+        for standing in week_activity.top(limit)
+    ]
+
+
 @router.get("/chart-data")
 def get_chart_data(
     period: str = Query("month", regex="^(week|month|year)$"),
@@ -487,100 +307,35 @@ def get_chart_data(
     """
     today = date.today()
 
-    # Periyoda göre veri yapısını belirle
+    # Periyoda göre dilimler - hepsi tek sorguda (günlük özet tablosundan)
     if period == "week":
-        # Son 5 iş günü (Pazartesi-Cuma)
-        data = []
-        days = ["Pzt", "Sal", "Çar", "Per", "Cum"]
-        for i in range(4, -1, -1):
-            day_date = today - timedelta(days=i)
-
-            # O günün ziyaret sayısı
-            visit_count = db.query(func.count(DoctorVisit.id)).filter(
-                func.date(DoctorVisit.visit_date) == day_date
-            ).scalar() or 0
-
-            # O günün satış sayısı (product_count toplamı)
-            sales_count = db.query(func.coalesce(func.sum(PharmacyVisit.product_count), 0)).filter(
-                func.date(PharmacyVisit.visit_date) == day_date
-            ).scalar() or 0
-
-            data.append({
-                "name": days[4-i],
-                "ziyaret": visit_count,
-                "satis": int(sales_count)
-            })
+        # Son 5 iş günü (Pazartesi-Cuma): son 7 günden hafta sonu çıkarılır
+        days = ["Pzt", "Sal", "Çar", "Per", "Cum", "Cmt", "Paz"]
+        buckets = activity_buckets(db, "day", today - timedelta(days=6), today)
+        buckets = [bucket for bucket in buckets if bucket.start.weekday() < 5]
+        names = [days[bucket.start.weekday()] for bucket in buckets]
 
     elif period == "month":
-        # Son 4 hafta
-        data = []
-        for week_num in range(4, 0, -1):
-            week_start = today - timedelta(days=(week_num * 7))
-            week_end = week_start + timedelta(days=6)
-
-            visit_count = db.query(func.count(DoctorVisit.id)).filter(
-                and_(
-                    DoctorVisit.visit_date >= datetime.combine(week_start, datetime.min.time()),
-                    DoctorVisit.visit_date <= datetime.combine(week_end, datetime.max.time())
-                )
-            ).scalar() or 0
-
-            sales_count = db.query(func.coalesce(func.sum(PharmacyVisit.product_count), 0)).filter(
-                and_(
-                    PharmacyVisit.visit_date >= datetime.combine(week_start, datetime.min.time()),
-                    PharmacyVisit.visit_date <= datetime.combine(week_end, datetime.max.time())
-                )
-            ).scalar() or 0
-
-            data.append({
-                "name": f"Hafta {5-week_num}",
-                "ziyaret": visit_count,
-                "satis": int(sales_count)
-            })
+        # Son 4 hafta (Pazar başlangıçlı, bu hafta dahil)
+        first_week = shift_buckets(bucket_start(today, "week"), "week", -3)
+        buckets = activity_buckets(db, "week", first_week, today)
+        names = [f"Hafta {i}" for i in range(1, len(buckets) + 1)]
 
     else:  # year
-        # Son 12 ay (bugünden geriye 12 ay)
-        data = []
+        # Son 12 ay (bu ay dahil)
         months = ["Oca", "Şub", "Mar", "Nis", "May", "Haz", "Tem", "Ağu", "Eyl", "Eki", "Kas", "Ara"]
+        first_month = shift_buckets(bucket_start(today, "month"), "month", -11)
+        buckets = activity_buckets(db, "month", first_month, today)
+        names = [months[bucket.start.month - 1] for bucket in buckets]
 
-        for i in range(11, -1, -1):
-            # i ay önce
-            if i == 0:
-                target_month = today.month
-                target_year = today.year
-            else:
-                # i ay önceki ay ve yılı hesapla
-                months_ago = i
-                target_year = today.year
-                target_month = today.month - months_ago
-
-                while target_month <= 0:
-                    target_month += 12
-                    target_year -= 1
-
-            visit_count = db.query(func.count(DoctorVisit.id)).filter(
-                and_(
-                    extract('year', DoctorVisit.visit_date) == target_year,
-                    extract('month', DoctorVisit.visit_date) == target_month
-                )
-            ).scalar() or 0
-
-            sales_count = db.query(func.coalesce(func.sum(PharmacyVisit.product_count), 0)).filter(
-                and_(
-                    extract('year', PharmacyVisit.visit_date) == target_year,
-                    extract('month', PharmacyVisit.visit_date) == target_month
-                )
-            ).scalar() or 0
-
-            # Sadece veri olan ayları ekle (0 olanları atla)
-            if visit_count > 0 or sales_count > 0:
-                data.append({
-                    "name": months[target_month - 1],
-                    "ziyaret": visit_count,
-                    "satis": int(sales_count)
-                })
-
-    return data
+    return [
+        {
+            "name": name,
+            "ziyaret": int(bucket.values["doctor_visits"]),
+            "satis": int(bucket.values["product_count"])
+        }
+        for name, bucket in zip(names, buckets)
+    ]
 
 
 @router.get("/doctor-visits-pie")
@@ -593,31 +348,31 @@ def get_doctor_visits_pie(
     """
     today = date.today()
     start_date = today - timedelta(days=30)
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(today, datetime.max.time())
-
-    # Çalışanlara göre hekim ziyareti sayıları
+    # Çalışanlara göre hekim ziyareti sayıları (günlük özet tablosundan)
+    visit_count = func.sum(DailyActivityRollup.doctor_visit_count)
     results = db.query(
         Employee.full_name,
-        func.count(DoctorVisit.id).label('visit_count')
+        visit_count.label('visit_count')
     ).join(
-        DoctorVisit, DoctorVisit.employee_id == Employee.id
+        DailyActivityRollup, DailyActivityRollup.employee_id == Employee.id
     ).filter(
         and_(
             Employee.role == EmployeeRole.EMPLOYEE,
-            DoctorVisit.visit_date >= start_datetime,
-            DoctorVisit.visit_date <= end_datetime
+            DailyActivityRollup.activity_date >= start_date,
+            DailyActivityRollup.activity_date <= today
         )
     ).group_by(
         Employee.id, Employee.full_name
+    ).having(
+        visit_count > 0
     ).order_by(
-        func.count(DoctorVisit.id).desc()
+        visit_count.desc()
     ).all()
 
     return [
         {
             "name": r.full_name,
-            "value": r.visit_count
+            "value": int(r.visit_count)
         }
         for r in results
     ]
@@ -633,31 +388,31 @@ def get_pharmacy_visits_pie(
     """
     today = date.today()
     start_date = today - timedelta(days=30)
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(today, datetime.max.time())
-
-    # Çalışanlara göre eczane ziyareti sayıları
+    # Çalışanlara göre eczane ziyareti sayıları (günlük özet tablosundan)
+    visit_count = func.sum(DailyActivityRollup.pharmacy_visit_count)
     results = db.query(
         Employee.full_name,
-        func.count(PharmacyVisit.id).label('visit_count')
+        visit_count.label('visit_count')
     ).join(
-        PharmacyVisit, PharmacyVisit.employee_id == Employee.id
+        DailyActivityRollup, DailyActivityRollup.employee_id == Employee.id
     ).filter(
         and_(
             Employee.role == EmployeeRole.EMPLOYEE,
-            PharmacyVisit.visit_date >= start_datetime,
-            PharmacyVisit.visit_date <= end_datetime
+            DailyActivityRollup.activity_date >= start_date,
+            DailyActivityRollup.activity_date <= today
         )
     ).group_by(
         Employee.id, Employee.full_name
+    ).having(
+        visit_count > 0
     ).order_by(
-        func.count(PharmacyVisit.id).desc()
+        visit_count.desc()
     ).all()
 
     return [
         {
             "name": r.full_name,
-            "value": r.visit_count
+            "value": int(r.visit_count)
         }
         for r in results
     ]
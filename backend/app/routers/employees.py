@@ -1,18 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
 from ..database import get_db
 from ..models.employee import Employee
 from ..schemas.employee import EmployeeCreate, EmployeeUpdate, EmployeeResponse
-from ..utils.dependencies import get_current_user, get_current_admin_user
+from ..services.reference_data import EMPLOYEES, bump_table_version, reference_data
+from ..utils.dependencies import get_current_user, get_current_admin_user, invalidate_principal
 from ..utils.auth import get_password_hash
+from ..utils.http_cache import etag_for, not_modified
 
 router = APIRouter(prefix="/employees", tags=["Employees"])
 
 
+def _get_password_hash_of(db: Session, employee_id: int) -> str:
+    """
+    current_user cache'ten gelir ve şifre hash'i taşımaz; doğrulama için DB'den oku
+    """
+    hashed_password = db.query(Employee.hashed_password).filter(Employee.id == employee_id).scalar()
+    if hashed_password is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return hashed_password
+
+
+def _commit_employee_change(db: Session):
+    """
+    Commit + employees sürüm sayacını artır (liste ETag'leri değişsin)
+    """
+    bump_table_version(db, EMPLOYEES)
+    db.commit()
+    reference_data.invalidate()
+
+
 @router.get("/", response_model=List[EmployeeResponse])
 def get_employees(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
@@ -20,16 +43,39 @@ def get_employees(
 ):
     """
     Retrieve employees
+    If-None-Match güncelse 304 (sorgu çalışmaz)
     """
-    employees = db.query(Employee).offset(skip).limit(limit).all()
+    snapshot = reference_data.snapshot()
+    cached = not_modified(
+        request, response,
+        etag_for(EMPLOYEES, snapshot.versions[EMPLOYEES], skip, limit),
+        snapshot.modified_at.get(EMPLOYEES)
+    )
+    if cached:
+        return cached
+
+    employees = db.query(Employee).order_by(Employee.id).offset(skip).limit(limit).all()
     return employees
 
 
 @router.get("/me", response_model=EmployeeResponse)
-def get_current_employee(current_user: Employee = Depends(get_current_user)):
+def get_current_employee(
+    request: Request,
+    response: Response,
+    current_user: Employee = Depends(get_current_user)
+):
     """
     Get current logged in employee
+    ETag kaydın updated_at'inden üretilir
     """
+    last_modified = current_user.updated_at or current_user.created_at
+    cached = not_modified(
+        request, response,
+        etag_for("employees/me", current_user.id, last_modified),
+        last_modified
+    )
+    if cached:
+        return cached
     return current_user
 
 
@@ -70,7 +116,7 @@ def create_employee(
         hire_date=employee.hire_date,
     )
     db.add(db_employee)
-    db.commit()
+    _commit_employee_change(db)
     db.refresh(db_employee)
     return db_employee
 
@@ -96,7 +142,8 @@ def update_employee(
     for field, value in update_data.items():
         setattr(db_employee, field, value)
 
-    db.commit()
+    _commit_employee_change(db)
+    invalidate_principal(db_employee.id)
     db.refresh(db_employee)
     return db_employee
 
@@ -112,7 +159,7 @@ def verify_manager_password(
     """
     from ..utils.auth import verify_password
 
-    if not verify_password(password, current_user.hashed_password):
+    if not verify_password(password, _get_password_hash_of(db, current_user.id)):
         raise HTTPException(status_code=401, detail="Incorrect password")
 
     return {"verified": True}
@@ -134,7 +181,7 @@ def deactivate_employee(
     from ..utils.auth import verify_password
 
     # Verify manager password
-    if not verify_password(manager_password, current_user.hashed_password):
+    if not verify_password(manager_password, _get_password_hash_of(db, current_user.id)):
         raise HTTPException(status_code=401, detail="Incorrect manager password")
 
     db_employee = db.query(Employee).filter(Employee.id == employee_id).first()
@@ -145,7 +192,8 @@ def deactivate_employee(
         raise HTTPException(status_code=400, detail="Cannot deactivate yourself")
 
     db_employee.is_active = False
-    db.commit()
+    _commit_employee_change(db)
+    invalidate_principal(db_employee.id)
     db.refresh(db_employee)
     return db_employee
 
@@ -165,7 +213,8 @@ def activate_employee(
         raise HTTPException(status_code=404, detail="Employee not found")
 
     db_employee.is_active = True
-    db.commit()
+    _commit_employee_change(db)
+    invalidate_principal(db_employee.id)
     db.refresh(db_employee)
     return db_employee
 
@@ -194,7 +243,7 @@ def change_employee_role(
         )
 
     # Verify manager password
-    if not verify_password(manager_password, current_user.hashed_password):
+    if not verify_password(manager_password, _get_password_hash_of(db, current_user.id)):
         raise HTTPException(status_code=401, detail="Incorrect manager password")
 
     db_employee = db.query(Employee).filter(Employee.id == employee_id).first()
@@ -211,7 +260,8 @@ def change_employee_role(
         raise HTTPException(status_code=400, detail="Invalid role")
 
     db_employee.role = role_enum
-    db.commit()
+    _commit_employee_change(db)
+    invalidate_principal(db_employee.id)
     db.refresh(db_employee)
     return db_employee
 
@@ -228,12 +278,14 @@ def change_password(
     """
     from ..utils.auth import verify_password
 
+    db_employee = db.query(Employee).filter(Employee.id == current_user.id).first()
+
     # Verify current password
-    if not verify_password(current_password, current_user.hashed_password):
+    if not verify_password(current_password, db_employee.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect current password")
 
     # Hash and update new password
-    current_user.hashed_password = get_password_hash(new_password)
+    db_employee.hashed_password = get_password_hash(new_password)
     db.commit()
 
     return {"message": "Password changed successfully"}
@@ -297,7 +349,8 @@ def update_employee_permissions(
 
     # Update permissions
     db_employee.permissions = permissions
-    db.commit()
+    _commit_employee_change(db)
+    invalidate_principal(db_employee.id)
     db.refresh(db_employee)
 
     return db_employee
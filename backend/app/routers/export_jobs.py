@@ -0,0 +1,101 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models.employee import Employee, EmployeeRole
+from ..schemas.export_job import ExportJobCreate, ExportJobResponse
+from ..services.export_jobs import JOB_COMPLETED, ExportQueueFull, export_jobs
+from ..utils.dependencies import get_current_user
+from ..utils.excel_export import XLSX_MEDIA_TYPE
+
+router = APIRouter(prefix="/export-jobs", tags=["Export Jobs"])
+
+
+def _job_response(job: dict) -> ExportJobResponse:
+    response = ExportJobResponse(**job)
+    if job["status"] == JOB_COMPLETED:
+        response.download_url = f"{router.prefix}/{job['id']}/download"
+    return response
+
+
+def _get_job_or_404(job_id: str, current_user: Employee) -> dict:
+    job = export_jobs.get(job_id)
+    # Başkasının job'ı varlığı belli edilmeden 404 döner (admin hariç)
+    if not job or (job["owner_id"] != current_user.id and current_user.role != EmployeeRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job bulunamadı"
+        )
+    return job
+
+
+@router.post("/", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_export_job(
+    request: ExportJobCreate,
+    db: Session = Depends(get_db),
+    current_user: Employee = Depends(get_current_user)
+):
+    """
+    Export'u arka planda üretmek üzere kuyruğa al
+    - Filtreler senkron export endpoint'leriyle aynıdır
+    - Aynı filtreler ve değişmemiş veri için mevcut dosya kullanılır (reused=true)
+    """
+    # Only managers/admins can export reports
+    if current_user.role not in [EmployeeRole.MANAGER, EmployeeRole.ADMIN]:
+        raise HTTPException(status_code=403, detail="Only managers can export reports")
+
+    try:
+        job = export_jobs.submit(db, request.kind, request.filters, current_user.id)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=json.loads(e.json(include_url=False))
+        )
+    except ExportQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Export kuyruğu dolu, lütfen daha sonra tekrar deneyin"
+        )
+
+    return _job_response(job)
+
+
+@router.get("/{job_id}", response_model=ExportJobResponse)
+def get_export_job(
+    job_id: str,
+    current_user: Employee = Depends(get_current_user)
+):
+    """
+    Export job durumu (queued, running, completed, failed)
+    """
+    return _job_response(_get_job_or_404(job_id, current_user))
+
+
+@router.get("/{job_id}/download")
+def download_export_job(
+    job_id: str,
+    current_user: Employee = Depends(get_current_user)
+):
+    """
+    Tamamlanmış export'un dosyasını indir
+    """
+    job = _get_job_or_404(job_id, current_user)
+
+    if job["status"] != JOB_COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export henüz hazır değil (durum: {job['status']})"
+        )
+
+    path = export_jobs.artifact_path(job)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Export dosyasının süresi doldu, lütfen yeniden oluşturun"
+        )
+
+    return FileResponse(path, media_type=XLSX_MEDIA_TYPE, filename=job["filename"])
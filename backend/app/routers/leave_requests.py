@@ -1,12 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import DateTime, tuple_
 from typing import List, Optional
 from datetime import date, datetime, timedelta
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-import io
 
 from ..database import get_db
 from ..models.employee import Employee, EmployeeRole, Gender
@@ -20,43 +16,23 @@ from ..schemas.leave_request import (
     LeaveRequestResponse
 )
 from ..schemas.leave_balance import LeaveBalanceResponse
+from ..services.leave_balances import calculate_service_year, record_leave_usage, sync_leave_balances
+from ..services.live_events import (
+    LEAVE_REQUEST_APPROVED,
+    LEAVE_REQUEST_CANCELLED,
+    LEAVE_REQUEST_DATES_CHANGED,
+    LEAVE_REQUEST_REJECTED,
+    publish_event,
+)
+from ..services.reference_data import reference_data
 from ..utils.dependencies import get_current_user
+from ..utils.excel_export import StreamingWorkbook, EXPORT_CHUNK_SIZE
+from ..utils.pagination import decode_cursor, set_next_cursor
 
 router = APIRouter(prefix="/leave-requests", tags=["Leave Requests"])
 
-
-def calculate_service_year(hire_date: date, check_date: date = None) -> int:
-    """
-    İşe giriş tarihine göre kaç yıldönümü geçtiğini hesapla
-
-    service_year = Kaç yıldönümü GEÇTİ
-    - 0: Henüz yıldönümü gelmedi (1. yıl içinde)
-    - 1: 1. yıldönümü geçti (2. yıl içinde)
-    - 2: 2. yıldönümü geçti (3. yıl içinde)
-
-    Örnek:
-    - hire_date: 2024-06-15
-    - check_date: 2025-05-01 -> service_year = 0 (henüz 1. yıldönümü gelmedi)
-    - check_date: 2025-06-15 -> service_year = 1 (1. yıldönümü bugün)
-    - check_date: 2025-07-01 -> service_year = 1 (1. yıldönümü geçti)
-    - check_date: 2026-07-01 -> service_year = 2 (2. yıldönümü geçti)
-    """
-    if not hire_date:
-        return 0
-
-    if not check_date:
-        check_date = date.today()
-
-    # Kaç tam yıl geçti hesapla
-    years_passed = check_date.year - hire_date.year
-
-    # Eğer yıldönümü henüz gelmediyse bir yıl azalt
-    anniversary_this_year = hire_date.replace(year=check_date.year)
-    if check_date < anniversary_this_year:
-        years_passed -= 1
-
-    # service_year = kaç yıldönümü geçti (0'dan başlar)
-    return max(0, years_passed)
+# cursor ile limit verilmeden istenen sayfaların boyutu
+DEFAULT_PAGE_SIZE = 200
 
 
 def get_service_year_dates(hire_date: date, service_year: int) -> tuple:
@@ -90,18 +66,18 @@ def get_service_year_dates(hire_date: date, service_year: int) -> tuple:
 
 def get_or_create_balance(db: Session, employee_id: int, leave_type_id: int, service_year: int = None) -> LeaveBalance:
     """
-    İzin bakiyesi yoksa oluştur, varsa getir
+    İzin bakiyesini getir (yoksa oluştur)
 
     YENİ SİSTEM: service_year kullanıyor (işe giriş yıldönümüne göre)
-    - Geçen yıldan kalan izinleri otomatik taşır
-    - Her izin türü için ayrı hesaplama yapar
-    - EKSİK GEÇMIŞ YILLARI OTOMATIK OLUŞTURUR (backfill)
+    - Eksik geçmiş yıllar ve devreden günler tek upsert ile yazılır
+      (services/leave_balances.py)
+    - Commit etmez
     """
     employee = db.query(Employee).filter(Employee.id == employee_id).first()
     if not employee:
         raise HTTPException(status_code=404, detail="Çalışan bulunamadı")
 
-    leave_type = db.query(LeaveType).filter(LeaveType.id == leave_type_id).first()
+    leave_type = reference_data.snapshot().leave_type(leave_type_id)
     if not leave_type:
         raise HTTPException(status_code=404, detail="İzin türü bulunamadı")
 
@@ -109,115 +85,123 @@ def get_or_create_balance(db: Session, employee_id: int, leave_type_id: int, ser
     if service_year is None:
         service_year = calculate_service_year(employee.hire_date)
 
-    # ÖNEMLİ: Eksik geçmiş yılları oluştur (backfill)
-    # Örnek: service_year=3 isteniyor ama 1 ve 2 yoksa, önce 1 ve 2'yi oluştur
-    _backfill_missing_service_years(db, employee, leave_type, service_year)
+    balances = sync_leave_balances(db, employee, [leave_type], service_year)
+    return balances[(leave_type.id, service_year)]
 
-    # Mevcut service_year için bakiye var mı kontrol et
-    balance = db.query(LeaveBalance).filter(
-        and_(
-            LeaveBalance.employee_id == employee_id,
-            LeaveBalance.leave_type_id == leave_type_id,
-            LeaveBalance.service_year == service_year
-        )
-    ).first()
 
-    if balance:
-        # Mevcut bakiye varsa, current_year_entitlement'ı güncelle (izin türü değişirse)
-        # Sadece Yıllık İzin dışındaki izinler için
-        if leave_type.name != "Yıllık İzin":
-            expected_entitlement = leave_type.max_days if leave_type.max_days else 0
-            if balance.current_year_entitlement != expected_entitlement:
-                # İzin türünün max_days değeri değişmiş, güncelle
-                balance.current_year_entitlement = expected_entitlement
-                balance.total_days = balance.carried_over_days + expected_entitlement
-                balance.remaining_days = balance.total_days - balance.used_days
-                db.commit()
-                db.refresh(balance)
-        return balance
-
-    # Buraya gelmemeli (backfill zaten oluşturmuş olmalı)
-    # Ama yine de oluştur
-    return _create_balance_for_service_year(db, employee, leave_type, service_year)
-
-
-def _backfill_missing_service_years(db: Session, employee: Employee, leave_type: LeaveType, target_service_year: int):
+def _leave_listing_query(db: Session):
     """
-    Eksik geçmiş service_year kayıtlarını otomatik oluşturur
-
-    Örnek: target_service_year=3 ama sadece service_year=3 var
-    -> service_year=0, 1 ve service_year=2'yi oluşturur
-    -> carry-over hesaplamaları doğru olur
+    İzin talepleri; çalışan, izin türü ve onaylayan adlarıyla tek sorguda
+    Satırlar: (LeaveRequest, employee_name, leave_type_name, approver_name)
     """
-    # Hangi service_year'lar var kontrol et
-    existing_years = db.query(LeaveBalance.service_year).filter(
-        and_(
-            LeaveBalance.employee_id == employee.id,
-            LeaveBalance.leave_type_id == leave_type.id
-        )
-    ).all()
-    existing_years = {year[0] for year in existing_years}
+    approver = aliased(Employee)
+    return db.query(
+        LeaveRequest,
+        Employee.full_name.label('employee_name'),
+        LeaveType.name.label('leave_type_name'),
+        approver.full_name.label('approver_name')
+    ).outerjoin(
+        Employee, LeaveRequest.employee_id == Employee.id
+    ).outerjoin(
+        LeaveType, LeaveRequest.leave_type_id == LeaveType.id
+    ).outerjoin(
+        approver, LeaveRequest.approved_by == approver.id
+    )
 
-    # Eksik yılları bul ve oluştur (0'dan target_service_year'a kadar)
-    # service_year=0 da gösterilmeli (1. yıl, henüz hak etmedi -> 0 gün)
-    for year in range(0, max(1, target_service_year + 1)):
-        if year not in existing_years:
-            _create_balance_for_service_year(db, employee, leave_type, year)
 
+def _filter_leave_dates(query, start_date: Optional[date], end_date: Optional[date]):
+    """[start_date, end_date] aralığıyla kesişen izinler"""
+    if start_date:
+        query = query.filter(LeaveRequest.end_date >= start_date)
+    if end_date:
+        query = query.filter(LeaveRequest.start_date <= end_date)
+    return query
 
-def _create_balance_for_service_year(db: Session, employee: Employee, leave_type: LeaveType, service_year: int) -> LeaveBalance:
-    """
-    Belirli bir service_year için yeni bakiye kaydı oluşturur
-    """
-    # 1. Bu yıl için hak edilen günleri hesapla
-    if service_year == 0:
-        current_year_entitlement = 0
-    elif leave_type.name == "Yıllık İzin" and employee.hire_date:
-        from .annual_leave_rules import calculate_annual_leave_days_by_service_year
-        current_year_entitlement = calculate_annual_leave_days_by_service_year(service_year, db)
-    else:
-        current_year_entitlement = leave_type.max_days if leave_type.max_days else 0
-
-    # 2. Geçen yıldan kalan günleri hesapla (sadece biriken izinlerde)
-    carried_over_days = 0
-    if service_year > 0 and leave_type.is_cumulative:
-        previous_balance = db.query(LeaveBalance).filter(
-            and_(
-                LeaveBalance.employee_id == employee.id,
-                LeaveBalance.leave_type_id == leave_type.id,
-                LeaveBalance.service_year == service_year - 1
-            )
-        ).first()
-
-        if previous_balance:
-            carried_over_days = previous_balance.remaining_days
-
-    # 3. Toplam günleri hesapla
-    total_days = carried_over_days + current_year_entitlement
-
-    # 4. Yeni bakiye kaydı oluştur
-    balance = LeaveBalance(
-        employee_id=employee.id,
-        leave_type_id=leave_type.id,
-        service_year=service_year,
-        year=None,
-        carried_over_days=carried_over_days,
-        current_year_entitlement=current_year_entitlement,
-        total_days=total_days,
-        used_days=0,
-        remaining_days=total_days
+
+def _leave_response(req: LeaveRequest, employee_name, leave_type_name, approver_name) -> LeaveRequestResponse:
+    return LeaveRequestResponse(
+        id=req.id,
+        employee_id=req.employee_id,
+        employee_name=employee_name or "Unknown",
+        leave_type_id=req.leave_type_id,
+        leave_type_name=leave_type_name or "Unknown",
+        start_date=req.start_date,
+        end_date=req.end_date,
+        return_to_work_date=req.return_to_work_date,
+        total_days=req.total_days,
+        status=req.status,
+        message=req.message,
+        rejection_reason=req.rejection_reason,
+        approved_by=req.approved_by,
+        approver_name=approver_name,
+        approved_at=req.approved_at,
+        created_at=req.created_at,
+        updated_at=req.updated_at
     )
-    db.add(balance)
-    db.commit()
-    db.refresh(balance)
 
-    return balance
+
+def _publish_leave_event(db: Session, event_type: str, req: LeaveRequest):
+    """Günlük rapor sayfasının izinli listesi (employees-on-leave) için canlı olay"""
+    leave_type = reference_data.snapshot().leave_type(req.leave_type_id)
+    publish_event(db, event_type, req.employee_id, {
+        "id": req.id,
+        "employee_id": req.employee_id,
+        "leave_type": leave_type.name if leave_type else "Bilinmeyen",
+        "start_date": req.start_date,
+        "end_date": req.end_date,
+        "return_to_work_date": req.return_to_work_date,
+        "total_days": req.total_days,
+        "status": req.status,
+    })
+
+
+def _keyset_page(response: Response, query, sort_column, cursor_field: str, limit: Optional[int], cursor: Optional[str]):
+    """
+    (sort_column, id) azalan sırada keyset sayfalama.
+    Sonraki sayfa varsa cursor X-Next-Cursor header'ında döner.
+    limit ve cursor verilmezse tüm liste döner (sayfalamayı bilmeyen istemciler için).
+    """
+    if limit is None and not cursor:
+        rows = query.order_by(sort_column.desc(), LeaveRequest.id.desc()).all()
+        return [_leave_response(*row) for row in rows]
+    limit = limit or DEFAULT_PAGE_SIZE
+
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            last_value = position[cursor_field]
+            last_id = int(position["id"])
+            if isinstance(sort_column.type, DateTime):
+                last_value = datetime.fromisoformat(last_value)
+            else:
+                last_value = date.fromisoformat(last_value)
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(sort_column, LeaveRequest.id) < tuple_(last_value, last_id))
+
+    rows = query.order_by(sort_column.desc(), LeaveRequest.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if has_more:
+        last = rows[-1][0]
+        set_next_cursor(response, {
+            cursor_field: getattr(last, cursor_field),
+            "id": last.id,
+        })
+
+    return [_leave_response(*row) for row in rows]
 
 
 @router.get("/", response_model=List[LeaveRequestResponse])
 def get_leave_requests(
+    response: Response,
     status_filter: Optional[LeaveRequestStatus] = None,
     employee_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description=f"Verilmezse tüm liste (cursor ile: {DEFAULT_PAGE_SIZE})"),
+    cursor: Optional[str] = Query(None, description="Önceki cevabın X-Next-Cursor header'ı"),
     db: Session = Depends(get_db),
     current_user: Employee = Depends(get_current_user)
 ):
@@ -225,8 +209,10 @@ def get_leave_requests(
     İzin taleplerini listele
     - Manager: Tüm talepleri görebilir
     - Employee: Sadece kendi taleplerini görebilir
+    - start_date/end_date: aralıkla kesişen izinler
+    - Sayfalama: limit verilirse sonraki sayfa için X-Next-Cursor header'ı cursor parametresine verilir
     """
-    query = db.query(LeaveRequest)
+    query = _leave_listing_query(db)
 
     # Yetki kontrolü
     if current_user.role not in [EmployeeRole.ADMIN, EmployeeRole.MANAGER]:
@@ -240,38 +226,9 @@ def get_leave_requests(
     if status_filter:
         query = query.filter(LeaveRequest.status == status_filter)
 
-    requests = query.order_by(LeaveRequest.created_at.desc()).all()
+    query = _filter_leave_dates(query, start_date, end_date)
 
-    # Response hazırla
-    result = []
-    for req in requests:
-        employee = db.query(Employee).filter(Employee.id == req.employee_id).first()
-        leave_type = db.query(LeaveType).filter(LeaveType.id == req.leave_type_id).first()
-        approver = None
-        if req.approved_by:
-            approver = db.query(Employee).filter(Employee.id == req.approved_by).first()
-
-        result.append(LeaveRequestResponse(
-            id=req.id,
-            employee_id=req.employee_id,
-            employee_name=employee.full_name if employee else "Unknown",
-            leave_type_id=req.leave_type_id,
-            leave_type_name=leave_type.name if leave_type else "Unknown",
-            start_date=req.start_date,
-            end_date=req.end_date,
-            return_to_work_date=req.return_to_work_date,
-            total_days=req.total_days,
-            status=req.status,
-            message=req.message,
-            rejection_reason=req.rejection_reason,
-            approved_by=req.approved_by,
-            approver_name=approver.full_name if approver else None,
-            approved_at=req.approved_at,
-            created_at=req.created_at,
-            updated_at=req.updated_at
-        ))
-
-    return result
+    return _keyset_page(response, query, LeaveRequest.created_at, "created_at", limit, cursor)
 
 
 @router.get("/my-balances", response_model=List[LeaveBalanceResponse])
@@ -291,12 +248,15 @@ def get_my_leave_balances(
     if service_year is None:
         service_year = calculate_service_year(current_user.hire_date)
 
-    # Tüm aktif izin türleri için bakiyeleri getir/oluştur
-    active_leave_types = db.query(LeaveType).filter(LeaveType.is_active == True).all()
+    # Tüm aktif izin türleri için bakiyeler tek upsert ile getir/oluştur
+    active_leave_types = [leave_type for leave_type in reference_data.snapshot().leave_types if leave_type.is_active]
+    employee = db.query(Employee).filter(Employee.id == current_user.id).first()
+    synced = sync_leave_balances(db, employee, active_leave_types, service_year)
+    db.commit()
 
     balances = []
     for leave_type in active_leave_types:
-        balance = get_or_create_balance(db, current_user.id, leave_type.id, service_year)
+        balance = synced[(leave_type.id, service_year)]
         balances.append(LeaveBalanceResponse(
             id=balance.id,
             employee_id=balance.employee_id,
@@ -330,7 +290,7 @@ def create_leave_request(
     - Yeterli bakiye var mı?
     """
     # İzin türünü kontrol et
-    leave_type = db.query(LeaveType).filter(LeaveType.id == request_data.leave_type_id).first()
+    leave_type = reference_data.snapshot().leave_type(request_data.leave_type_id)
     if not leave_type:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -450,7 +410,7 @@ def update_leave_request(
 
     # Response hazırla
     employee = db.query(Employee).filter(Employee.id == leave_request.employee_id).first()
-    leave_type = db.query(LeaveType).filter(LeaveType.id == leave_request.leave_type_id).first()
+    leave_type = reference_data.snapshot().leave_type(leave_request.leave_type_id)
 
     return LeaveRequestResponse(
         id=leave_request.id,
@@ -523,9 +483,10 @@ def approve_or_reject_leave_request(
         # Bakiyeyi güncelle - YENİ SİSTEM: service_year kullan
         employee = db.query(Employee).filter(Employee.id == leave_request.employee_id).first()
         service_year = calculate_service_year(employee.hire_date, leave_request.start_date)
-        balance = get_or_create_balance(db, leave_request.employee_id, leave_request.leave_type_id, service_year)
-        balance.used_days += leave_request.total_days
-        balance.remaining_days -= leave_request.total_days
+        record_leave_usage(
+            db, employee, reference_data.snapshot().leave_type(leave_request.leave_type_id), service_year, leave_request.total_days,
+            leave_request_id=leave_request.id, created_by=current_user.id, note="Onay"
+        )
 
     else:
         # RED
@@ -539,12 +500,15 @@ def approve_or_reject_leave_request(
         leave_request.approved_by = current_user.id
         leave_request.approved_at = datetime.utcnow()
 
+    _publish_leave_event(
+        db, LEAVE_REQUEST_APPROVED if approval_data.approved else LEAVE_REQUEST_REJECTED, leave_request
+    )
     db.commit()
     db.refresh(leave_request)
 
     # Response hazırla
     employee = db.query(Employee).filter(Employee.id == leave_request.employee_id).first()
-    leave_type = db.query(LeaveType).filter(LeaveType.id == leave_request.leave_type_id).first()
+    leave_type = reference_data.snapshot().leave_type(leave_request.leave_type_id)
 
     return LeaveRequestResponse(
         id=leave_request.id,
@@ -569,6 +533,10 @@ def approve_or_reject_leave_request(
 
 @router.get("/active", response_model=List[LeaveRequestResponse])
 def get_active_leave_requests(
+    response: Response,
+    employee_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description=f"Verilmezse tüm liste (cursor ile: {DEFAULT_PAGE_SIZE})"),
+    cursor: Optional[str] = Query(None, description="Önceki cevabın X-Next-Cursor header'ı"),
     db: Session = Depends(get_db),
     current_user: Employee = Depends(get_current_user)
 ):
@@ -576,10 +544,11 @@ def get_active_leave_requests(
     Aktif izinleri listele (başlamış ve henüz bitmemiş onaylanmış izinler)
     - Manager: Tüm aktif izinleri görebilir
     - Employee: Sadece kendi aktif izinlerini görebilir
+    - Sayfalama: limit verilirse sonraki sayfa için X-Next-Cursor header'ı cursor parametresine verilir
     """
     today = date.today()
 
-    query = db.query(LeaveRequest).filter(
+    query = _leave_listing_query(db).filter(
         LeaveRequest.status == LeaveRequestStatus.APPROVED,
         LeaveRequest.start_date <= today,
         LeaveRequest.end_date >= today
@@ -589,39 +558,10 @@ def get_active_leave_requests(
     if current_user.role not in [EmployeeRole.ADMIN, EmployeeRole.MANAGER]:
         # Çalışan sadece kendi izinlerini görebilir
         query = query.filter(LeaveRequest.employee_id == current_user.id)
+    elif employee_id:
+        query = query.filter(LeaveRequest.employee_id == employee_id)
 
-    requests = query.order_by(LeaveRequest.start_date.desc()).all()
-
-    # Response hazırla
-    result = []
-    for req in requests:
-        employee = db.query(Employee).filter(Employee.id == req.employee_id).first()
-        leave_type = db.query(LeaveType).filter(LeaveType.id == req.leave_type_id).first()
-        approver = None
-        if req.approved_by:
-            approver = db.query(Employee).filter(Employee.id == req.approved_by).first()
-
-        result.append(LeaveRequestResponse(
-            id=req.id,
-            employee_id=req.employee_id,
-            employee_name=employee.full_name if employee else "Unknown",
-            leave_type_id=req.leave_type_id,
-            leave_type_name=leave_type.name if leave_type else "Unknown",
-            start_date=req.start_date,
-            end_date=req.end_date,
-            return_to_work_date=req.return_to_work_date,
-            total_days=req.total_days,
-            status=req.status,
-            message=req.message,
-            rejection_reason=req.rejection_reason,
-            approved_by=req.approved_by,
-            approver_name=approver.full_name if approver else None,
-            approved_at=req.approved_at,
-            created_at=req.created_at,
-            updated_at=req.updated_at
-        ))
-
-    return result
+    return _keyset_page(response, query, LeaveRequest.start_date, "start_date", limit, cursor)
 
 
 @router.post("/{request_id}/cancel", response_model=LeaveRequestResponse)
@@ -675,18 +615,20 @@ def cancel_leave_request(
     if leave_request.status == LeaveRequestStatus.APPROVED:
         employee = db.query(Employee).filter(Employee.id == leave_request.employee_id).first()
         service_year = calculate_service_year(employee.hire_date, leave_request.start_date)
-        balance = get_or_create_balance(db, leave_request.employee_id, leave_request.leave_type_id, service_year)
-        balance.used_days -= leave_request.total_days
-        balance.remaining_days += leave_request.total_days
+        record_leave_usage(
+            db, employee, reference_data.snapshot().leave_type(leave_request.leave_type_id), service_year, -leave_request.total_days,
+            leave_request_id=leave_request.id, created_by=current_user.id, note="İptal"
+        )
 
     # İptal et
     leave_request.status = LeaveRequestStatus.CANCELLED
+    _publish_leave_event(db, LEAVE_REQUEST_CANCELLED, leave_request)
     db.commit()
     db.refresh(leave_request)
 
     # Response hazırla
     employee = db.query(Employee).filter(Employee.id == leave_request.employee_id).first()
-    leave_type = db.query(LeaveType).filter(LeaveType.id == leave_request.leave_type_id).first()
+    leave_type = reference_data.snapshot().leave_type(leave_request.leave_type_id)
     approver = None
     if leave_request.approved_by:
         approver = db.query(Employee).filter(Employee.id == leave_request.approved_by).first()
@@ -732,7 +674,7 @@ def check_my_leave_status(
     ).first()
 
     if leave:
-        leave_type = db.query(LeaveType).filter(LeaveType.id == leave.leave_type_id).first()
+        leave_type = reference_data.snapshot().leave_type(leave.leave_type_id)
         return {
             "is_on_leave": True,
             "leave_type": leave_type.name if leave_type else "Bilinmeyen",
@@ -744,20 +686,19 @@ def check_my_leave_status(
     return {"is_on_leave": False}
 
 
-@router.get("/export")
-def export_approved_leaves(
+def _export_approved_leaves(
+    db: Session,
+    current_user: Employee,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     employee_id: Optional[int] = None,
     employee_name: Optional[str] = None,
     year: Optional[int] = None,
-    month: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: Employee = Depends(get_current_user)
+    month: Optional[int] = None
 ):
     """
-    Onaylanmış izinleri Excel'e export et
-    Filtreler: employee_name, year, month
+    Onaylanmış izinleri write-only workbook'a satır satır yazar.
+    Çalışan, izin türü ve onaylayan tek sorguda join ile çekilir.
     """
     from ..utils.dependencies import has_permission
     from sqlalchemy import extract
@@ -765,7 +706,7 @@ def export_approved_leaves(
     # Yetki kontrolü
     can_view_all = current_user.role in [EmployeeRole.ADMIN, EmployeeRole.MANAGER] or has_permission(current_user, "view_all_leaves")
 
-    query = db.query(LeaveRequest).filter(
+    query = _leave_listing_query(db).filter(
         LeaveRequest.status == LeaveRequestStatus.APPROVED
     )
 
@@ -783,72 +724,67 @@ def export_approved_leaves(
 
     # Çalışan filtresi (employee_name ile)
     if employee_name and can_view_all:
-        employee = db.query(Employee).filter(Employee.full_name == employee_name).first()
-        if employee:
-            query = query.filter(LeaveRequest.employee_id == employee.id)
+        query = query.filter(Employee.full_name == employee_name)
     elif employee_id and can_view_all:
         query = query.filter(LeaveRequest.employee_id == employee_id)
     elif not can_view_all:
         # Sadece kendi izinlerini görebilir
         query = query.filter(LeaveRequest.employee_id == current_user.id)
 
-    leaves = query.order_by(LeaveRequest.start_date.desc()).all()
+    rows = query.order_by(
+        LeaveRequest.start_date.desc(), LeaveRequest.id.desc()
+    ).yield_per(EXPORT_CHUNK_SIZE)
 
     # Excel oluştur
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Onaylanmış İzinler"
+    book = StreamingWorkbook()
+    ws = book.add_sheet("Onaylanmış İzinler", column_widths=[20, 20, 15, 15, 18, 12, 20, 20])
 
     # Başlıklar
-    headers = ["Çalışan", "İzin Türü", "Başlangıç Tarihi", "Bitiş Tarihi", "İşe Dönüş Tarihi", "Toplam Gün", "Onaylayan", "Onaylanma Tarihi"]
-    ws.append(headers)
-
-    # Başlık stilini ayarla
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
+    book.append_header(ws, [
+        "Çalışan", "İzin Türü", "Başlangıç Tarihi", "Bitiş Tarihi",
+        "İşe Dönüş Tarihi", "Toplam Gün", "Onaylayan", "Onaylanma Tarihi"
+    ], style="header_dark")
 
     # Verileri ekle
-    for leave in leaves:
-        employee = db.query(Employee).filter(Employee.id == leave.employee_id).first()
-        leave_type = db.query(LeaveType).filter(LeaveType.id == leave.leave_type_id).first()
-        approver = None
-        if leave.approved_by:
-            approver = db.query(Employee).filter(Employee.id == leave.approved_by).first()
-
+    for leave, emp_name, leave_type_name, approver_name in rows:
         ws.append([
-            employee.full_name if employee else "Bilinmeyen",
-            leave_type.name if leave_type else "Bilinmeyen",
+            emp_name or "Bilinmeyen",
+            leave_type_name or "Bilinmeyen",
             leave.start_date.strftime("%d.%m.%Y"),
             leave.end_date.strftime("%d.%m.%Y"),
             leave.return_to_work_date.strftime("%d.%m.%Y") if leave.return_to_work_date else "-",
             leave.total_days,
-            approver.full_name if approver else "Bilinmeyen",
+            approver_name or "Bilinmeyen",
             leave.approved_at.strftime("%d.%m.%Y %H:%M") if leave.approved_at else "-"
         ])
 
-    # Sütun genişliklerini ayarla
-    column_widths = [20, 20, 15, 15, 18, 12, 20, 20]
-    for i, width in enumerate(column_widths, start=1):
-        ws.column_dimensions[chr(64 + i)].width = width
+    filename = f"onaylanmis_izinler_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    return book.to_response(filename)
 
-    # Excel'i byte stream'e yaz
-    excel_file = io.BytesIO()
-    wb.save(excel_file)
-    excel_file.seek(0)
 
-    # Dosya adını oluştur
-    from datetime import datetime as dt
-    filename = f"onaylanmis_izinler_{dt.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-
-    return StreamingResponse(
-        excel_file,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+@router.get("/export")
+def export_approved_leaves(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    employee_id: Optional[int] = None,
+    employee_name: Optional[str] = None,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Employee = Depends(get_current_user)
+):
+    """
+    Onaylanmış izinleri Excel'e export et
+    Filtreler: employee_name, year, month
+    """
+    return _export_approved_leaves(
+        db, current_user,
+        start_date=start_date,
+        end_date=end_date,
+        employee_id=employee_id,
+        employee_name=employee_name,
+        year=year,
+        month=month
     )
 
 
@@ -905,29 +841,27 @@ def edit_approved_leave_dates(
     new_total_days = (new_end_date - leave_request.start_date).days + 1
 
     # Bakiyeyi güncelle - YENİ SİSTEM: service_year kullan
+    # Eski ve yeni gün farkı tek hareket olarak işlenir
     employee = db.query(Employee).filter(Employee.id == leave_request.employee_id).first()
     service_year = calculate_service_year(employee.hire_date, leave_request.start_date)
-    balance = get_or_create_balance(db, leave_request.employee_id, leave_request.leave_type_id, service_year)
-
-    # Eski günleri geri ver
-    balance.used_days -= old_total_days
-    balance.remaining_days += old_total_days
-
-    # Yeni günleri düş
-    balance.used_days += new_total_days
-    balance.remaining_days -= new_total_days
+    if new_total_days != old_total_days:
+        record_leave_usage(
+            db, employee, reference_data.snapshot().leave_type(leave_request.leave_type_id), service_year, new_total_days - old_total_days,
+            leave_request_id=leave_request.id, created_by=current_user.id, note="Tarih düzenleme"
+        )
 
     # İzin talebini güncelle
     leave_request.end_date = new_end_date
     leave_request.return_to_work_date = new_return_date
     leave_request.total_days = new_total_days
 
+    _publish_leave_event(db, LEAVE_REQUEST_DATES_CHANGED, leave_request)
     db.commit()
     db.refresh(leave_request)
 
     # Response hazırla
     employee = db.query(Employee).filter(Employee.id == leave_request.employee_id).first()
-    leave_type = db.query(LeaveType).filter(LeaveType.id == leave_request.leave_type_id).first()
+    leave_type = reference_data.snapshot().leave_type(leave_request.leave_type_id)
     approver = None
     if leave_request.approved_by:
         approver = db.query(Employee).filter(Employee.id == leave_request.approved_by).first()
@@ -971,7 +905,7 @@ def check_my_leave_status_today(
     ).first()
 
     if leave:
-        leave_type = db.query(LeaveType).filter(LeaveType.id == leave.leave_type_id).first()
+        leave_type = reference_data.snapshot().leave_type(leave.leave_type_id)
         return {
             "is_on_leave": True,
             "leave_type": leave_type.name if leave_type else "Bilinmeyen",
@@ -1003,7 +937,7 @@ def check_my_leave_status(
     ).first()
 
     if leave:
-        leave_type = db.query(LeaveType).filter(LeaveType.id == leave.leave_type_id).first()
+        leave_type = reference_data.snapshot().leave_type(leave.leave_type_id)
         return {
             "is_on_leave": True,
             "leave_type": leave_type.name if leave_type else "Bilinmeyen",
@@ -1030,96 +964,14 @@ def export_approved_leaves(
     Onaylanmış izinleri Excel'e export et
     Filtreler: employee_name, year, month
     """
-    from ..utils.dependencies import has_permission
-    from sqlalchemy import extract
-
-    # Yetki kontrolü
-    can_view_all = current_user.role in [EmployeeRole.ADMIN, EmployeeRole.MANAGER] or has_permission(current_user, "view_all_leaves")
-
-    query = db.query(LeaveRequest).filter(
-        LeaveRequest.status == LeaveRequestStatus.APPROVED
-    )
-
-    # Tarih filtreleri
-    if start_date:
-        query = query.filter(LeaveRequest.start_date >= start_date)
-    if end_date:
-        query = query.filter(LeaveRequest.end_date <= end_date)
-
-    # Yıl ve ay filtresi
-    if year:
-        query = query.filter(extract('year', LeaveRequest.start_date) == year)
-    if month:
-        query = query.filter(extract('month', LeaveRequest.start_date) == month)
-
-    # Çalışan filtresi (employee_name ile)
-    if employee_name and can_view_all:
-        employee = db.query(Employee).filter(Employee.full_name == employee_name).first()
-        if employee:
-            query = query.filter(LeaveRequest.employee_id == employee.id)
-    elif employee_id and can_view_all:
-        query = query.filter(LeaveRequest.employee_id == employee_id)
-    elif not can_view_all:
-        # Sadece kendi izinlerini görebilir
-        query = query.filter(LeaveRequest.employee_id == current_user.id)
-
-    leaves = query.order_by(LeaveRequest.start_date.desc()).all()
-
-    # Excel oluştur
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Onaylanmış İzinler"
-
-    # Başlıklar
-    headers = ["Çalışan", "İzin Türü", "Başlangıç Tarihi", "Bitiş Tarihi", "İşe Dönüş Tarihi", "Toplam Gün", "Onaylayan", "Onaylanma Tarihi"]
-    ws.append(headers)
-
-    # Başlık stilini ayarla
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    # Verileri ekle
-    for leave in leaves:
-        employee = db.query(Employee).filter(Employee.id == leave.employee_id).first()
-        leave_type = db.query(LeaveType).filter(LeaveType.id == leave.leave_type_id).first()
-        approver = None
-        if leave.approved_by:
-            approver = db.query(Employee).filter(Employee.id == leave.approved_by).first()
-
-        ws.append([
-            employee.full_name if employee else "Bilinmeyen",
-            leave_type.name if leave_type else "Bilinmeyen",
-            leave.start_date.strftime("%d.%m.%Y"),
-            leave.end_date.strftime("%d.%m.%Y"),
-            leave.return_to_work_date.strftime("%d.%m.%Y") if leave.return_to_work_date else "-",
-            leave.total_days,
-            approver.full_name if approver else "Bilinmeyen",
-            leave.approved_at.strftime("%d.%m.%Y %H:%M") if leave.approved_at else "-"
-        ])
-
-    # Sütun genişliklerini ayarla
-    column_widths = [20, 20, 15, 15, 18, 12, 20, 20]
-    for i, width in enumerate(column_widths, start=1):
-        ws.column_dimensions[chr(64 + i)].width = width
-
-    # Excel'i byte stream'e yaz
-    excel_file = io.BytesIO()
-    wb.save(excel_file)
-    excel_file.seek(0)
-
-    # Dosya adını oluştur
-    from datetime import datetime as dt
-    filename = f"onaylanmis_izinler_{dt.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-
-    return StreamingResponse(
-        excel_file,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    return _export_approved_leaves(
+        db, current_user,
+        start_date=start_date,
+        end_date=end_date,
+        employee_id=employee_id,
+        employee_name=employee_name,
+        year=year,
+        month=month
     )
 
 
@@ -1144,8 +996,15 @@ def get_employees_on_leave_for_date(
     if not check_date:
         check_date = date.today()
 
-    # O tarihteki izinli çalışanları bul
-    leaves = db.query(LeaveRequest).filter(
+    # O tarihteki izinli çalışanları izin türü adıyla tek sorguda bul
+    leaves = db.query(
+        LeaveRequest.employee_id,
+        LeaveRequest.start_date,
+        LeaveRequest.end_date,
+        LeaveType.name.label('leave_type_name')
+    ).outerjoin(
+        LeaveType, LeaveRequest.leave_type_id == LeaveType.id
+    ).filter(
         LeaveRequest.status == LeaveRequestStatus.APPROVED,
         LeaveRequest.start_date <= check_date,
         LeaveRequest.end_date >= check_date
@@ -1153,10 +1012,9 @@ def get_employees_on_leave_for_date(
 
     result = {}
     for leave in leaves:
-        leave_type = db.query(LeaveType).filter(LeaveType.id == leave.leave_type_id).first()
         result[leave.employee_id] = {
             "is_on_leave": True,
-            "leave_type": leave_type.name if leave_type else "Bilinmeyen",
+            "leave_type": leave.leave_type_name or "Bilinmeyen",
             "start_date": str(leave.start_date),
             "end_date": str(leave.end_date)
         }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -7,42 +7,52 @@ from ..models.employee import Employee, EmployeeRole
 from ..models.leave_type import LeaveType
 from ..models.leave_request import LeaveRequest
 from ..schemas.leave_type import LeaveTypeCreate, LeaveTypeUpdate, LeaveTypeResponse
+from ..services.reference_data import LEAVE_TYPES, bump_table_version, reference_data
 from ..utils.dependencies import get_current_user
+from ..utils.http_cache import etag_for, not_modified
 
 router = APIRouter(prefix="/leave-types", tags=["Leave Types"])
 
 
 @router.get("/", response_model=List[LeaveTypeResponse])
 def get_all_leave_types(
+    request: Request,
+    response: Response,
     include_inactive: bool = False,
-    db: Session = Depends(get_db),
     current_user: Employee = Depends(get_current_user)
 ):
     """
     Tüm izin türlerini listele
     - include_inactive=True: pasif olanları da göster (sadece manager)
     - include_inactive=False: sadece aktif olanları göster (herkes)
+    If-None-Match güncelse 304
     """
-    query = db.query(LeaveType)
-
+    snapshot = reference_data.snapshot()
     # Manager değilse sadece aktif olanları göster
-    if current_user.role not in [EmployeeRole.ADMIN, EmployeeRole.MANAGER]:
-        query = query.filter(LeaveType.is_active == True)
-    elif not include_inactive:
-        query = query.filter(LeaveType.is_active == True)
+    only_active = current_user.role not in [EmployeeRole.ADMIN, EmployeeRole.MANAGER] or not include_inactive
+
+    cached = not_modified(
+        request, response,
+        etag_for(LEAVE_TYPES, snapshot.versions[LEAVE_TYPES], only_active),
+        snapshot.modified_at.get(LEAVE_TYPES)
+    )
+    if cached:
+        return cached
+
+    leave_types = snapshot.leave_types  # ada göre sıralı
+    if only_active:
+        leave_types = [leave_type for leave_type in leave_types if leave_type.is_active]
 
-    leave_types = query.order_by(LeaveType.name).all()
     return leave_types
 
 
 @router.get("/{leave_type_id}", response_model=LeaveTypeResponse)
 def get_leave_type(
     leave_type_id: int,
-    db: Session = Depends(get_db),
     current_user: Employee = Depends(get_current_user)
 ):
     """Belirli bir izin türünü getir"""
-    leave_type = db.query(LeaveType).filter(LeaveType.id == leave_type_id).first()
+    leave_type = reference_data.snapshot().leave_type(leave_type_id)
 
     if not leave_type:
         raise HTTPException(
@@ -88,7 +98,9 @@ def create_leave_type(
     # Yeni izin türü oluştur
     leave_type = LeaveType(**leave_type_data.model_dump())
     db.add(leave_type)
+    bump_table_version(db, LEAVE_TYPES)
     db.commit()
+    reference_data.invalidate()
     db.refresh(leave_type)
 
     return leave_type
@@ -148,7 +160,9 @@ def update_leave_type(
     for field, value in update_data.items():
         setattr(leave_type, field, value)
 
+    bump_table_version(db, LEAVE_TYPES)
     db.commit()
+    reference_data.invalidate()
     db.refresh(leave_type)
 
     return leave_type
@@ -199,7 +213,9 @@ def delete_leave_type(
 
     # Sil
     db.delete(leave_type)
+    bump_table_version(db, LEAVE_TYPES)
     db.commit()
+    reference_data.invalidate()
 
     return None
 
@@ -237,7 +253,9 @@ def toggle_leave_type_active(
 
     # Toggle
     leave_type.is_active = not leave_type.is_active
+    bump_table_version(db, LEAVE_TYPES)
     db.commit()
+    reference_data.invalidate()
     db.refresh(leave_type)
 
     return leave_type
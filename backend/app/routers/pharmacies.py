@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy import func, and_, distinct, null, select, tuple_
 from typing import List, Optional
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from pydantic import BaseModel, validator
 
-from ..database import get_db
-from ..models import Pharmacy, PharmacyVisit, Sale, Employee
+from ..config import settings
+from ..database import get_async_db
+from ..models import Pharmacy, PharmacyVisit, Employee
 from ..models.employee import EmployeeRole
+from ..services import pharmacy_search
+from ..services.reference_data import bump_table_version_async
+from ..services.stats import PERIOD_PATTERN, StatsSpec, stats_query
 from ..utils.dependencies import get_current_user
+from ..utils.pagination import decode_cursor, set_next_cursor
 
 router = APIRouter(prefix="/pharmacies", tags=["Pharmacies"])
 
@@ -34,61 +40,143 @@ class PharmacyCreate(BaseModel):
         return v
 
 
+# Sıralanabilir alanlar -> listeleme sorgusundaki kolon adı
+PHARMACY_SORT_COLUMNS = {
+    "created_at": "sort_created_at",
+    "name": "name",
+    "total_products": "total_products",
+    "total_mf": "total_mf",
+}
+
+# created_at boş olan kayıtlar keyset karşılaştırmasında kaybolmasın
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _address_display(district: Optional[str], street: Optional[str], city: Optional[str], default: str = "") -> str:
+    address_parts = [part for part in (district, street, city) if part]
+    return " / ".join(address_parts) if address_parts else default
+
+
 @router.get("/")
 async def get_pharmacies(
-    db: Session = Depends(get_db),
+    response: Response,
+    city: Optional[str] = None,
+    district: Optional[str] = None,
+    sort: str = Query("created_at", description="created_at, name, total_products veya total_mf"),
+    order: str = Query("desc", description="asc veya desc"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Önceki cevabın X-Next-Cursor header'ı"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Employee = Depends(get_current_user)
 ):
     """
-    Tüm eczaneleri listele - Employee bilgisi ve toplam ürün/MF sayıları ile
+    Eczaneleri listele - Employee bilgisi ve toplam ürün/MF sayıları ile
+    - Tek sorgu: ziyaret toplamları ve ziyaret eden satıcılar GROUP BY + array_agg ile gelir
+    - Keyset pagination: sonraki sayfa için X-Next-Cursor header'ı cursor parametresine verilir
+    - Filtreler: city, district (büyük/küçük harf duyarsız)
     """
-    # Pharmacies ile employee bilgisini join et
-    pharmacies = db.query(Pharmacy).options(joinedload(Pharmacy.employee)).order_by(Pharmacy.created_at.desc()).all()
+    if sort not in PHARMACY_SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort: {sort}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail=f"Invalid order: {order}")
+
+    # Eczane başına ziyaret toplamları ve ziyaret eden satıcılar (benzersiz)
+    visitor = aliased(Employee)
+    visit_totals = select(
+        PharmacyVisit.pharmacy_id.label('pharmacy_id'),
+        func.sum(PharmacyVisit.product_count).label('total_products'),
+        func.sum(PharmacyVisit.mf_count).label('total_mf'),
+        func.array_remove(func.array_agg(distinct(visitor.full_name)), null()).label('visiting_employees')
+    ).outerjoin(
+        visitor, PharmacyVisit.employee_id == visitor.id
+    ).where(
+        PharmacyVisit.pharmacy_id.isnot(None)
+    ).group_by(
+        PharmacyVisit.pharmacy_id
+    ).subquery()
+
+    owner = aliased(Employee)
+    listing_query = select(
+        Pharmacy.id,
+        Pharmacy.name,
+        Pharmacy.city,
+        Pharmacy.district,
+        Pharmacy.street,
+        Pharmacy.employee_id,
+        Pharmacy.is_approved,
+        Pharmacy.created_at,
+        func.coalesce(Pharmacy.created_at, _EPOCH).label('sort_created_at'),
+        owner.full_name.label('employee_name'),
+        func.coalesce(visit_totals.c.total_products, 0).label('total_products'),
+        func.coalesce(visit_totals.c.total_mf, 0).label('total_mf'),
+        visit_totals.c.visiting_employees
+    ).outerjoin(
+        owner, Pharmacy.employee_id == owner.id
+    ).outerjoin(
+        visit_totals, visit_totals.c.pharmacy_id == Pharmacy.id
+    )
 
-    # Her eczane için toplam ürün ve MF sayılarını hesapla
-    result = []
-    for pharmacy in pharmacies:
-        # PharmacyVisit'lerden toplam product ve mf sayılarını al (Foreign Key kullanarak)
-        visit_stats = db.query(
-            func.sum(PharmacyVisit.product_count).label('total_products'),
-            func.sum(PharmacyVisit.mf_count).label('total_mf')
-        ).filter(
-            PharmacyVisit.pharmacy_id == pharmacy.id  # Foreign Key ile güvenli eşleşme
-        ).first()
-
-        # Bu eczaneye ziyaret yapan satıcıları bul (benzersiz)
-        visiting_employees = db.query(Employee.full_name).join(
-            PharmacyVisit, PharmacyVisit.employee_id == Employee.id
-        ).filter(
-            PharmacyVisit.pharmacy_id == pharmacy.id
-        ).distinct().all()
-
-        visiting_employee_names = [emp.full_name for emp in visiting_employees] if visiting_employees else []
-
-        # Adres bilgisini oluştur
-        address_parts = []
-        if pharmacy.district:
-            address_parts.append(pharmacy.district)
-        if pharmacy.street:
-            address_parts.append(pharmacy.street)
-        if pharmacy.city:
-            address_parts.append(pharmacy.city)
-        address_display = " / ".join(address_parts) if address_parts else ""
+    # Şehir / semt filtreleri (kayıtlar küçük harfle tutuluyor)
+    if city:
+        listing_query = listing_query.where(Pharmacy.city == city.lower().strip())
+    if district:
+        listing_query = listing_query.where(Pharmacy.district == district.lower().strip())
+
+    listing = listing_query.subquery()
+    sort_column = listing.c[PHARMACY_SORT_COLUMNS[sort]]
+    query = select(listing)
+
+    # Keyset: (sıralama değeri, id) son görülen satırdan sonrası
+    if cursor:
+        position = decode_cursor(cursor)
+        if position.get("sort") != sort or position.get("order") != order or "id" not in position:
+            raise HTTPException(status_code=400, detail="Cursor does not match sort parameters")
+        last_value = position.get("value")
+        if sort == "created_at":
+            try:
+                last_value = datetime.fromisoformat(last_value)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        if order == "desc":
+            query = query.where(tuple_(sort_column, listing.c.id) < tuple_(last_value, position["id"]))
+        else:
+            query = query.where(tuple_(sort_column, listing.c.id) > tuple_(last_value, position["id"]))
+
+    if order == "desc":
+        query = query.order_by(sort_column.desc(), listing.c.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), listing.c.id.asc())
+
+    # Bir fazla satır: sonraki sayfa var mı?
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
+    result = []
+    for row in rows:
         result.append({
-            "id": pharmacy.id,
-            "name": pharmacy.name,
-            "city": pharmacy.city,
-            "district": pharmacy.district,
-            "street": pharmacy.street,
-            "address_display": address_display,
-            "employee_id": pharmacy.employee_id,
-            "employee_name": pharmacy.employee.full_name if pharmacy.employee else None,
-            "visiting_employees": visiting_employee_names,  # Ziyaret yapan satıcılar
-            "is_approved": pharmacy.is_approved,
-            "total_products": int(visit_stats.total_products) if visit_stats.total_products else 0,
-            "total_mf": int(visit_stats.total_mf) if visit_stats.total_mf else 0,
-            "created_at": pharmacy.created_at.isoformat() if pharmacy.created_at else None
+            "id": row.id,
+            "name": row.name,
+            "city": row.city,
+            "district": row.district,
+            "street": row.street,
+            "address_display": _address_display(row.district, row.street, row.city),
+            "employee_id": row.employee_id,
+            "employee_name": row.employee_name,
+            "visiting_employees": row.visiting_employees or [],  # Ziyaret yapan satıcılar
+            "is_approved": row.is_approved,
+            "total_products": int(row.total_products),
+            "total_mf": int(row.total_mf),
+            "created_at": row.created_at.isoformat() if row.created_at else None
+        })
+
+    if has_more:
+        last = rows[-1]
+        set_next_cursor(response, {
+            "sort": sort,
+            "order": order,
+            "value": getattr(last, PHARMACY_SORT_COLUMNS[sort]),
+            "id": last.id,
         })
 
     return result
@@ -97,49 +185,23 @@ async def get_pharmacies(
 @router.get("/search")
 async def search_pharmacies(
     name: str,
-    db: Session = Depends(get_db),
+    limit: int = Query(settings.PHARMACY_SEARCH_LIMIT, ge=1, le=settings.PHARMACY_SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Employee = Depends(get_current_user)
 ):
     """
-    İsme göre eczane ara - Partial ve case-insensitive arama
+    Eczane ara (autocomplete) - ad ve semt üzerinde, Türkçe karakter duyarsız
+    - Sıralama: ön ek eşleşmesi, kelime başı eşleşmesi, benzerlik
+    - En fazla limit kadar sonuç döner
     """
-    # İsme göre ara (partial match, case-insensitive)
-    search_term = f"%{name.lower().strip()}%"
-    pharmacies = db.query(Pharmacy).filter(
-        func.lower(Pharmacy.name).like(search_term)
-    ).all()
-
-    result = []
-    for pharmacy in pharmacies:
-        # Adres bilgisini oluştur
-        address_parts = []
-        if pharmacy.district:
-            address_parts.append(pharmacy.district)
-        if pharmacy.street:
-            address_parts.append(pharmacy.street)
-        if pharmacy.city:
-            address_parts.append(pharmacy.city)
-
-        address = " / ".join(address_parts) if address_parts else "Adres bilgisi yok"
-
-        result.append({
-            "id": pharmacy.id,
-            "name": pharmacy.name,
-            "city": pharmacy.city,
-            "district": pharmacy.district,
-            "street": pharmacy.street,
-            "address_display": address,
-            "employee_name": pharmacy.employee.full_name if pharmacy.employee else None,
-            "is_approved": pharmacy.is_approved
-        })
-
-    return result
+    suggestions = await pharmacy_search.search_pharmacies(db, name, limit)
+    return [suggestion.as_dict() for suggestion in suggestions]
 
 
 @router.post("/create")
 async def create_pharmacy(
     pharmacy_data: PharmacyCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Employee = Depends(get_current_user)
 ):
     """
@@ -154,10 +216,13 @@ async def create_pharmacy(
         employee_id=current_user.id,  # İlk ekleyen satıcı
         is_approved=False  # Manager onayı bekliyor
     )
+    new_pharmacy.search_key = pharmacy_search.pharmacy_search_key(new_pharmacy.name, new_pharmacy.district)
 
     db.add(new_pharmacy)
-    db.commit()
-    db.refresh(new_pharmacy)
+    await bump_table_version_async(db, pharmacy_search.PHARMACIES)
+    await db.commit()
+    pharmacy_search.prefix_index.invalidate()
+    await db.refresh(new_pharmacy)
 
     return {
         "id": new_pharmacy.id,
@@ -173,13 +238,13 @@ async def create_pharmacy(
 async def update_pharmacy(
     pharmacy_id: int,
     pharmacy_data: PharmacyCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Employee = Depends(get_current_user)
 ):
     """
     Eczane bilgilerini güncelle - Herkes adres güncelleyebilir
     """
-    pharmacy = db.query(Pharmacy).filter(Pharmacy.id == pharmacy_id).first()
+    pharmacy = await db.get(Pharmacy, pharmacy_id)
     if not pharmacy:
         raise HTTPException(status_code=404, detail="Eczane bulunamadı")
 
@@ -188,9 +253,12 @@ async def update_pharmacy(
     pharmacy.city = pharmacy_data.city
     pharmacy.district = pharmacy_data.district
     pharmacy.street = pharmacy_data.street
+    pharmacy.search_key = pharmacy_search.pharmacy_search_key(pharmacy.name, pharmacy.district)
 
-    db.commit()
-    db.refresh(pharmacy)
+    await bump_table_version_async(db, pharmacy_search.PHARMACIES)
+    await db.commit()
+    pharmacy_search.prefix_index.invalidate()
+    await db.refresh(pharmacy)
 
     return {
         "id": pharmacy.id,
@@ -205,7 +273,7 @@ async def update_pharmacy(
 @router.post("/{pharmacy_id}/toggle-approval")
 async def toggle_pharmacy_approval(
     pharmacy_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Employee = Depends(get_current_user)
 ):
     """
@@ -215,14 +283,16 @@ async def toggle_pharmacy_approval(
     if current_user.role not in [EmployeeRole.MANAGER, EmployeeRole.ADMIN]:
         raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok")
 
-    pharmacy = db.query(Pharmacy).filter(Pharmacy.id == pharmacy_id).first()
+    pharmacy = await db.get(Pharmacy, pharmacy_id)
     if not pharmacy:
         raise HTTPException(status_code=404, detail="Eczane bulunamadı")
 
     # Toggle approval
     pharmacy.is_approved = not pharmacy.is_approved
-    db.commit()
-    db.refresh(pharmacy)
+    await bump_table_version_async(db, pharmacy_search.PHARMACIES)
+    await db.commit()
+    pharmacy_search.prefix_index.invalidate()
+    await db.refresh(pharmacy)
 
     return {
         "id": pharmacy.id,
@@ -236,67 +306,25 @@ async def get_pharmacy_stats(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     employee_id: Optional[int] = None,
-    period: Optional[str] = None,  # 'day', 'week', 'month', 'year'
-    db: Session = Depends(get_db),
+    period: Optional[str] = Query(None, regex=PERIOD_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Employee = Depends(get_current_user)
 ):
     """
     Eczane istatistikleri
     - Toplam eczane sayısı
     - Toplam ürün satışı (satış tablosundan)
-    - Toplam MF (medikal firma) ziyareti sayısı (pharmacy_visits)
+    - Toplam MF (medikal firma) ziyareti sayısı (günlük özet tablosundan)
     """
-
-    # Period'a göre tarih aralığı belirle
-    if period:
-        end_date = datetime.now().date()
-        if period == 'day':
-            start_date = end_date
-        elif period == 'week':
-            start_date = end_date - timedelta(days=7)
-        elif period == 'month':
-            start_date = end_date - timedelta(days=30)
-        elif period == 'year':
-            start_date = end_date - timedelta(days=365)
-
-    # Yetki kontrolü - EMPLOYEE kendi verilerini görür
-    target_employee_id = None
-    if current_user.role == "EMPLOYEE":
-        target_employee_id = current_user.id
-    elif employee_id:
-        target_employee_id = employee_id
-
-    # Toplam eczane sayısı
-    total_pharmacies = db.query(func.count(Pharmacy.id)).scalar()
-
-    # Pharmacy visits query (MF ziyaretleri)
-    visit_query = db.query(func.count(PharmacyVisit.id))
-    if target_employee_id:
-        visit_query = visit_query.filter(PharmacyVisit.employee_id == target_employee_id)
-    if start_date:
-        visit_query = visit_query.filter(PharmacyVisit.visit_date >= start_date)
-    if end_date:
-        visit_query = visit_query.filter(PharmacyVisit.visit_date <= end_date)
-
-    total_visits = visit_query.scalar() or 0
-
-    # Sales query (ürün satışları)
-    sales_query = db.query(func.sum(Sale.quantity))
-    if target_employee_id:
-        sales_query = sales_query.filter(Sale.employee_id == target_employee_id)
-    if start_date:
-        sales_query = sales_query.filter(Sale.sale_date >= start_date)
-    if end_date:
-        sales_query = sales_query.filter(Sale.sale_date <= end_date)
-
-    total_products = sales_query.scalar() or 0
+    spec = StatsSpec.for_request(current_user, employee_id, period, start_date, end_date)
+    totals = (await db.execute(stats_query(spec, "pharmacies", "activity", "sales"))).one()
 
     return {
-        "total_pharmacies": total_pharmacies,
-        "total_products_sold": int(total_products),
-        "total_mf_visits": total_visits,
+        "total_pharmacies": totals.pharmacy_count,
+        "total_products_sold": int(totals.sold_quantity),
+        "total_mf_visits": int(totals.pharmacy_visit_count),
         "period": {
-            "start_date": start_date.isoformat() if start_date else None,
-            "end_date": end_date.isoformat() if end_date else None
+            "start_date": spec.start_date.isoformat() if spec.start_date else None,
+            "end_date": spec.end_date.isoformat() if spec.end_date else None
         }
     }
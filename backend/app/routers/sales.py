@@ -7,6 +7,8 @@ from ..database import get_db
 from ..models.employee import Employee
 from ..models.sale import Sale
 from ..schemas.sale import SaleCreate, SaleUpdate, SaleResponse
+from ..services.daily_reports import discard_daily_reports
+from ..services.leaderboard import leaderboard_cache
 from ..utils.dependencies import get_current_user
 
 router = APIRouter(prefix="/sales", tags=["Sales"])
@@ -77,7 +79,9 @@ def create_sale(
         **sale.dict()
     )
     db.add(db_sale)
+    discard_daily_reports(db, [db_sale.sale_date])
     db.commit()
+    leaderboard_cache.clear()
     db.refresh(db_sale)
     return db_sale
 
@@ -108,10 +112,13 @@ def update_sale(
         unit_price = update_data.get("unit_price", db_sale.unit_price)
         update_data["total_amount"] = quantity * unit_price
 
+    previous_date = db_sale.sale_date
     for field, value in update_data.items():
         setattr(db_sale, field, value)
 
+    discard_daily_reports(db, [previous_date, db_sale.sale_date])
     db.commit()
+    leaderboard_cache.clear()
     db.refresh(db_sale)
     return db_sale
 
@@ -134,5 +141,7 @@ def delete_sale(
         raise HTTPException(status_code=403, detail="Not authorized to delete this sale")
 
     db.delete(db_sale)
+    discard_daily_reports(db, [db_sale.sale_date])
     db.commit()
+    leaderboard_cache.clear()
     return None
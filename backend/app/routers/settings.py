@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -6,35 +6,33 @@ from ..database import get_db
 from ..models.employee import Employee, EmployeeRole
 from ..models.settings import VisitColorScale
 from ..schemas.settings import VisitColorScaleCreate, VisitColorScaleUpdate, VisitColorScaleResponse
+from ..services.reference_data import VISIT_COLOR_SCALES, bump_table_version, reference_data
 from ..utils.dependencies import get_current_user
+from ..utils.http_cache import etag_for, not_modified
 
 router = APIRouter(prefix="/settings", tags=["Settings"])
 
 
 @router.get("/visit-color-scales", response_model=List[VisitColorScaleResponse])
 def get_visit_color_scales(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
     current_user: Employee = Depends(get_current_user)
 ):
     """
     Get all visit color scale settings
+    Varsayılanlar uygulama açılışında yazılır; burada sadece cache okunur
+    If-None-Match güncelse 304
     """
-    scales = db.query(VisitColorScale).order_by(VisitColorScale.min_visits).all()
-
-    # If no settings exist, create defaults
-    if not scales:
-        defaults = [
-            VisitColorScale(color='yellow', min_visits=0, max_visits=14),
-            VisitColorScale(color='orange', min_visits=15, max_visits=19),
-            VisitColorScale(color='green', min_visits=20, max_visits=None),
-        ]
-        db.add_all(defaults)
-        db.commit()
-        for d in defaults:
-            db.refresh(d)
-        scales = defaults
-
-    return scales
+    snapshot = reference_data.snapshot()
+    cached = not_modified(
+        request, response,
+        etag_for(VISIT_COLOR_SCALES, snapshot.versions[VISIT_COLOR_SCALES]),
+        snapshot.modified_at.get(VISIT_COLOR_SCALES)
+    )
+    if cached:
+        return cached
+    return snapshot.visit_color_scales
 
 
 @router.put("/visit-color-scales", response_model=List[VisitColorScaleResponse])
@@ -100,7 +98,9 @@ def update_visit_color_scales(
         db.add(scale)
         new_scales.append(scale)
 
+    bump_table_version(db, VISIT_COLOR_SCALES)
     db.commit()
+    reference_data.invalidate()
     for scale in new_scales:
         db.refresh(scale)
 
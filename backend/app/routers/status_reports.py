@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select, tuple_
+from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
 from datetime import date, timedelta
 from pydantic import BaseModel
 
-from ..database import get_db
+from ..database import get_async_db
 from ..models import WeeklyProgram, DoctorVisit, Employee
 from ..utils.dependencies import get_current_user
+from ..utils.pagination import decode_cursor, set_next_cursor
 
 router = APIRouter(prefix="/status-reports", tags=["Status Reports"])
 
@@ -41,16 +43,100 @@ class WeeklyStatusReport(BaseModel):
     days: List[DayStatusReport]
 
 
+def _match_key(hospital_name: str, doctor_name: str) -> Tuple[str, str]:
+    """Planlanan/gerçekleşen eşleştirmesi için normalize (hastane, doktor) anahtarı"""
+    return (hospital_name.strip().lower(), doctor_name.strip().lower())
+
+
+def _build_report(program: WeeklyProgram, employee_name: str, visits_by_day: Dict[tuple, list]) -> WeeklyStatusReport:
+    """Tek program için planlanan vs gerçekleşen karşılaştırması (DB erişimi yok)"""
+    day_reports = []
+    total_planned = 0
+    total_visited = 0
+    total_missed = 0
+
+    for day in program.days_json:
+        day_date = date.fromisoformat(day["date"])
+
+        # Gerçekleşen ziyaretler - normalize anahtara göre (ilk eşleşen ziyaret kullanılır)
+        actual_visits = visits_by_day.get((program.employee_id, day_date), [])
+        actual_by_key = {}
+        for actual in actual_visits:
+            actual_by_key.setdefault(_match_key(actual.hospital_name, actual.doctor_name), actual)
+
+        # Karşılaştırma
+        comparisons = []
+        visited_ids = set()
+
+        # Planlanan doktorları kontrol et
+        for visit in day.get("visits", []):
+            hospital = visit["hospital_name"]
+            for doctor in visit["doctors"]:
+                total_planned += 1
+                actual = actual_by_key.get(_match_key(hospital, doctor))
+
+                if actual is not None:
+                    visited_ids.add(actual.id)
+                    total_visited += 1
+                else:
+                    total_missed += 1
+
+                comparisons.append(DoctorComparisonItem(
+                    hospital_name=hospital,
+                    doctor_name=doctor,
+                    planned=True,
+                    visited=actual is not None,
+                    status="completed" if actual is not None else "missed"
+                ))
+
+        # Ekstra ziyaretler (planlanmamış)
+        for actual in actual_visits:
+            if actual.id not in visited_ids:
+                comparisons.append(DoctorComparisonItem(
+                    hospital_name=actual.hospital_name,
+                    doctor_name=actual.doctor_name,
+                    planned=False,
+                    visited=True,
+                    status="extra"
+                ))
+
+        day_reports.append(DayStatusReport(
+            date=day_date,
+            day_name=day["day_name"],
+            doctors=comparisons
+        ))
+
+    # Tamamlanma oranı
+    completion_rate = (total_visited / total_planned * 100) if total_planned > 0 else 0
+
+    return WeeklyStatusReport(
+        employee_id=program.employee_id,
+        employee_name=employee_name,
+        week_start=program.week_start,
+        week_end=program.week_end,
+        total_planned=total_planned,
+        total_visited=total_visited,
+        total_missed=total_missed,
+        completion_rate=round(completion_rate, 2),
+        days=day_reports
+    )
+
+
 @router.get("/weekly", response_model=List[WeeklyStatusReport])
 async def get_weekly_status_report(
+    response: Response,
     week_start: date = None,
     employee_id: int = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Önceki cevabın X-Next-Cursor header'ı"),
     current_user: Employee = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Haftalık durum raporu - Planlanan vs Gerçekleşen
     SADECE MANAGER/ADMIN görebilir
+    - Sıralama: hafta (yeniden eskiye), sonra çalışan
+    - Sayfalama: sonraki sayfa için X-Next-Cursor header'ı cursor parametresine verilir
     """
     # Yetki kontrolü
     if current_user.role not in ["MANAGER", "ADMIN"]:
@@ -59,116 +145,75 @@ async def get_weekly_status_report(
             detail="Bu raporu görüntüleme yetkiniz yok. Sadece yöneticiler erişebilir."
         )
 
-    # Query weekly programs
-    program_query = db.query(WeeklyProgram)
+    # Programlar çalışan adıyla birlikte tek sorguda
+    program_query = select(WeeklyProgram, Employee.full_name).join(
+        Employee, WeeklyProgram.employee_id == Employee.id
+    )
 
     if week_start:
-        program_query = program_query.filter(WeeklyProgram.week_start == week_start)
+        program_query = program_query.where(WeeklyProgram.week_start == week_start)
 
     if employee_id:
-        program_query = program_query.filter(WeeklyProgram.employee_id == employee_id)
-
-    programs = program_query.order_by(WeeklyProgram.week_start.desc()).all()
-
-    reports = []
-
-    for program in programs:
-        employee = db.query(Employee).filter(Employee.id == program.employee_id).first()
-
-        if not employee:
-            continue
-
-        # Her gün için karşılaştırma yap
-        day_reports = []
-        total_planned = 0
-        total_visited = 0
-        total_missed = 0
-
-        for day in program.days_json:
-            day_date = date.fromisoformat(day["date"])
-
-            # Planlanan doktorlar
-            planned_doctors = []
-            for visit in day.get("visits", []):
-                hospital = visit["hospital_name"]
-                for doctor in visit["doctors"]:
-                    planned_doctors.append({
-                        "hospital": hospital,
-                        "doctor": doctor
-                    })
-                    total_planned += 1
-
-            # Gerçekleşen ziyaretler
-            actual_visits = db.query(DoctorVisit).filter(
-                and_(
-                    DoctorVisit.employee_id == program.employee_id,
-                    DoctorVisit.visit_date == day_date
-                )
-            ).all()
-
-            # Karşılaştırma
-            comparisons = []
-            visited_doctors = []
-
-            # Planlanan doktorları kontrol et
-            for planned in planned_doctors:
-                found = False
-                for actual in actual_visits:
-                    if (actual.hospital_name.lower() == planned["hospital"].lower() and
-                        actual.doctor_name.lower() == planned["doctor"].lower()):
-                        found = True
-                        visited_doctors.append(actual.id)
-                        break
-
-                if found:
-                    comparisons.append(DoctorComparisonItem(
-                        hospital_name=planned["hospital"],
-                        doctor_name=planned["doctor"],
-                        planned=True,
-                        visited=True,
-                        status="completed"
-                    ))
-                    total_visited += 1
-                else:
-                    comparisons.append(DoctorComparisonItem(
-                        hospital_name=planned["hospital"],
-                        doctor_name=planned["doctor"],
-                        planned=True,
-                        visited=False,
-                        status="missed"
-                    ))
-                    total_missed += 1
-
-            # Ekstra ziyaretler (planlanmamış)
-            for actual in actual_visits:
-                if actual.id not in visited_doctors:
-                    comparisons.append(DoctorComparisonItem(
-                        hospital_name=actual.hospital_name,
-                        doctor_name=actual.doctor_name,
-                        planned=False,
-                        visited=True,
-                        status="extra"
-                    ))
-
-            day_reports.append(DayStatusReport(
-                date=day_date,
-                day_name=day["day_name"],
-                doctors=comparisons
-            ))
-
-        # Tamamlanma oranı
-        completion_rate = (total_visited / total_planned * 100) if total_planned > 0 else 0
-
-        reports.append(WeeklyStatusReport(
-            employee_id=program.employee_id,
-            employee_name=employee.full_name,
-            week_start=program.week_start,
-            week_end=program.week_end,
-            total_planned=total_planned,
-            total_visited=total_visited,
-            total_missed=total_missed,
-            completion_rate=round(completion_rate, 2),
-            days=day_reports
+        program_query = program_query.where(WeeklyProgram.employee_id == employee_id)
+
+    # Keyset: (hafta azalan, çalışan artan, id artan)
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            last_week = date.fromisoformat(position["week_start"])
+            last_employee_id = int(position["employee_id"])
+            last_id = int(position["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        program_query = program_query.where(or_(
+            WeeklyProgram.week_start < last_week,
+            and_(
+                WeeklyProgram.week_start == last_week,
+                tuple_(WeeklyProgram.employee_id, WeeklyProgram.id) > tuple_(last_employee_id, last_id)
+            )
         ))
 
+    rows = (await db.execute(
+        program_query.order_by(
+            WeeklyProgram.week_start.desc(),
+            WeeklyProgram.employee_id.asc(),
+            WeeklyProgram.id.asc()
+        ).limit(limit + 1)
+    )).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Sayfadaki tüm programların gerçekleşen ziyaretleri tek sorguda
+    planned_days = {
+        (program.employee_id, date.fromisoformat(day["date"]))
+        for program, _ in rows
+        for day in program.days_json
+    }
+    visits_by_day = defaultdict(list)
+    if planned_days:
+        visits = (await db.execute(
+            select(
+                DoctorVisit.id,
+                DoctorVisit.employee_id,
+                DoctorVisit.visit_date,
+                DoctorVisit.hospital_name,
+                DoctorVisit.doctor_name
+            ).where(
+                tuple_(DoctorVisit.employee_id, DoctorVisit.visit_date).in_(list(planned_days))
+            ).order_by(DoctorVisit.id)
+        )).all()
+        for visit in visits:
+            visits_by_day[(visit.employee_id, visit.visit_date)].append(visit)
+
+    reports = [_build_report(program, employee_name, visits_by_day) for program, employee_name in rows]
+
+    if has_more:
+        last_program = rows[-1][0]
+        set_next_cursor(response, {
+            "week_start": last_program.week_start,
+            "employee_id": last_program.employee_id,
+            "id": last_program.id,
+        })
+
     return reports
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from ..database import get_db, get_pool_stats
+from ..models.employee import Employee
+from ..services.db_indexes import index_report
+from ..utils.auth import get_login_metrics
+from ..utils.dependencies import get_current_admin_user
+
+router = APIRouter(prefix="/system", tags=["System"])
+
+
+@router.get("/db-pool")
+def get_db_pool_stats(
+    current_user: Employee = Depends(get_current_admin_user)
+):
+    """
+    Veritabanı bağlantı havuzu istatistikleri (Admin only)
+    - checked_out / overflow: anlık kullanım
+    - wait: bağlantı alma süreleri ve timeout sayısı
+    """
+    return get_pool_stats()
+
+
+@router.get("/login-metrics")
+def get_login_metrics_endpoint(
+    current_user: Employee = Depends(get_current_admin_user)
+):
+    """
+    Login metrikleri (Admin only)
+    - logins: başarılı/başarısız giriş sayıları, gecikme (p50/p95/max), rehash sayısı
+    - password_pool: bcrypt kuyruğu (anlık/maksimum bekleyen, reddedilen)
+    """
+    return get_login_metrics()
+
+
+@router.get("/indexes")
+def get_index_report(
+    db: Session = Depends(get_db),
+    current_user: Employee = Depends(get_current_admin_user)
+):
+    """
+    İndeks durumu (Admin only)
+    - missing / invalid / retired: scripts/apply_indexes.py ile düzeltilir
+    - unused: istatistik başlangıcından (stats_since) beri hiç taranmamış indeksler
+    """
+    return index_report(db.connection())
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select
 from typing import List
 from datetime import datetime, date, time
 
-from ..database import get_db
+from ..database import get_async_db
 from ..models import WeeklyProgram, Employee
 from ..schemas.weekly_program import WeeklyProgramCreate, WeeklyProgramResponse, DayPlan
 from ..utils.dependencies import get_current_user
@@ -33,7 +33,7 @@ def check_submission_deadline(week_start: date) -> bool:
 async def create_weekly_program(
     program_data: WeeklyProgramCreate,
     current_user: Employee = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Haftalık program oluştur
@@ -48,12 +48,14 @@ async def create_weekly_program(
         )
 
     # Bu hafta için zaten program var mı kontrol et
-    existing = db.query(WeeklyProgram).filter(
-        and_(
-            WeeklyProgram.employee_id == current_user.id,
-            WeeklyProgram.week_start == program_data.week_start
+    existing = (await db.execute(
+        select(WeeklyProgram).where(
+            and_(
+                WeeklyProgram.employee_id == current_user.id,
+                WeeklyProgram.week_start == program_data.week_start
+            )
         )
-    ).first()
+    )).scalars().first()
 
     if existing:
         raise HTTPException(
@@ -75,8 +77,8 @@ async def create_weekly_program(
     )
 
     db.add(db_program)
-    db.commit()
-    db.refresh(db_program)
+    await db.commit()
+    await db.refresh(db_program)
 
     # Response oluştur
     days_list = [DayPlan(**day) for day in db_program.days_json]
@@ -98,27 +100,27 @@ async def create_weekly_program(
 async def get_weekly_programs(
     employee_id: int = None,
     current_user: Employee = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Haftalık programları listele
     - EMPLOYEE: Sadece kendi programlarını görebilir
     - MANAGER/ADMIN: Tüm programları veya employee_id'ye göre filtrelenmiş programları görebilir
     """
-    query = db.query(WeeklyProgram)
+    query = select(WeeklyProgram)
 
     # Yetki kontrolü
     if current_user.role == "EMPLOYEE":
-        query = query.filter(WeeklyProgram.employee_id == current_user.id)
+        query = query.where(WeeklyProgram.employee_id == current_user.id)
     elif employee_id:
-        query = query.filter(WeeklyProgram.employee_id == employee_id)
+        query = query.where(WeeklyProgram.employee_id == employee_id)
 
-    programs = query.order_by(WeeklyProgram.week_start.desc()).all()
+    programs = (await db.execute(query.order_by(WeeklyProgram.week_start.desc()))).scalars().all()
 
     # Response listesi oluştur
     result = []
     for program in programs:
-        employee = db.query(Employee).filter(Employee.id == program.employee_id).first()
+        employee = await db.get(Employee, program.employee_id)
         days_list = [DayPlan(**day) for day in program.days_json]
 
         result.append(WeeklyProgramResponse(
@@ -140,12 +142,12 @@ async def get_weekly_programs(
 async def get_weekly_program(
     program_id: int,
     current_user: Employee = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Tek bir haftalık programı getir
     """
-    program = db.query(WeeklyProgram).filter(WeeklyProgram.id == program_id).first()
+    program = await db.get(WeeklyProgram, program_id)
 
     if not program:
         raise HTTPException(
@@ -160,7 +162,7 @@ async def get_weekly_program(
             detail="Bu programı görüntüleme yetkiniz yok"
         )
 
-    employee = db.query(Employee).filter(Employee.id == program.employee_id).first()
+    employee = await db.get(Employee, program.employee_id)
     days_list = [DayPlan(**day) for day in program.days_json]
 
     return WeeklyProgramResponse(
@@ -180,12 +182,12 @@ async def get_weekly_program(
 async def delete_weekly_program(
     program_id: int,
     current_user: Employee = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Haftalık programı sil (sadece kendi programını silebilir)
     """
-    program = db.query(WeeklyProgram).filter(WeeklyProgram.id == program_id).first()
+    program = await db.get(WeeklyProgram, program_id)
 
     if not program:
         raise HTTPException(
@@ -207,8 +209,8 @@ async def delete_weekly_program(
             detail="Hafta başladığı için program silinemez"
         )
 
-    db.delete(program)
-    db.commit()
+    await db.delete(program)
+    await db.commit()
 
     return None
 
@@ -218,12 +220,12 @@ async def update_weekly_program(
     program_id: int,
     request: WeeklyProgramCreate,
     current_user: Employee = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Haftalık programı güncelle - Pazar 23:59'a kadar güncellenebilir
     """
-    program = db.query(WeeklyProgram).filter(WeeklyProgram.id == program_id).first()
+    program = await db.get(WeeklyProgram, program_id)
 
     if not program:
         raise HTTPException(
@@ -254,10 +256,10 @@ async def update_weekly_program(
     program.week_end = request.week_end
     program.days_json = [day.dict() for day in request.days]
 
-    db.commit()
-    db.refresh(program)
+    await db.commit()
+    await db.refresh(program)
 
-    employee = db.query(Employee).filter(Employee.id == program.employee_id).first()
+    employee = await db.get(Employee, program.employee_id)
     days_list = [DayPlan(**day) for day in program.days_json]
 
     return WeeklyProgramResponse(
@@ -2,7 +2,7 @@ from .auth import Token, UserLogin
 from .employee import EmployeeCreate, EmployeeUpdate, EmployeeResponse
 from .sale import SaleCreate, SaleUpdate, SaleResponse
 from .goal import GoalCreate, GoalUpdate, GoalResponse
-from .report import DailyReportCreate, DailyReportUpdate, DailyReportResponse
+from .report import DailyReportResponse
 from .weekly_program import WeeklyProgramCreate, WeeklyProgramResponse, DayPlan, HospitalVisitPlan
 from .daily_visit import (
     DoctorVisitCreate, DoctorVisitResponse,
@@ -22,8 +22,6 @@ __all__ = [
     "GoalCreate",
     "GoalUpdate",
     "GoalResponse",
-    "DailyReportCreate",
-    "DailyReportUpdate",
     "DailyReportResponse",
     "WeeklyProgramCreate",
     "WeeklyProgramResponse",
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime, date, time
 
 
@@ -62,6 +62,36 @@ class PharmacyVisitResponse(PharmacyVisitBase):
         from_attributes = True
 
 
+# Batch Submission Schemas
+class DailyVisitBatch(BaseModel):
+    """Toplu ziyaret gönderimi (ör. günün tüm ziyaretleri akşam tek istekte)"""
+    doctor_visits: List[DoctorVisitCreate] = []
+    pharmacy_visits: List[PharmacyVisitCreate] = []
+
+
+class DoctorVisitBatchResult(BaseModel):
+    """Toplu gönderimde tek hekim ziyaretinin sonucu (index: istekteki sırası)"""
+    index: int
+    status: Literal["created", "error"]
+    visit: Optional[DoctorVisitResponse] = None
+    detail: Optional[str] = None
+
+
+class PharmacyVisitBatchResult(BaseModel):
+    """Toplu gönderimde tek eczane ziyaretinin sonucu (index: istekteki sırası)"""
+    index: int
+    status: Literal["created", "error"]
+    visit: Optional[PharmacyVisitResponse] = None
+    detail: Optional[str] = None
+
+
+class DailyVisitBatchResponse(BaseModel):
+    created: int
+    failed: int
+    doctor_visits: List[DoctorVisitBatchResult]
+    pharmacy_visits: List[PharmacyVisitBatchResult]
+
+
 # Daily Report Summary
 class DailyReportSummary(BaseModel):
     """Günlük rapor özeti"""
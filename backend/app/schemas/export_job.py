@@ -0,0 +1,48 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Literal, Optional
+from datetime import datetime, date
+
+
+class PharmacyVisitExportFilters(BaseModel):
+    """/daily-visits/pharmacies/export ile aynı filtreler"""
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    employee_id: Optional[int] = None
+    pharmacy_name: Optional[str] = None
+    approval_filter: Optional[Literal['all', 'approved', 'pending']] = None
+
+
+class WeeklyPlansExportFilters(BaseModel):
+    """/reports/export/weekly-plans (filtre yok, bu hafta)"""
+    pass
+
+
+class DailyReportsExportFilters(BaseModel):
+    """/reports/export/daily-reports ile aynı filtreler"""
+    period: Literal['day', 'week', 'month', 'year']
+    employee: Optional[str] = None
+    visit_type: Literal['all', 'doctor', 'pharmacy'] = 'all'
+
+
+class GrowthTrackingExportFilters(BaseModel):
+    """/reports/export/growth-tracking ile aynı filtreler"""
+    employee: Optional[str] = None
+
+
+class ExportJobCreate(BaseModel):
+    kind: Literal['pharmacy_visits', 'weekly_plans', 'daily_reports', 'growth_tracking']
+    filters: Dict[str, Any] = {}
+
+
+class ExportJobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, completed, failed
+    filters: Dict[str, Any]
+    reused: bool = False  # Aynı filtre + veri için daha önce üretilmiş dosya kullanıldı
+    filename: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    download_url: Optional[str] = None
@@ -1,35 +1,21 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime, date
 
 
-class DailyReportBase(BaseModel):
+class DailyReportResponse(BaseModel):
+    """
+    Günün şirket geneli raporu
+    is_final: biten günün snapshot'ı (daily_reports); False ise bugünün canlı hesabı
+    summary: {"visits_by_type": {...}, "totals": {...}, "employees": [...]}
+    """
     report_date: date
-    summary: Optional[str] = None
-    challenges: Optional[str] = None
-    achievements: Optional[str] = None
-
-
-class DailyReportCreate(DailyReportBase):
-    pass
-
-
-class DailyReportUpdate(BaseModel):
-    report_date: Optional[date] = None
-    total_visits: Optional[int] = None
-    total_sales: Optional[int] = None
-    summary: Optional[str] = None
-    challenges: Optional[str] = None
-    achievements: Optional[str] = None
-
-
-class DailyReportResponse(DailyReportBase):
-    id: int
-    employee_id: int
     total_visits: int
-    total_sales: int
-    created_at: datetime
-    updated_at: datetime
-
-    class Config:
-        from_attributes = True
+    total_sales: float
+    top_employee_id: Optional[int] = None
+    top_employee_name: Optional[str] = None
+    open_cases_count: int = 0
+    summary: Dict[str, Any]
+    is_final: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,156 @@
+"""
+Günlük aktivite özeti (daily_activity_rollups)
+
+Ziyaret yazan handler'lar değişikliği satır bazlı delta olarak bu tabloya
+aynı transaction içinde yansıtır:
+
+    before = pharmacy_visit_delta(db_visit, sign=-1)
+    ... db_visit güncellenir ...
+    apply_rollup_deltas(db, before, pharmacy_visit_delta(db_visit))
+    db.commit()
+
+Upsert artımlı olduğu için (kolon = kolon + delta) eşzamanlı istekler
+birbirinin değerini ezmez.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import Integer, delete, func, literal, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..models.daily_activity import DailyActivityRollup
+from ..models.daily_report import DailyReport
+from ..models.doctor_visit import DoctorVisit
+from ..models.pharmacy_visit import PharmacyVisit
+from .daily_reports import discard_daily_reports
+from .week_activity import week_activity
+
+ROLLUP_COUNTERS = (
+    "doctor_visit_count",
+    "pharmacy_visit_count",
+    "product_count",
+    "mf_count",
+    "pharmacy_approved_count",
+    "pharmacy_pending_count",
+)
+
+
+@dataclass
+class RollupDelta:
+    employee_id: int
+    activity_date: date
+    counters: Dict[str, int] = field(default_factory=dict)
+
+
+def doctor_visit_delta(visit: DoctorVisit, sign: int = 1) -> RollupDelta:
+    """Hekim ziyaretinin özetteki payı (sign=-1: geri al)"""
+    return RollupDelta(visit.employee_id, visit.visit_date, {"doctor_visit_count": sign})
+
+
+def pharmacy_visit_delta(visit: PharmacyVisit, sign: int = 1) -> RollupDelta:
+    """Eczane ziyaretinin özetteki payı (sign=-1: geri al)"""
+    return RollupDelta(visit.employee_id, visit.visit_date, {
+        "pharmacy_visit_count": sign,
+        "product_count": sign * (visit.product_count or 0),
+        "mf_count": sign * (visit.mf_count or 0),
+        "pharmacy_approved_count": sign if visit.is_approved else 0,
+        "pharmacy_pending_count": 0 if visit.is_approved else sign,
+    })
+
+
+def apply_rollup_deltas(db: Session, *deltas: RollupDelta):
+    """
+    Delta'ları (çalışan, gün) bazında birleştirip tek bir çok satırlı upsert
+    ile yazar. Commit etmez; çağıran handler'ın transaction'ına dahil olur.
+    """
+    merged: Dict[tuple, Dict[str, int]] = {}
+    for delta in deltas:
+        counters = merged.setdefault((delta.employee_id, delta.activity_date), dict.fromkeys(ROLLUP_COUNTERS, 0))
+        for name, amount in delta.counters.items():
+            counters[name] += amount
+
+    rows = [
+        {"employee_id": employee_id, "activity_date": activity_date, **counters}
+        for (employee_id, activity_date), counters in sorted(merged.items())
+        if any(counters.values())
+    ]
+    if not rows:
+        return
+
+    # Kapanmış günlerin rapor snapshot'ları yeniden üretilsin, diğer worker'ların haftalık sayaçları yenilensin
+    discard_daily_reports(db, (row["activity_date"] for row in rows))
+    week_activity.publish(db, deltas)
+
+    # Sıralı yazım: aynı günleri güncelleyen eşzamanlı batch'ler kilitleri aynı sırada alır
+    statement = insert(DailyActivityRollup).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[DailyActivityRollup.employee_id, DailyActivityRollup.activity_date],
+        set_={
+            **{name: getattr(DailyActivityRollup, name) + statement.excluded[name] for name in ROLLUP_COUNTERS},
+            "updated_at": func.now(),
+        }
+    )
+    db.execute(statement)
+
+
+def rebuild_activity_rollup(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+    """
+    Özeti ham ziyaret tablolarından yeniden hesaplar (tamamı veya tarih aralığı).
+    Aralıktaki günlük rapor snapshot'ları silinir (zamanlayıcı yeniden üretir).
+    Yeniden hesaplama sırasında ziyaret yazımları beklesin diye tablolar
+    SHARE modda kilitlenir. Commit eder; yazılan satır sayısını döner.
+    """
+    db.execute(text("LOCK TABLE doctor_visits, pharmacy_visits IN SHARE MODE"))
+
+    def _in_range(query, column):
+        if start_date:
+            query = query.where(column >= start_date)
+        if end_date:
+            query = query.where(column <= end_date)
+        return query
+
+    zero = literal(0, Integer)
+    doctor_rows = _in_range(select(
+        DoctorVisit.employee_id.label("employee_id"),
+        DoctorVisit.visit_date.label("activity_date"),
+        func.count(DoctorVisit.id).label("doctor_visit_count"),
+        zero.label("pharmacy_visit_count"),
+        zero.label("product_count"),
+        zero.label("mf_count"),
+        zero.label("pharmacy_approved_count"),
+        zero.label("pharmacy_pending_count"),
+    ), DoctorVisit.visit_date).group_by(DoctorVisit.employee_id, DoctorVisit.visit_date)
+
+    pharmacy_rows = _in_range(select(
+        PharmacyVisit.employee_id.label("employee_id"),
+        PharmacyVisit.visit_date.label("activity_date"),
+        zero.label("doctor_visit_count"),
+        func.count(PharmacyVisit.id).label("pharmacy_visit_count"),
+        func.coalesce(func.sum(PharmacyVisit.product_count), 0).label("product_count"),
+        func.coalesce(func.sum(PharmacyVisit.mf_count), 0).label("mf_count"),
+        func.count(PharmacyVisit.id).filter(PharmacyVisit.is_approved.is_(True)).label("pharmacy_approved_count"),
+        func.count(PharmacyVisit.id).filter(PharmacyVisit.is_approved.is_(False)).label("pharmacy_pending_count"),
+    ), PharmacyVisit.visit_date).group_by(PharmacyVisit.employee_id, PharmacyVisit.visit_date)
+
+    activity = union_all(doctor_rows, pharmacy_rows).subquery()
+    combined = select(
+        activity.c.employee_id,
+        activity.c.activity_date,
+        *[func.sum(activity.c[name]).label(name) for name in ROLLUP_COUNTERS],
+        func.now(),
+    ).group_by(activity.c.employee_id, activity.c.activity_date)
+
+    cleanup = _in_range(delete(DailyActivityRollup), DailyActivityRollup.activity_date)
+    db.execute(cleanup)
+    # Aralıktaki rapor snapshot'ları eski özetten üretilmiş olabilir
+    db.execute(_in_range(delete(DailyReport), DailyReport.report_date))
+    result = db.execute(
+        insert(DailyActivityRollup).from_select(
+            ["employee_id", "activity_date", *ROLLUP_COUNTERS, "updated_at"],
+            combined
+        )
+    )
+    db.commit()
+    return result.rowcount
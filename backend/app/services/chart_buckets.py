@@ -0,0 +1,187 @@
+"""
+Zaman dilimli (bucket) grafik verisi
+
+Tüm dilimler tek sorguda üretilir: generate_series ile dilim başlangıçları
+oluşturulur, kaynak tablo dilim anahtarına göre gruplanır ve ikisi LEFT JOIN
+ile birleştirilir. Veri olmayan dilimler 0 ile döner; dilim sayısı arttıkça
+sorgu sayısı artmaz.
+
+Dilimler: day, week (Pazar başlangıçlı), month, year
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import Date, Integer, cast, extract, func, literal, literal_column, select
+from sqlalchemy.orm import Session
+
+from ..models.daily_activity import DailyActivityRollup
+from ..models.sale import Sale
+
+BUCKET_GRANULARITIES = ("day", "week", "month", "year")
+
+
+@dataclass
+class Bucket:
+    start: date
+    end: date
+    values: Dict[str, float]
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """Günün içinde bulunduğu dilimin ilk günü"""
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        # Pazar başlangıçlı hafta (weekday: Pazartesi=0 ... Pazar=6)
+        return day - timedelta(days=(day.weekday() + 1) % 7)
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "year":
+        return day.replace(month=1, day=1)
+    raise ValueError(f"Invalid granularity: {granularity}")
+
+
+def bucket_end(start: date, granularity: str) -> date:
+    """Dilimin son günü"""
+    if granularity == "day":
+        return start
+    if granularity == "week":
+        return start + timedelta(days=6)
+    if granularity == "month":
+        return start.replace(day=calendar.monthrange(start.year, start.month)[1])
+    return start.replace(month=12, day=31)
+
+
+def shift_buckets(start: date, granularity: str, count: int) -> date:
+    """Dilim başlangıcını count dilim ileri (negatifse geri) kaydır"""
+    if granularity == "day":
+        return start + timedelta(days=count)
+    if granularity == "week":
+        return start + timedelta(weeks=count)
+    if granularity == "month":
+        month_index = start.year * 12 + start.month - 1 + count
+        return date(month_index // 12, month_index % 12 + 1, 1)
+    return start.replace(year=start.year + count)
+
+
+def _bucket_key(column, granularity: str):
+    """SQL tarafında bucket_start() karşılığı"""
+    day = cast(column, Date)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        # dow: Pazar=0 - tarihten çıkarınca haftanın Pazar'ı bulunur
+        return day - cast(extract("dow", day), Integer)
+    return cast(func.date_trunc(granularity, day), Date)
+
+
+def bucketed_series(
+    db: Session,
+    granularity: str,
+    start_date: date,
+    end_date: date,
+    date_column,
+    measures: Dict[str, object],
+    filters: Optional[list] = None
+) -> List[Bucket]:
+    """
+    [start_date, end_date] aralığındaki tüm dilimler için measures toplamları
+
+    Args:
+        date_column: kaynak tablonun tarih kolonu (dilim anahtarı bundan üretilir)
+        measures: ad -> aggregate ifadesi (ör. {"count": func.count(Sale.id)})
+        filters: kaynak tabloya ek WHERE koşulları
+    """
+    if granularity not in BUCKET_GRANULARITIES:
+        raise ValueError(f"Invalid granularity: {granularity}")
+
+    first_bucket = bucket_start(start_date, granularity)
+    last_bucket = bucket_start(end_date, granularity)
+
+    series = select(
+        cast(
+            func.generate_series(
+                literal(first_bucket, Date),
+                literal(last_bucket, Date),
+                # granularity yukarıda sabit listeyle doğrulandı
+                literal_column(f"interval '1 {granularity}'")
+            ),
+            Date
+        ).label("bucket_start")
+    ).subquery()
+
+    key = _bucket_key(date_column, granularity)
+    grouped = select(
+        key.label("bucket_start"),
+        *[expression.label(name) for name, expression in measures.items()]
+    ).where(
+        date_column >= start_date,
+        date_column <= end_date,
+        *(filters or [])
+    ).group_by(key).subquery()
+
+    rows = db.execute(
+        select(
+            series.c.bucket_start,
+            *[func.coalesce(grouped.c[name], 0).label(name) for name in measures]
+        ).outerjoin(
+            grouped, grouped.c.bucket_start == series.c.bucket_start
+        ).order_by(series.c.bucket_start)
+    ).all()
+
+    return [
+        Bucket(
+            start=row.bucket_start,
+            end=bucket_end(row.bucket_start, granularity),
+            values={name: getattr(row, name) for name in measures},
+        )
+        for row in rows
+    ]
+
+
+def activity_buckets(
+    db: Session,
+    granularity: str,
+    start_date: date,
+    end_date: date,
+    employee_id: Optional[int] = None
+) -> List[Bucket]:
+    """Hekim ziyareti, eczane ziyareti, ürün ve MF toplamları (günlük özet tablosundan)"""
+    filters = []
+    if employee_id:
+        filters.append(DailyActivityRollup.employee_id == employee_id)
+    return bucketed_series(
+        db, granularity, start_date, end_date,
+        date_column=DailyActivityRollup.activity_date,
+        measures={
+            "doctor_visits": func.sum(DailyActivityRollup.doctor_visit_count),
+            "pharmacy_visits": func.sum(DailyActivityRollup.pharmacy_visit_count),
+            "product_count": func.sum(DailyActivityRollup.product_count),
+            "mf_count": func.sum(DailyActivityRollup.mf_count),
+        },
+        filters=filters,
+    )
+
+
+def sales_buckets(
+    db: Session,
+    granularity: str,
+    start_date: date,
+    end_date: date,
+    employee_id: Optional[int] = None
+) -> List[Bucket]:
+    """Satış adedi ve ciro (sales tablosundan)"""
+    filters = []
+    if employee_id:
+        filters.append(Sale.employee_id == employee_id)
+    return bucketed_series(
+        db, granularity, start_date, end_date,
+        date_column=Sale.sale_date,
+        measures={
+            "count": func.count(Sale.id),
+            "revenue": func.sum(Sale.total_amount),
+        },
+        filters=filters,
+    )
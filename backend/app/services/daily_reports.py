@@ -0,0 +1,306 @@
+"""
+Günlük rapor snapshot'ları (daily_reports)
+
+Biten her gün (bugünden önceki günler) için şirket geneli tek satır yazılır:
+
+    total_visits      hekim + eczane ziyareti
+    total_sales       eczane ziyaretlerinde satılan ürün (dashboard'daki satış sayısı)
+    top_employee_id   en çok ürün satan çalışan (eşitlikte daha çok ziyaret yapan)
+    summary_json      {"visits_by_type": {...}, "totals": {...}, "employees": [...]}
+
+Veri günlük aktivite özeti (daily_activity_rollups) ve sales tablosundan
+tek sorguda okunur. Eksik günler her worker'da çalışan DailyReportScheduler
+tarafından son DAILY_REPORT_CATCHUP_DAYS gün için tamamlanır (advisory lock
+ile aynı anda tek worker yazar); daha eski geçmiş için:
+
+    python scripts/backfill_daily_reports.py --start 2025-01-01
+
+Kapanmış bir güne ait ziyaret ya da satış değişirse (geç giriş, onay, silme)
+discard_daily_reports aynı transaction içinde o günün satırını siler; gün
+zamanlayıcının bir sonraki turunda ya da ilk okunduğunda yeniden kapatılır.
+"""
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.daily_activity import DailyActivityRollup
+from ..models.daily_report import DailyReport
+from ..models.employee import Employee, EmployeeRole
+from ..models.sale import Sale
+
+logger = logging.getLogger(__name__)
+
+# Snapshot yazımı (exclusive) ile kapanmış günü değiştiren yazımlar (shared) arasında
+SNAPSHOT_LOCK_ID = 7303
+
+# summary_json'daki çalışan/toplam alanları - kayıtlı bir format olduğu için açıkça listelenir
+ACTIVITY_METRICS = (
+    "doctor_visit_count",
+    "pharmacy_visit_count",
+    "product_count",
+    "mf_count",
+    "pharmacy_approved_count",
+    "pharmacy_pending_count",
+)
+SALES_METRICS = ("sale_count", "sold_quantity", "sales_revenue")
+
+
+@dataclass
+class DaySnapshot:
+    report_date: date
+    total_visits: int
+    total_sales: float
+    top_employee_id: Optional[int]
+    summary: dict
+
+    def as_row(self) -> dict:
+        return {
+            "report_date": self.report_date,
+            "total_visits": self.total_visits,
+            "total_sales": self.total_sales,
+            "top_employee_id": self.top_employee_id,
+            "open_cases_count": 0,
+            "summary_json": self.summary,
+        }
+
+
+def _days(start_date: date, end_date: date) -> List[date]:
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def _employee_day_rows(db: Session, start_date: date, end_date: date):
+    """(gün, çalışan) başına aktivite ve satış toplamları - tek sorgu"""
+    activity = select(
+        DailyActivityRollup.activity_date.label("day"),
+        DailyActivityRollup.employee_id,
+        *[getattr(DailyActivityRollup, name) for name in ACTIVITY_METRICS],
+    ).where(
+        DailyActivityRollup.activity_date >= start_date,
+        DailyActivityRollup.activity_date <= end_date
+    ).subquery()
+
+    sales = select(
+        Sale.sale_date.label("day"),
+        Sale.employee_id,
+        func.count(Sale.id).label("sale_count"),
+        func.coalesce(func.sum(Sale.quantity), 0).label("sold_quantity"),
+        func.coalesce(func.sum(Sale.total_amount), 0).label("sales_revenue"),
+    ).where(
+        Sale.sale_date >= start_date,
+        Sale.sale_date <= end_date
+    ).group_by(Sale.sale_date, Sale.employee_id).subquery()
+
+    combined = select(
+        func.coalesce(activity.c.day, sales.c.day).label("day"),
+        func.coalesce(activity.c.employee_id, sales.c.employee_id).label("employee_id"),
+        *[func.coalesce(activity.c[name], 0).label(name) for name in ACTIVITY_METRICS],
+        *[func.coalesce(sales.c[name], 0).label(name) for name in SALES_METRICS],
+    ).select_from(
+        activity.join(
+            sales,
+            and_(activity.c.day == sales.c.day, activity.c.employee_id == sales.c.employee_id),
+            full=True
+        )
+    ).subquery()
+
+    return db.execute(
+        select(combined, Employee.full_name, Employee.role).join(
+            Employee, Employee.id == combined.c.employee_id
+        ).order_by(combined.c.day, Employee.full_name, Employee.id)
+    ).all()
+
+
+def _snapshot(report_date: date, employees: List[dict]) -> DaySnapshot:
+    totals = {name: sum(entry[name] for entry in employees) for name in ACTIVITY_METRICS + SALES_METRICS}
+    totals["sales_revenue"] = round(totals["sales_revenue"], 2)
+
+    # Haftanın yıldızı ile aynı kural: sadece EMPLOYEE rolündekiler, en çok ürün
+    candidates = [entry for entry in employees if entry["role"] == EmployeeRole.EMPLOYEE.value]
+    top = max(
+        candidates,
+        key=lambda entry: (entry["product_count"], entry["doctor_visit_count"] + entry["pharmacy_visit_count"]),
+        default=None
+    )
+    if top and not (top["product_count"] or top["doctor_visit_count"] or top["pharmacy_visit_count"]):
+        top = None
+
+    return DaySnapshot(
+        report_date=report_date,
+        total_visits=totals["doctor_visit_count"] + totals["pharmacy_visit_count"],
+        total_sales=float(totals["product_count"]),
+        top_employee_id=top["employee_id"] if top else None,
+        summary={
+            "visits_by_type": {
+                "doctor": totals["doctor_visit_count"],
+                "pharmacy": totals["pharmacy_visit_count"],
+            },
+            "totals": totals,
+            "employees": employees,
+        },
+    )
+
+
+def build_snapshots(db: Session, start_date: date, end_date: date) -> List[DaySnapshot]:
+    """Aralıktaki her gün için snapshot (veri olmayan günler sıfırlarla)"""
+    by_day: Dict[date, List[dict]] = defaultdict(list)
+    for row in _employee_day_rows(db, start_date, end_date):
+        entry = {
+            "employee_id": row.employee_id,
+            "employee_name": row.full_name,
+            "role": row.role.value if row.role else None,
+            **{name: int(getattr(row, name)) for name in ACTIVITY_METRICS},
+            "sale_count": int(row.sale_count),
+            "sold_quantity": int(row.sold_quantity),
+            "sales_revenue": float(row.sales_revenue),
+        }
+        # Silinen ziyaretlerden kalan sıfır satırlar rapora girmez
+        if any(entry[name] for name in ACTIVITY_METRICS + SALES_METRICS):
+            by_day[row.day].append(entry)
+
+    return [_snapshot(day, by_day.get(day, [])) for day in _days(start_date, end_date)]
+
+
+def _lock_snapshots(db: Session, wait: bool = True) -> bool:
+    """Snapshot yazım kilidi (transaction sonunda bırakılır)"""
+    if wait:
+        db.execute(select(func.pg_advisory_xact_lock(SNAPSHOT_LOCK_ID)))
+        return True
+    return bool(db.execute(select(func.pg_try_advisory_xact_lock(SNAPSHOT_LOCK_ID))).scalar())
+
+
+def write_snapshots(db: Session, snapshots: List[DaySnapshot]):
+    """Tek çok satırlı upsert (report_date'e göre). Commit etmez."""
+    if not snapshots:
+        return
+    statement = insert(DailyReport).values([snapshot.as_row() for snapshot in snapshots])
+    statement = statement.on_conflict_do_update(
+        index_elements=[DailyReport.report_date],
+        set_={
+            **{name: statement.excluded[name] for name in (
+                "total_visits", "total_sales", "top_employee_id", "open_cases_count", "summary_json"
+            )},
+            "updated_at": func.now(),
+        }
+    )
+    db.execute(statement)
+
+
+def close_days(db: Session, start_date: date, end_date: date, today: Optional[date] = None) -> int:
+    """
+    [start_date, end_date] aralığındaki biten günleri (yeniden) kapatır.
+    Bugün ve sonrası atlanır. Commit etmez; kapatılan gün sayısını döner.
+    """
+    today = today or date.today()
+    end_date = min(end_date, today - timedelta(days=1))
+    if start_date > end_date:
+        return 0
+    _lock_snapshots(db)
+    snapshots = build_snapshots(db, start_date, end_date)
+    write_snapshots(db, snapshots)
+    return len(snapshots)
+
+
+def close_pending_days(db: Session, today: Optional[date] = None) -> int:
+    """
+    Son DAILY_REPORT_CATCHUP_DAYS gün içinde snapshot'ı olmayan biten günleri kapatır.
+    Başka bir worker ya da kapanmış günü değiştiren bir yazım kilidi tutuyorsa
+    bu tur atlanır. Commit eder; kapatılan gün sayısını döner.
+    """
+    today = today or date.today()
+    if not _lock_snapshots(db, wait=False):
+        db.rollback()
+        return 0
+
+    first_day = db.execute(select(func.least(
+        select(func.min(DailyActivityRollup.activity_date)).scalar_subquery(),
+        select(func.min(Sale.sale_date)).scalar_subquery(),
+    ))).scalar()
+    if first_day is None:
+        db.rollback()
+        return 0
+
+    start_date = max(first_day, today - timedelta(days=settings.DAILY_REPORT_CATCHUP_DAYS))
+    end_date = today - timedelta(days=1)
+    if start_date > end_date:
+        db.rollback()
+        return 0
+
+    closed = set(db.scalars(select(DailyReport.report_date).where(
+        DailyReport.report_date >= start_date,
+        DailyReport.report_date <= end_date
+    )))
+    missing = [day for day in _days(start_date, end_date) if day not in closed]
+    if missing:
+        snapshots = build_snapshots(db, missing[0], missing[-1])
+        write_snapshots(db, [snapshot for snapshot in snapshots if snapshot.report_date not in closed])
+    db.commit()
+    return len(missing)
+
+
+def discard_daily_reports(db: Session, days: Iterable[date]):
+    """
+    Verisi değişen kapanmış günlerin snapshot'larını siler (bugün ve sonrası yok sayılır).
+    Commit etmez; değişikliği yapan transaction'a dahil olur.
+    """
+    today = date.today()
+    # sales şemaları tarihi datetime olarak alır; kolon Date
+    days = {day.date() if isinstance(day, datetime) else day for day in days if day}
+    closed_days = sorted(day for day in days if day < today)
+    if not closed_days:
+        return
+    # Eşzamanlı bir snapshot yazımı eski veriyi okuyup bu silmeden sonra commit etmesin
+    db.execute(select(func.pg_advisory_xact_lock_shared(SNAPSHOT_LOCK_ID)))
+    db.execute(delete(DailyReport).where(DailyReport.report_date.in_(closed_days)))
+
+
+class DailyReportScheduler:
+    """Worker başına arka plan thread'i: DAILY_REPORT_CHECK_INTERVAL'da bir close_pending_days"""
+
+    def __init__(self, session_factory=SessionLocal, interval: int = settings.DAILY_REPORT_CHECK_INTERVAL):
+        self._session_factory = session_factory
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if not settings.DAILY_REPORT_SCHEDULER:
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="daily-report-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def run_once(self) -> int:
+        db = self._session_factory()
+        try:
+            return close_pending_days(db)
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                closed = self.run_once()
+                if closed:
+                    logger.info("Günlük rapor snapshot'ı yazıldı: %s gün", closed)
+            except Exception:
+                logger.exception("Günlük rapor snapshot'ları yazılamadı")
+            self._stop.wait(self._interval)
+
+
+daily_report_scheduler = DailyReportScheduler()
@@ -0,0 +1,164 @@
+"""
+Model'lerde tanımlı indekslerin yönetimi
+
+Composite, partial ve trigram indeksler model'lerin __table_args__'ında
+tanımlıdır ve migration'larla (migrations/versions) oluşturulur. Bu modül
+veritabanını model'lerle karşılaştırır ve eksik ya da yarıda kalmış
+indeksleri onarır:
+
+    python scripts/apply_indexes.py           # eksikleri CONCURRENTLY oluştur
+    python scripts/apply_indexes.py --check   # eksik / geçersiz / kullanılmayan indeks raporu
+
+CREATE INDEX CONCURRENTLY tabloyu yazmaya kilitlemez ama transaction içinde
+çalışamaz; bu yüzden her komut AUTOCOMMIT bağlantıda ayrı çalıştırılır.
+Yarıda kalan bir CONCURRENTLY build geçersiz (indisvalid = false) indeks
+bırakır; sonraki çalıştırmada silinip yeniden oluşturulur.
+"""
+import re
+from typing import Callable, Dict, List
+
+from sqlalchemy import Index, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+
+from ..database import Base
+
+REQUIRED_EXTENSIONS = ("pg_trgm",)
+
+# Composite indekslerin ilk kolonu olduğu için gereksizleşen eski tek kolonlu indeksler
+RETIRED_INDEXES = (
+    "ix_doctor_visits_employee_id",
+    "ix_pharmacy_visits_employee_id",
+    "ix_pharmacy_visits_pharmacy_id",
+    "ix_weekly_programs_employee_id",
+)
+
+_CREATE_INDEX = re.compile(r"^CREATE (UNIQUE )?INDEX ")
+
+
+def managed_indexes() -> List[Index]:
+    """Model'lerde tanımlı tüm indeksler (index=True kolonlar dahil)"""
+    from .. import models  # Import all models
+
+    return sorted(
+        (index for table in Base.metadata.sorted_tables for index in table.indexes),
+        key=lambda index: index.name
+    )
+
+
+def create_index_sql(index: Index) -> str:
+    """Indeksin CREATE INDEX CONCURRENTLY IF NOT EXISTS komutu"""
+    statement = str(CreateIndex(index, if_not_exists=True).compile(dialect=postgresql.dialect()))
+    return _CREATE_INDEX.sub(lambda match: f"CREATE {match.group(1) or ''}INDEX CONCURRENTLY ", statement)
+
+
+def _existing_indexes(connection: Connection) -> Dict[str, bool]:
+    """public şemadaki indeksler: ad -> geçerli mi"""
+    rows = connection.execute(text("""
+        SELECT index_class.relname AS name, pg_index.indisvalid AS is_valid
+        FROM pg_index
+        JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+        JOIN pg_namespace ON pg_namespace.oid = index_class.relnamespace
+        WHERE pg_namespace.nspname = 'public'
+    """)).all()
+    return {row.name: row.is_valid for row in rows}
+
+
+def _existing_tables(connection: Connection) -> set:
+    rows = connection.execute(text(
+        "SELECT tablename FROM pg_tables WHERE schemaname = 'public'"
+    )).all()
+    return {row.tablename for row in rows}
+
+
+def apply_index_pack(engine: Engine, log: Callable[[str], None] = print) -> Dict[str, List[str]]:
+    """
+    Eksik indeksleri CONCURRENTLY oluşturur, geçersizleri yeniden kurar,
+    RETIRED_INDEXES'i kaldırır. Tekrar çalıştırılması güvenlidir.
+    """
+    result = {"created": [], "rebuilt": [], "dropped": []}
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for extension in REQUIRED_EXTENSIONS:
+            connection.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+
+        existing = _existing_indexes(connection)
+        tables = _existing_tables(connection)
+
+        for index in managed_indexes():
+            if index.table.name not in tables:
+                continue
+            if existing.get(index.name) is False:
+                log(f"Geçersiz indeks yeniden oluşturuluyor: {index.name}")
+                connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+                result["rebuilt"].append(index.name)
+            elif index.name in existing:
+                continue
+            else:
+                result["created"].append(index.name)
+
+            log(f"Oluşturuluyor: {index.name} ({index.table.name})")
+            connection.execute(text(create_index_sql(index)))
+
+        for name in RETIRED_INDEXES:
+            if name in existing:
+                log(f"Kaldırılıyor: {name}")
+                connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+                result["dropped"].append(name)
+
+    return result
+
+
+def index_report(connection: Connection) -> dict:
+    """
+    - missing: model'de tanımlı ama veritabanında olmayan indeksler
+    - invalid: yarıda kalmış CONCURRENTLY build'ler
+    - retired: kaldırılması gereken eski indeksler
+    - unused: istatistikler sıfırlandığından beri hiç taranmamış indeksler
+      (primary key ve unique indeksler hariç - bunlar kısıt olarak gerekli)
+    """
+    existing = _existing_indexes(connection)
+    tables = _existing_tables(connection)
+    managed = [index for index in managed_indexes() if index.table.name in tables]
+
+    unused = connection.execute(text("""
+        SELECT
+            stats.relname AS table_name,
+            stats.indexrelname AS index_name,
+            stats.idx_scan AS scans,
+            pg_relation_size(stats.indexrelid) AS size_bytes
+        FROM pg_stat_user_indexes stats
+        JOIN pg_index ON pg_index.indexrelid = stats.indexrelid
+        WHERE stats.schemaname = 'public'
+          AND stats.idx_scan = 0
+          AND NOT pg_index.indisunique
+          AND NOT pg_index.indisprimary
+        ORDER BY pg_relation_size(stats.indexrelid) DESC
+    """)).all()
+
+    stats_reset = connection.execute(text(
+        "SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()"
+    )).scalar()
+
+    return {
+        "missing": [
+            {"index": index.name, "table": index.table.name}
+            for index in managed if index.name not in existing
+        ],
+        "invalid": [
+            {"index": index.name, "table": index.table.name}
+            for index in managed if existing.get(index.name) is False
+        ],
+        "retired": [name for name in RETIRED_INDEXES if name in existing],
+        "unused": [
+            {
+                "index": row.index_name,
+                "table": row.table_name,
+                "scans": row.scans,
+                "size_bytes": row.size_bytes,
+            }
+            for row in unused
+        ],
+        "stats_since": stats_reset,
+    }
@@ -0,0 +1,376 @@
+"""
+Arka plan export job'ları
+
+POST ile gelen export isteği filtreleriyle birlikte kuyruğa alınır ve sınırlı
+boyutlu bir thread havuzunda (EXPORT_WORKERS) üretilir. Üretilen dosyalar
+EXPORT_ARTIFACT_DIR altında EXPORT_ARTIFACT_TTL süresince saklanır.
+
+Dosyalar (kind, filtreler, veri watermark'ı, gün) özetinden türetilen bir
+anahtarla adlandırılır: aynı filtrelerle ve veri değişmeden gelen istek
+yeniden render edilmeden mevcut dosyayı kullanır.
+
+Job kayıtları da diskte JSON olarak tutulur; böylece durum ve indirme
+istekleri hangi uvicorn worker'ına düşerse düşsün cevaplanabilir.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.doctor_visit import DoctorVisit
+from ..models.employee import Employee
+from ..models.leave_request import LeaveRequest
+from ..models.leave_type import LeaveType
+from ..models.pharmacy_visit import PharmacyVisit
+from ..models.weekly_program import WeeklyProgram
+from ..schemas.export_job import (
+    DailyReportsExportFilters,
+    GrowthTrackingExportFilters,
+    PharmacyVisitExportFilters,
+    WeeklyPlansExportFilters,
+)
+from . import exports
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ExportQueueFull(Exception):
+    """Kuyrukta EXPORT_MAX_PENDING kadar job var, yenisi kabul edilmez"""
+
+
+@dataclass(frozen=True)
+class ExportKind:
+    filters_schema: Type[BaseModel]
+    build: Callable[..., exports.ExportResult]
+    # Export'un okuduğu verinin durumunu özetler; veri değişince değeri değişmeli
+    watermark: Callable[[Session, BaseModel], dict]
+
+
+def _table_watermark(db: Session, model) -> list:
+    """Kayıt sayısı + en büyük id (+ en son updated_at): ekleme, silme ve güncellemeyi yakalar"""
+    columns = [func.count(model.id), func.max(model.id)]
+    if hasattr(model, "updated_at"):
+        columns.append(func.max(model.updated_at))
+    row = db.execute(select(*columns)).one()
+    return [value.isoformat() if isinstance(value, datetime) else value for value in row]
+
+
+def _tables_watermark(*models) -> Callable[[Session, BaseModel], dict]:
+    def watermark(db: Session, filters: BaseModel) -> dict:
+        return {model.__tablename__: _table_watermark(db, model) for model in models}
+    return watermark
+
+
+def _weekly_plans_watermark(db: Session, filters: BaseModel) -> dict:
+    # weekly_programs'da updated_at yok; sadece bu haftanın planları okunduğu için
+    # içeriklerinin özeti alınır (hafta başına çalışan sayısı kadar satır)
+    start_of_week, end_of_week = exports.current_week_range()
+    programs = db.query(WeeklyProgram.id, WeeklyProgram.days_json).filter(
+        WeeklyProgram.week_start >= start_of_week,
+        WeeklyProgram.week_start <= end_of_week
+    ).order_by(WeeklyProgram.id).all()
+
+    digest = hashlib.sha256()
+    for program_id, days_json in programs:
+        digest.update(f"{program_id}:{json.dumps(days_json, sort_keys=True, default=str)}".encode())
+
+    return {
+        WeeklyProgram.__tablename__: digest.hexdigest(),
+        Employee.__tablename__: _table_watermark(db, Employee),
+    }
+
+
+EXPORT_KINDS: Dict[str, ExportKind] = {
+    "pharmacy_visits": ExportKind(
+        filters_schema=PharmacyVisitExportFilters,
+        build=exports.build_pharmacy_visits_export,
+        watermark=_tables_watermark(PharmacyVisit, Employee),
+    ),
+    "weekly_plans": ExportKind(
+        filters_schema=WeeklyPlansExportFilters,
+        build=exports.build_weekly_plans_export,
+        watermark=_weekly_plans_watermark,
+    ),
+    "daily_reports": ExportKind(
+        filters_schema=DailyReportsExportFilters,
+        build=exports.build_daily_reports_export,
+        watermark=_tables_watermark(DoctorVisit, PharmacyVisit, LeaveRequest, LeaveType, Employee),
+    ),
+    "growth_tracking": ExportKind(
+        filters_schema=GrowthTrackingExportFilters,
+        build=exports.build_growth_tracking_export,
+        watermark=_tables_watermark(PharmacyVisit, DoctorVisit, Employee),
+    ),
+}
+
+
+def _write_json(path: str, data: dict):
+    # Yarım yazılmış dosya okunmasın diye geçici dosya + atomik rename
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class ExportJobManager:
+    """
+    Export job kuyruğu ve artifact deposu (worker process başına bir tane)
+    """
+
+    def __init__(self, artifact_dir: str, ttl_seconds: int, max_workers: int, max_pending: int):
+        self.artifact_dir = artifact_dir
+        self.jobs_dir = os.path.join(artifact_dir, "jobs")
+        self.files_dir = os.path.join(artifact_dir, "files")
+        self.ttl_seconds = ttl_seconds
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        # artifact anahtarı -> bu dosyayı bekleyen job id'leri
+        self._inflight: Dict[str, List[str]] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            os.makedirs(self.files_dir, exist_ok=True)
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="export-job"
+            )
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # --- Paths ---
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _file_path(self, key: str) -> str:
+        return os.path.join(self.files_dir, f"{key}.xlsx")
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.files_dir, f"{key}.json")
+
+    # --- Artifact'lar ---
+
+    @staticmethod
+    def artifact_key(kind: str, filters: dict, watermark: dict) -> str:
+        payload = json.dumps(
+            {
+                "kind": kind,
+                "filters": filters,
+                "watermark": watermark,
+                # Dönem filtreleri (bu hafta, son 30 gün...) bugüne göre çözülür
+                "day": date.today().isoformat(),
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _expires_at(self, path: str) -> Optional[datetime]:
+        try:
+            created = os.path.getmtime(path)
+        except FileNotFoundError:
+            return None
+        expires = created + self.ttl_seconds
+        if expires <= time.time():
+            return None
+        return datetime.utcfromtimestamp(expires)
+
+    def _find_artifact(self, key: str) -> Optional[dict]:
+        """Süresi dolmamış artifact'ın meta bilgisi (yoksa None)"""
+        expires_at = self._expires_at(self._file_path(key))
+        if expires_at is None:
+            return None
+        meta = _read_json(self._meta_path(key))
+        if meta is None:
+            return None
+        meta["expires_at"] = expires_at.isoformat()
+        return meta
+
+    def artifact_path(self, job: dict) -> Optional[str]:
+        """Tamamlanmış job'ın dosyası (süresi dolduysa None)"""
+        if job.get("status") != JOB_COMPLETED:
+            return None
+        if self._find_artifact(job["key"]) is None:
+            return None
+        return self._file_path(job["key"])
+
+    def purge_expired(self):
+        """TTL'i dolan artifact'ları ve job kayıtlarını sil"""
+        cutoff = time.time() - self.ttl_seconds
+        for directory in (self.files_dir, self.jobs_dir):
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    # --- Job kayıtları ---
+
+    def get(self, job_id: str) -> Optional[dict]:
+        if not _JOB_ID_PATTERN.match(job_id):
+            return None
+        return _read_json(self._job_path(job_id))
+
+    def _update(self, job_ids: List[str], **fields):
+        for job_id in job_ids:
+            job = self.get(job_id)
+            if job is None:
+                continue
+            job.update(fields)
+            _write_json(self._job_path(job_id), job)
+
+    def submit(self, db: Session, kind: str, filters: dict, owner_id: int) -> dict:
+        """
+        Export job'ı oluştur. Aynı anahtarlı geçerli bir dosya varsa job hemen
+        tamamlanmış döner; aynı dosya şu an üretiliyorsa job ona bağlanır.
+
+        Raises:
+            pydantic.ValidationError: filtreler export türüne uymuyorsa
+            ExportQueueFull: kuyruk doluysa
+        """
+        export_kind = EXPORT_KINDS[kind]
+        params = export_kind.filters_schema.model_validate(filters)
+        normalized_filters = params.model_dump(mode="json")
+        key = self.artifact_key(kind, normalized_filters, export_kind.watermark(db, params))
+
+        executor = self._get_executor()
+        self.purge_expired()
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "filters": normalized_filters,
+            "owner_id": owner_id,
+            "key": key,
+            "status": JOB_QUEUED,
+            "reused": False,
+            "filename": None,
+            "error": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+            "expires_at": None,
+        }
+
+        artifact = self._find_artifact(key)
+        if artifact is not None:
+            job.update(
+                status=JOB_COMPLETED,
+                reused=True,
+                filename=artifact["filename"],
+                finished_at=job["created_at"],
+                expires_at=artifact["expires_at"],
+            )
+            _write_json(self._job_path(job["id"]), job)
+            return job
+
+        with self._lock:
+            waiting = self._inflight.get(key)
+            if waiting is not None:
+                # Aynı dosya şu an üretiliyor - bitince bu job da tamamlanır
+                job["reused"] = True
+                _write_json(self._job_path(job["id"]), job)
+                waiting.append(job["id"])
+                return job
+
+            if self._pending >= self.max_pending:
+                raise ExportQueueFull()
+
+            _write_json(self._job_path(job["id"]), job)
+            self._pending += 1
+            self._inflight[key] = [job["id"]]
+
+        try:
+            executor.submit(self._run, kind, params, key)
+        except RuntimeError:
+            # Uygulama kapanıyor
+            with self._lock:
+                self._pending -= 1
+                self._inflight.pop(key, None)
+            raise ExportQueueFull()
+        return job
+
+    def _run(self, kind: str, params: BaseModel, key: str):
+        with self._lock:
+            job_ids = list(self._inflight.get(key, []))
+        self._update(job_ids, status=JOB_RUNNING)
+
+        file_path = self._file_path(key)
+        tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        db = SessionLocal()
+        try:
+            book, filename = EXPORT_KINDS[kind].build(db, **params.model_dump())
+            book.save(tmp_path)
+            _write_json(self._meta_path(key), {
+                "kind": kind,
+                "filename": filename,
+                "created_at": datetime.utcnow().isoformat(),
+            })
+            os.replace(tmp_path, file_path)
+            result = {
+                "status": JOB_COMPLETED,
+                "filename": filename,
+                "expires_at": (datetime.utcnow() + timedelta(seconds=self.ttl_seconds)).isoformat(),
+            }
+        except Exception as e:
+            logger.exception("Export job failed (kind=%s)", kind)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            result = {"status": JOB_FAILED, "error": str(e)}
+        finally:
+            db.close()
+            with self._lock:
+                job_ids = self._inflight.pop(key, [])
+                self._pending -= 1
+
+        self._update(job_ids, finished_at=datetime.utcnow().isoformat(), **result)
+
+
+export_jobs = ExportJobManager(
+    artifact_dir=settings.EXPORT_ARTIFACT_DIR,
+    ttl_seconds=settings.EXPORT_ARTIFACT_TTL,
+    max_workers=settings.EXPORT_WORKERS,
+    max_pending=settings.EXPORT_MAX_PENDING,
+)
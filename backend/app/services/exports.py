@@ -0,0 +1,432 @@
+"""
+Excel export builder'ları
+
+Her builder (db, filtreler) alır ve (StreamingWorkbook, dosya adı) döner.
+Hem senkron export endpoint'leri hem de arka plan export job'ları
+(services/export_jobs.py) aynı builder'ları kullanır.
+"""
+import calendar
+import re
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from ..models.doctor_visit import DoctorVisit
+from ..models.employee import Employee
+from ..models.leave_request import LeaveRequest, LeaveRequestStatus
+from ..models.leave_type import LeaveType
+from ..models.pharmacy_visit import PharmacyVisit
+from ..models.weekly_program import WeeklyProgram
+from ..utils.excel_export import StreamingWorkbook, EXPORT_CHUNK_SIZE
+from .growth import GROWTH_METRICS, GrowthSeries, build_growth_report, growth_months
+
+EXPORT_PERIODS = ('day', 'week', 'month', 'year')
+EXPORT_VISIT_TYPES = ('all', 'doctor', 'pharmacy')
+
+ExportResult = Tuple[StreamingWorkbook, str]
+
+
+def current_week_range() -> Tuple[date, date]:
+    """Bu haftanın başlangıç (Pazartesi) ve bitiş (Pazar) tarihleri"""
+    today = datetime.now().date()
+    start_of_week = today - timedelta(days=today.weekday())
+    return start_of_week, start_of_week + timedelta(days=6)
+
+
+def build_pharmacy_visits_export(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    employee_id: Optional[int] = None,
+    pharmacy_name: Optional[str] = None,
+    approval_filter: Optional[str] = None
+) -> ExportResult:
+    """
+    Eczane ziyaretleri (seçilen filtrelere göre)
+    """
+    # Query oluştur - çalışan adı aynı sorguda (satır başına ek sorgu yok)
+    query = db.query(
+        PharmacyVisit,
+        Employee.full_name.label('employee_name')
+    ).outerjoin(
+        Employee, PharmacyVisit.employee_id == Employee.id
+    )
+
+    # Employee filtresi
+    if employee_id:
+        query = query.filter(PharmacyVisit.employee_id == employee_id)
+
+    # Eczane adı filtresi
+    if pharmacy_name:
+        search_term = f"%{pharmacy_name.lower().strip()}%"
+        query = query.filter(PharmacyVisit.pharmacy_name.ilike(search_term))
+
+    # Tarih aralığı filtresi
+    if start_date and end_date:
+        start_datetime = datetime.combine(start_date, datetime.min.time())
+        end_datetime = datetime.combine(end_date, datetime.max.time())
+        query = query.filter(
+            and_(
+                PharmacyVisit.visit_date >= start_datetime,
+                PharmacyVisit.visit_date <= end_datetime
+            )
+        )
+
+    # Onay durumu filtresi
+    if approval_filter == 'approved':
+        query = query.filter(PharmacyVisit.is_approved == True)
+    elif approval_filter == 'pending':
+        query = query.filter(PharmacyVisit.is_approved == False)
+
+    # Çalışan bilgisi için
+    employee_name = "tum_calisanlar"
+    if employee_id:
+        employee = db.query(Employee).filter(Employee.id == employee_id).first()
+        if employee:
+            # Türkçe karakterleri düzelt ve boşlukları alt çizgi yap
+            employee_name = employee.full_name.lower()
+            employee_name = employee_name.replace('ı', 'i').replace('ğ', 'g').replace('ü', 'u')
+            employee_name = employee_name.replace('ş', 's').replace('ö', 'o').replace('ç', 'c')
+            employee_name = employee_name.replace(' ', '_')
+
+    # Excel oluştur (write-only, satırlar parça parça okunur)
+    book = StreamingWorkbook()
+    ws = book.add_sheet("Eczane Ziyaretleri", column_widths=[20, 30, 40, 12, 12, 15, 15, 15, 40, 15])
+
+    # Header
+    book.append_header(ws, [
+        "Çalışan", "Eczane Adı", "Adres", "Ürün Sayısı", "MF Sayısı",
+        "Ziyaret Tarihi", "Başlangıç Saati", "Bitiş Saati", "Notlar", "Onay Durumu"
+    ])
+
+    # Data
+    visits = query.order_by(PharmacyVisit.visit_date.desc(), PharmacyVisit.id.desc()).yield_per(EXPORT_CHUNK_SIZE)
+    for visit, visit_employee_name in visits:
+        ws.append([
+            visit_employee_name or "",
+            visit.pharmacy_name,
+            visit.pharmacy_address or "",
+            visit.product_count,
+            visit.mf_count,
+            visit.visit_date.strftime('%d.%m.%Y') if visit.visit_date else "",
+            visit.start_time.strftime('%H:%M') if visit.start_time else "",
+            visit.end_time.strftime('%H:%M') if visit.end_time else "",
+            visit.notes or "",
+            "Onaylandı" if visit.is_approved else "Bekliyor"
+        ])
+
+    # Dosya adı oluştur - Türkçe ay isimleri
+    turkish_months = {
+        1: 'ocak', 2: 'subat', 3: 'mart', 4: 'nisan', 5: 'mayis', 6: 'haziran',
+        7: 'temmuz', 8: 'agustos', 9: 'eylul', 10: 'ekim', 11: 'kasim', 12: 'aralik'
+    }
+
+    # Tarih formatı oluştur
+    if start_date and end_date:
+        start_month = turkish_months[start_date.month]
+        start_day = start_date.day
+        end_month = turkish_months[end_date.month]
+        end_day = end_date.day
+        year = end_date.year
+
+        # Aynı gün mü kontrol et
+        if start_date == end_date:
+            date_str = f"{start_month}{start_day}_{year}"
+        else:
+            date_str = f"{start_month}{start_day}_{end_month}{end_day}_{year}"
+    else:
+        # Tarih yoksa bugünün tarihini kullan
+        today = datetime.now()
+        month = turkish_months[today.month]
+        day = today.day
+        year = today.year
+        date_str = f"{month}{day}_{year}"
+
+    filename = f"eczaneziyaretleri_{employee_name}_{date_str}.xlsx"
+
+    return book, filename
+
+
+def build_weekly_plans_export(db: Session) -> ExportResult:
+    """
+    Bu haftanın tüm çalışan planları
+    """
+    start_of_week, end_of_week = current_week_range()
+
+    # Bu haftanın programlarını çalışan adıyla birlikte çek
+    programs = db.query(
+        WeeklyProgram,
+        Employee.full_name.label('employee_name')
+    ).outerjoin(
+        Employee, WeeklyProgram.employee_id == Employee.id
+    ).filter(
+        WeeklyProgram.week_start >= start_of_week,
+        WeeklyProgram.week_start <= end_of_week
+    ).order_by(WeeklyProgram.id).yield_per(EXPORT_CHUNK_SIZE)
+
+    # Excel oluştur
+    book = StreamingWorkbook()
+    ws = book.add_sheet("Haftalık Planlar", column_widths=[25, 40, 40, 30, 30])
+
+    # Title
+    ws.append([book.cell(
+        ws,
+        f"Haftalık Planlar ({start_of_week.strftime('%d.%m.%Y')} - {end_of_week.strftime('%d.%m.%Y')})",
+        "title"
+    )])
+    book.merge(ws, 'A1:E1')
+    ws.append([])
+
+    row_num = 3
+    has_programs = False
+
+    for program, employee_name in programs:
+        has_programs = True
+
+        # Çalışan bilgisi
+        ws.append([book.cell(ws, f"Çalışan: {employee_name or 'Bilinmeyen'}", "subheader")])
+        book.merge(ws, f'A{row_num}:E{row_num}')
+        row_num += 1
+
+        # Günlük planlar
+        for day_data in program.days_json:
+            day_name = day_data.get('day_name', '')
+            day_date = day_data.get('date', '')
+            visits = day_data.get('visits', [])
+
+            if visits:
+                ws.append([book.cell(ws, f"{day_name} ({day_date})", "bold")])
+                row_num += 1
+
+                for visit in visits:
+                    hospital = visit.get('hospital_name', '')
+                    doctors = visit.get('doctors', [])
+
+                    ws.append([None, f"Hastane: {hospital}"])
+                    row_num += 1
+
+                    for doctor in doctors:
+                        ws.append([None, None, f"• {doctor}"])
+                        row_num += 1
+
+        # Çalışanlar arası boşluk
+        ws.append([])
+        ws.append([])
+        row_num += 2
+
+    if not has_programs:
+        ws.append(["Bu hafta için plan bulunamadı"])
+
+    filename = f"haftalik_planlar_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+
+    return book, filename
+
+
+def build_daily_reports_export(
+    db: Session,
+    period: str,
+    employee: Optional[str] = None,
+    visit_type: str = 'all'
+) -> ExportResult:
+    """
+    Günlük raporlar (doktor ve eczane ziyaretleri)
+    """
+    # Calculate date range
+    today = datetime.now().date()
+    if period == 'day':
+        start_date = today
+        end_date = today
+    elif period == 'week':
+        start_date = today - timedelta(days=7)
+        end_date = today
+    elif period == 'month':
+        start_date = today - timedelta(days=30)
+        end_date = today
+    elif period == 'year':
+        start_date = today - timedelta(days=365)
+        end_date = today
+    else:
+        raise ValueError(f"Invalid period: {period}")
+
+    # Dönemle çakışan onaylı izinleri tek sorguda çek (satır başına sorgu yerine)
+    leave_query = db.query(
+        LeaveRequest.employee_id,
+        LeaveRequest.start_date,
+        LeaveRequest.end_date,
+        LeaveType.name
+    ).join(
+        LeaveType, LeaveRequest.leave_type_id == LeaveType.id
+    ).filter(
+        LeaveRequest.status == LeaveRequestStatus.APPROVED,
+        LeaveRequest.start_date <= end_date,
+        LeaveRequest.end_date >= start_date
+    )
+    if employee and employee != 'all':
+        leave_query = leave_query.join(
+            Employee, LeaveRequest.employee_id == Employee.id
+        ).filter(Employee.full_name == employee)
+
+    leaves_by_employee = defaultdict(list)
+    for emp_id, leave_start, leave_end, leave_type_name in leave_query.all():
+        leaves_by_employee[emp_id].append((leave_start, leave_end, leave_type_name))
+
+    def get_employee_leave_info(emp_id: int, check_date: date):
+        """Check if employee is on leave for the given date"""
+        for leave_start, leave_end, leave_type_name in leaves_by_employee.get(emp_id, ()):
+            if leave_start <= check_date <= leave_end:
+                return f"İzinli ({leave_type_name})"
+        return None
+
+    # Excel oluştur
+    book = StreamingWorkbook()
+
+    # Doktor ziyaretleri sheet (eğer visit_type all veya doctor ise)
+    if visit_type in ['all', 'doctor']:
+        ws_doctors = book.add_sheet("Hekim Ziyaretleri", column_widths=[12, 20, 25, 30, 20, 40])
+
+        # Query doctor visits
+        doctor_query = db.query(DoctorVisit, Employee.id, Employee.full_name).join(
+            Employee, DoctorVisit.employee_id == Employee.id
+        ).filter(
+            DoctorVisit.visit_date >= start_date,
+            DoctorVisit.visit_date <= end_date
+        )
+
+        if employee and employee != 'all':
+            doctor_query = doctor_query.filter(Employee.full_name == employee)
+
+        # Headers
+        book.append_header(ws_doctors, ["Tarih", "Çalışan", "Doktor Adı", "Hastane", "Branş", "Notlar"])
+
+        # Data
+        has_rows = False
+        doctor_visits = doctor_query.order_by(
+            DoctorVisit.visit_date.desc(), DoctorVisit.id.desc()
+        ).yield_per(EXPORT_CHUNK_SIZE)
+        for visit, emp_id, emp_name in doctor_visits:
+            has_rows = True
+            leave_info = get_employee_leave_info(emp_id, visit.visit_date)
+            if leave_info:
+                details = [leave_info] * 4
+            else:
+                details = [visit.doctor_name, visit.hospital_name, visit.specialty or '', visit.notes or '']
+            ws_doctors.append([visit.visit_date.strftime('%d.%m.%Y'), emp_name, *details])
+
+        if not has_rows:
+            # Veri yoksa mesaj ekle
+            ws_doctors.append([book.cell(ws_doctors, "Bu dönem için hekim ziyareti kaydı bulunamadı", "muted")])
+            book.merge(ws_doctors, 'A2:F2')
+
+    # Eczane ziyaretleri sheet (eğer visit_type all veya pharmacy ise)
+    if visit_type in ['all', 'pharmacy']:
+        ws_pharmacies = book.add_sheet("Eczane Ziyaretleri", column_widths=[12, 20, 30, 15, 15, 40])
+
+        # Query pharmacy visits
+        pharmacy_query = db.query(PharmacyVisit, Employee.id, Employee.full_name).join(
+            Employee, PharmacyVisit.employee_id == Employee.id
+        ).filter(
+            PharmacyVisit.visit_date >= start_date,
+            PharmacyVisit.visit_date <= end_date
+        )
+
+        if employee and employee != 'all':
+            pharmacy_query = pharmacy_query.filter(Employee.full_name == employee)
+
+        # Headers
+        book.append_header(ws_pharmacies, ["Tarih", "Çalışan", "Eczane Adı", "Satılan Ürün", "Verilen MF", "Notlar"])
+
+        # Data
+        has_rows = False
+        pharmacy_visits = pharmacy_query.order_by(
+            PharmacyVisit.visit_date.desc(), PharmacyVisit.id.desc()
+        ).yield_per(EXPORT_CHUNK_SIZE)
+        for visit, emp_id, emp_name in pharmacy_visits:
+            has_rows = True
+            leave_info = get_employee_leave_info(emp_id, visit.visit_date)
+            if leave_info:
+                details = [leave_info] * 4
+            else:
+                details = [visit.pharmacy_name, visit.product_count, visit.mf_count, visit.notes or '']
+            ws_pharmacies.append([visit.visit_date.strftime('%d.%m.%Y'), emp_name, *details])
+
+        if not has_rows:
+            # Veri yoksa mesaj ekle
+            ws_pharmacies.append([book.cell(ws_pharmacies, "Bu dönem için eczane ziyareti kaydı bulunamadı", "muted")])
+            book.merge(ws_pharmacies, 'A2:F2')
+
+    filename = f"gunluk_raporlar_{period}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+
+    return book, filename
+
+
+GROWTH_MONTHS = 13  # son 12 ay + bu ay
+_SHEET_TITLE_INVALID = re.compile(r"[\\/*?:\[\]]")
+
+
+def _sheet_title(name: str, used: set) -> str:
+    """Excel sayfa adı: en fazla 31 karakter, []:*?/\\ olmadan, workbook içinde tekil"""
+    base = _SHEET_TITLE_INVALID.sub(" ", name).strip()[:31] or "Çalışan"
+    title, suffix = base, 2
+    while title.lower() in used:
+        title = f"{base[:31 - len(str(suffix)) - 1]} {suffix}"
+        suffix += 1
+    used.add(title.lower())
+    return title
+
+
+def _append_growth_sheet(book: StreamingWorkbook, title: str, heading: str, months, series: GrowthSeries):
+    ws = book.add_sheet(title, column_widths=[15, 15, 15, 15, 15, 15, 15, 18])
+
+    ws.append([book.cell(ws, f"Büyüme Takibi Raporu - {heading}", "title_purple")])
+    book.merge(ws, 'A1:H1')
+    ws.append([])
+
+    book.append_header(ws, [
+        "Ay", "Satılan Ürün", "Verilen MF", "Hekim Ziyareti",
+        "Ürün Değişim %", "MF Değişim %", "Ziyaret Değişim %", "3 Ay Ort. Değişim %"
+    ], style="header_purple")
+
+    def change_cell(change):
+        if np.isnan(change):
+            return None
+        return book.cell(ws, f"{change:.1f}%", "growth" if change >= 0 else "decline")
+
+    for position, month in enumerate(months):
+        ws.append([
+            f"{calendar.month_name[month.month]} {month.year}",
+            *[int(series.values[name][position]) for name in GROWTH_METRICS],
+            *[change_cell(series.changes[name][position]) for name in GROWTH_METRICS],
+            change_cell(series.rolling_change[position]),
+        ])
+
+
+def build_growth_tracking_export(db: Session, employee: Optional[str] = None) -> ExportResult:
+    """
+    Büyüme takibi - Aylık bazda satış ve ziyaret performansı
+    - employee verilmezse / 'all': ekip özeti + her çalışan için ayrı sayfa
+    - çalışan adı verilirse: sadece o çalışanın sayfası
+    """
+    months = growth_months(GROWTH_MONTHS)
+
+    employee_ids = None
+    if employee and employee != 'all':
+        emp = db.query(Employee).filter(Employee.full_name == employee).first()
+        if emp:
+            employee_ids = [emp.id]
+
+    report = build_growth_report(db, months, employee_ids)
+
+    book = StreamingWorkbook()
+    used_titles = set()
+    if employee_ids is None:
+        _append_growth_sheet(book, _sheet_title("Ekip Özeti", used_titles), "Tüm Çalışanlar", months, report.team)
+    for index, name in enumerate(report.employee_names):
+        _append_growth_sheet(book, _sheet_title(name, used_titles), name, months, report.employee(index))
+
+    filename = f"buyume_takibi_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+
+    return book, filename
@@ -0,0 +1,187 @@
+"""
+Büyüme takibi (çalışan x ay matrisi)
+
+Seçilen aylar için tüm çalışanların ürün, MF ve hekim ziyareti toplamları
+günlük aktivite özetinden tek sorguda (çalışan, ay) bazında okunur ve
+(çalışan sayısı x ay sayısı) NumPy matrislerine yerleştirilir. Değişimler
+tüm çalışanlar için birlikte hesaplanır:
+
+    - aylık değişim %: önceki aya göre (önceki ay 0 ise boş)
+    - 3 ay ort. değişim %: son 3 ayın (ürün + MF + ziyaret) ortalamasının
+      bir ay önceki 3 aylık pencereye göre değişimi
+
+Ay ekseni yoğundur: verisi olmayan aylar 0 ile yer alır, böylece "önceki ay"
+her zaman takvimdeki önceki aydır.
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import Date, and_, cast, func, or_, select
+from sqlalchemy.orm import Session
+
+from ..models.daily_activity import DailyActivityRollup
+from ..models.employee import Employee, EmployeeRole
+from .chart_buckets import bucket_start, shift_buckets
+
+# Ölçü adı -> özet tablosu kolonu
+GROWTH_METRICS = {
+    "products": DailyActivityRollup.product_count,
+    "mf": DailyActivityRollup.mf_count,
+    "doctor_visits": DailyActivityRollup.doctor_visit_count,
+}
+ROLLING_WINDOW = 3
+
+
+@dataclass
+class GrowthSeries:
+    """Tek satırın (çalışan ya da ekip toplamı) aylık değerleri ve değişimleri"""
+    values: Dict[str, np.ndarray]   # ölçü -> (ay,)
+    changes: Dict[str, np.ndarray]  # ölçü -> (ay,) yüzde, hesaplanamayan aylar NaN
+    rolling_change: np.ndarray      # (ay,) yüzde, NaN olabilir
+
+
+@dataclass
+class GrowthReport:
+    months: List[date]  # ayların ilk günü, eskiden yeniye
+    employee_ids: List[int]
+    employee_names: List[str]
+    values: Dict[str, np.ndarray]   # ölçü -> (çalışan, ay)
+    changes: Dict[str, np.ndarray]  # ölçü -> (çalışan, ay)
+    rolling_change: np.ndarray      # (çalışan, ay)
+    team: GrowthSeries
+
+    def employee(self, index: int) -> GrowthSeries:
+        return GrowthSeries(
+            values={name: matrix[index] for name, matrix in self.values.items()},
+            changes={name: matrix[index] for name, matrix in self.changes.items()},
+            rolling_change=self.rolling_change[index],
+        )
+
+
+def percent_change(matrix: np.ndarray) -> np.ndarray:
+    """Son eksende bir önceki elemana göre yüzde değişim; ilk eleman ve önceki 0 ise NaN"""
+    matrix = matrix.astype(float)
+    result = np.full(matrix.shape, np.nan)
+    previous, current = matrix[..., :-1], matrix[..., 1:]
+    np.divide((current - previous) * 100, previous, out=result[..., 1:], where=previous > 0)
+    return result
+
+
+def rolling_mean(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Son eksende kayan ortalama; pencere dolmayan başlangıç elemanları NaN"""
+    matrix = matrix.astype(float)
+    cumulative = np.cumsum(np.pad(matrix, [(0, 0)] * (matrix.ndim - 1) + [(1, 0)]), axis=-1)
+    result = np.full(matrix.shape, np.nan)
+    result[..., window - 1:] = (cumulative[..., window:] - cumulative[..., :-window]) / window
+    return result
+
+
+def _changes(values: Dict[str, np.ndarray]):
+    changes = {name: percent_change(matrix) for name, matrix in values.items()}
+    combined = sum(values.values())
+    rolling_change = percent_change(rolling_mean(combined, ROLLING_WINDOW))
+    # NaN ortalamalardan gelen değişimler de NaN kalır
+    return changes, rolling_change
+
+
+def growth_months(month_count: int, today: Optional[date] = None) -> List[date]:
+    """Bu ay dahil son month_count ay"""
+    current = bucket_start(today or date.today(), "month")
+    return [shift_buckets(current, "month", offset) for offset in range(1 - month_count, 1)]
+
+
+def build_growth_report(
+    db: Session,
+    months: List[date],
+    employee_ids: Optional[List[int]] = None
+) -> GrowthReport:
+    """
+    Aylar için çalışan x ay matrisi ve değişimleri
+    employee_ids verilmezse: aktif EMPLOYEE'ler ve dönemde aktivitesi olan herkes
+    """
+    first_month, last_month = months[0], months[-1]
+    month_key = cast(func.date_trunc("month", DailyActivityRollup.activity_date), Date)
+    monthly = select(
+        DailyActivityRollup.employee_id,
+        month_key.label("month"),
+        *[func.sum(column).label(name) for name, column in GROWTH_METRICS.items()],
+    ).where(
+        DailyActivityRollup.activity_date >= first_month,
+        DailyActivityRollup.activity_date < shift_buckets(last_month, "month", 1),
+    ).group_by(DailyActivityRollup.employee_id, month_key).subquery()
+
+    query = select(
+        Employee.id,
+        Employee.full_name,
+        monthly.c.month,
+        *[monthly.c[name] for name in GROWTH_METRICS],
+    ).outerjoin(monthly, monthly.c.employee_id == Employee.id)
+    if employee_ids is not None:
+        query = query.where(Employee.id.in_(employee_ids))
+    else:
+        query = query.where(or_(
+            and_(Employee.role == EmployeeRole.EMPLOYEE, Employee.is_active.is_(True)),
+            monthly.c.employee_id.isnot(None),
+        ))
+    rows = db.execute(query.order_by(Employee.full_name, Employee.id)).all()
+
+    employee_index: Dict[int, int] = {}
+    employee_names: List[str] = []
+    for row in rows:
+        if row.id not in employee_index:
+            employee_index[row.id] = len(employee_names)
+            employee_names.append(row.full_name)
+    month_index = {month: position for position, month in enumerate(months)}
+
+    shape = (len(employee_names), len(months))
+    values = {name: np.zeros(shape, dtype=np.int64) for name in GROWTH_METRICS}
+    filled = [row for row in rows if row.month is not None]
+    if filled:
+        row_positions = np.array([employee_index[row.id] for row in filled])
+        column_positions = np.array([month_index[row.month] for row in filled])
+        for name in GROWTH_METRICS:
+            values[name][row_positions, column_positions] = [int(getattr(row, name) or 0) for row in filled]
+
+    changes, rolling_change = _changes(values)
+    team_values = {name: matrix.sum(axis=0) for name, matrix in values.items()}
+    team_changes, team_rolling = _changes(team_values)
+
+    return GrowthReport(
+        months=months,
+        employee_ids=list(employee_index),
+        employee_names=employee_names,
+        values=values,
+        changes=changes,
+        rolling_change=rolling_change,
+        team=GrowthSeries(values=team_values, changes=team_changes, rolling_change=team_rolling),
+    )
+
+
+def _optional_list(array: np.ndarray) -> List[Optional[float]]:
+    """NaN -> None, diğerleri 1 basamağa yuvarlanmış (JSON için)"""
+    return [None if np.isnan(value) else round(float(value), 1) for value in array]
+
+
+def series_as_dict(series: GrowthSeries) -> dict:
+    return {
+        **{name: [int(value) for value in array] for name, array in series.values.items()},
+        **{f"{name}_change": _optional_list(array) for name, array in series.changes.items()},
+        "rolling_3m_change": _optional_list(series.rolling_change),
+    }
+
+
+def growth_report_as_dict(report: GrowthReport) -> dict:
+    return {
+        "months": [month.strftime("%Y-%m") for month in report.months],
+        "team": series_as_dict(report.team),
+        "employees": [
+            {
+                "employee_id": employee_id,
+                "employee_name": report.employee_names[index],
+                **series_as_dict(report.employee(index)),
+            }
+            for index, employee_id in enumerate(report.employee_ids)
+        ],
+    }
@@ -0,0 +1,165 @@
+"""
+Çalışan sıralaması (leaderboard)
+
+Her kaynak tablo çalışan başına ayrı CTE'de toplanır (hekim ziyaretleri
+günlük özetten, satışlar sales'ten) ve Employee'ye LEFT JOIN ile eklenir;
+ziyaret x satış çarpımı oluşmaz. Sıra veritabanında RANK() OVER ile
+verilir (eşit ciroda aynı sıra):
+
+    leaderboard(db, start_date, end_date)                  # tüm liste
+    employee_standing(db, start_date, end_date, user_id)   # tek çalışanın sırası
+
+Sonuçlar worker başına (başlangıç, bitiş) dönemi için LEADERBOARD_CACHE_TTL
+saniye tutulur. Dönemin listesi cache'teyse tek çalışanın sırası listeden
+okunur; değilse sadece o çalışanın satırı döner (liste aktarılmaz).
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Hashable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.daily_activity import DailyActivityRollup
+from ..models.employee import Employee, EmployeeRole
+from ..models.sale import Sale
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    rank: int
+    employee_id: int
+    employee_name: str
+    visit_count: int
+    sale_count: int
+    total_revenue: float
+    total_employees: int
+
+
+def _ranked(start_date: date, end_date: date):
+    """Çalışan başına toplamlar + RANK() OVER (ciro) - alt sorgu"""
+    visits = select(
+        DailyActivityRollup.employee_id,
+        func.sum(DailyActivityRollup.doctor_visit_count).label("visit_count"),
+    ).where(
+        DailyActivityRollup.activity_date >= start_date,
+        DailyActivityRollup.activity_date <= end_date
+    ).group_by(DailyActivityRollup.employee_id).cte("leaderboard_visits")
+
+    sales = select(
+        Sale.employee_id,
+        func.count(Sale.id).label("sale_count"),
+        func.sum(Sale.total_amount).label("total_revenue"),
+    ).where(
+        Sale.sale_date >= start_date,
+        Sale.sale_date <= end_date
+    ).group_by(Sale.employee_id).cte("leaderboard_sales")
+
+    total_revenue = func.coalesce(sales.c.total_revenue, 0)
+    return select(
+        Employee.id.label("employee_id"),
+        Employee.full_name.label("employee_name"),
+        func.coalesce(visits.c.visit_count, 0).label("visit_count"),
+        func.coalesce(sales.c.sale_count, 0).label("sale_count"),
+        total_revenue.label("total_revenue"),
+        func.rank().over(order_by=total_revenue.desc()).label("rank"),
+        func.count().over().label("total_employees"),
+    ).outerjoin(
+        visits, visits.c.employee_id == Employee.id
+    ).outerjoin(
+        sales, sales.c.employee_id == Employee.id
+    ).where(
+        Employee.role == EmployeeRole.EMPLOYEE
+    ).subquery("leaderboard")
+
+
+def _entry(row) -> LeaderboardEntry:
+    return LeaderboardEntry(
+        rank=row.rank,
+        employee_id=row.employee_id,
+        employee_name=row.employee_name,
+        visit_count=int(row.visit_count),
+        sale_count=int(row.sale_count),
+        total_revenue=float(row.total_revenue),
+        total_employees=row.total_employees,
+    )
+
+
+class LeaderboardCache:
+    """Dönem anahtarı -> sonuç, TTL + LRU (worker başına)"""
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+leaderboard_cache = LeaderboardCache(
+    ttl_seconds=settings.LEADERBOARD_CACHE_TTL,
+    max_size=settings.LEADERBOARD_CACHE_SIZE,
+)
+
+
+def leaderboard(db: Session, start_date: date, end_date: date) -> Tuple[LeaderboardEntry, ...]:
+    """Dönemin tüm sıralaması (sıra, ad, id'ye göre)"""
+    key = ("list", start_date, end_date)
+    entries = leaderboard_cache.get(key)
+    if entries is None:
+        ranked = _ranked(start_date, end_date)
+        rows = db.execute(
+            select(ranked).order_by(ranked.c.rank, ranked.c.employee_name, ranked.c.employee_id)
+        ).all()
+        entries = tuple(_entry(row) for row in rows)
+        leaderboard_cache.set(key, entries)
+    return entries
+
+
+def top_employees(db: Session, start_date: date, end_date: date, limit: int) -> List[LeaderboardEntry]:
+    return list(leaderboard(db, start_date, end_date)[:limit])
+
+
+def employee_standing(db: Session, start_date: date, end_date: date, employee_id: int) -> Optional[LeaderboardEntry]:
+    """Tek çalışanın sırası (EMPLOYEE rolünde değilse None)"""
+    entries = leaderboard_cache.get(("list", start_date, end_date))
+    if entries is not None:
+        return next((entry for entry in entries if entry.employee_id == employee_id), None)
+
+    key = ("employee", start_date, end_date, employee_id)
+    cached = leaderboard_cache.get(key)
+    if cached is not None:
+        # Çalışan sıralamada yoksa da cache'lenir (False)
+        return cached or None
+
+    ranked = _ranked(start_date, end_date)
+    row = db.execute(select(ranked).where(ranked.c.employee_id == employee_id)).first()
+    entry = _entry(row) if row else None
+    leaderboard_cache.set(key, entry or False)
+    return entry
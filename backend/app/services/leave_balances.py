@@ -0,0 +1,321 @@
+"""
+İzin bakiyesi motoru
+
+Bakiye, hareket defterinden (leave_ledger_entries) hesaplanır:
+
+    hak (current_year_entitlement) = ACCRUAL hareketleri toplamı
+    kullanılan (used_days)         = USAGE hareketleri toplamı
+    devreden (carried_over_days)   = önceki service_year'ın kalanı (sadece biriken izinlerde)
+
+Bir çalışanın tüm izin türleri ve service_year zinciri tek okumayla bellekte
+hesaplanır ve leave_balances tablosuna tek INSERT ... ON CONFLICT ile yazılır.
+Fonksiyonlar commit etmez; çağıran handler'ın transaction'ına dahil olur.
+
+    record_leave_usage(db, employee, leave_type, service_year, days, leave_request_id=..., created_by=...)
+    db.commit()
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..models.employee import Employee
+from ..models.leave_balance import LeaveBalance
+from ..models.leave_ledger import LeaveLedgerEntry, LeaveLedgerEntryType
+from ..models.leave_type import LeaveType
+from .reference_data import reference_data
+
+ANNUAL_LEAVE_NAME = "Yıllık İzin"
+DEFAULT_ANNUAL_LEAVE_DAYS = 14
+
+# pg_advisory_xact_lock(sınıf, employee_id) - aynı çalışanın bakiye hesapları sıraya girer
+BALANCE_LOCK_CLASS = 7301
+
+BALANCE_COLUMNS = ("carried_over_days", "current_year_entitlement", "total_days", "used_days", "remaining_days")
+
+
+def calculate_service_year(hire_date: date, check_date: date = None) -> int:
+    """
+    İşe giriş tarihine göre kaç yıldönümü geçtiğini hesapla
+
+    service_year = Kaç yıldönümü GEÇTİ
+    - 0: Henüz yıldönümü gelmedi (1. yıl içinde)
+    - 1: 1. yıldönümü geçti (2. yıl içinde)
+    - 2: 2. yıldönümü geçti (3. yıl içinde)
+
+    Örnek:
+    - hire_date: 2024-06-15
+    - check_date: 2025-05-01 -> service_year = 0 (henüz 1. yıldönümü gelmedi)
+    - check_date: 2025-06-15 -> service_year = 1 (1. yıldönümü bugün)
+    - check_date: 2025-07-01 -> service_year = 1 (1. yıldönümü geçti)
+    - check_date: 2026-07-01 -> service_year = 2 (2. yıldönümü geçti)
+    """
+    if not hire_date:
+        return 0
+
+    if not check_date:
+        check_date = date.today()
+
+    # Kaç tam yıl geçti hesapla
+    years_passed = check_date.year - hire_date.year
+
+    # Eğer yıldönümü henüz gelmediyse bir yıl azalt
+    anniversary_this_year = hire_date.replace(year=check_date.year)
+    if check_date < anniversary_this_year:
+        years_passed -= 1
+
+    # service_year = kaç yıldönümü geçti (0'dan başlar)
+    return max(0, years_passed)
+
+
+def load_annual_leave_rules() -> Dict[int, int]:
+    """year_of_service -> days_entitled (referans verisi cache'inden)"""
+    return reference_data.snapshot().annual_leave_days
+
+
+def annual_leave_entitlement(service_year: int, rules: Dict[int, int]) -> int:
+    """
+    calculate_annual_leave_days_by_service_year'ın bellekteki karşılığı
+    - service_year = 0 -> 0 gün
+    - Kural yoksa en yüksek yıla ait kural, hiç kural yoksa 14 gün
+    """
+    if service_year <= 0:
+        return 0
+    if service_year in rules:
+        return rules[service_year]
+    if rules:
+        return rules[max(rules)]
+    return DEFAULT_ANNUAL_LEAVE_DAYS
+
+
+def _expected_entitlement(employee: Employee, leave_type: LeaveType, service_year: int, rules: Dict[int, int]) -> int:
+    if leave_type.name == ANNUAL_LEAVE_NAME and employee.hire_date:
+        return annual_leave_entitlement(service_year, rules)
+    return leave_type.max_days or 0
+
+
+def _ledger_totals(db: Session, employee_id: int) -> Dict[Tuple[int, int], dict]:
+    """(leave_type_id, service_year) -> accrued / accrual_count / used - tek gruplu sorgu"""
+    is_accrual = LeaveLedgerEntry.entry_type == LeaveLedgerEntryType.ACCRUAL
+    is_usage = LeaveLedgerEntry.entry_type == LeaveLedgerEntryType.USAGE
+    rows = db.execute(
+        select(
+            LeaveLedgerEntry.leave_type_id,
+            LeaveLedgerEntry.service_year,
+            func.coalesce(func.sum(LeaveLedgerEntry.days).filter(is_accrual), 0).label("accrued"),
+            func.count(LeaveLedgerEntry.id).filter(is_accrual).label("accrual_count"),
+            func.coalesce(func.sum(LeaveLedgerEntry.days).filter(is_usage), 0).label("used"),
+        ).where(
+            LeaveLedgerEntry.employee_id == employee_id
+        ).group_by(LeaveLedgerEntry.leave_type_id, LeaveLedgerEntry.service_year)
+    ).all()
+    return {
+        (row.leave_type_id, row.service_year): {
+            "accrued": row.accrued,
+            "accrual_count": row.accrual_count,
+            "used": row.used,
+        }
+        for row in rows
+    }
+
+
+def _seed_ledger_from_balances(db: Session, employee_id: int) -> List[LeaveLedgerEntry]:
+    """
+    Defterde hiç hareketi olmayan çalışan için mevcut leave_balances satırlarını
+    açılış hareketi olarak deftere yazar (defter öncesi verinin korunması için).
+    """
+    balances = db.query(
+        LeaveBalance.leave_type_id,
+        LeaveBalance.service_year,
+        LeaveBalance.current_year_entitlement,
+        LeaveBalance.used_days
+    ).filter(
+        LeaveBalance.employee_id == employee_id,
+        LeaveBalance.service_year.isnot(None)
+    ).all()
+
+    entries = []
+    for balance in balances:
+        for entry_type, days in (
+            (LeaveLedgerEntryType.ACCRUAL, balance.current_year_entitlement),
+            (LeaveLedgerEntryType.USAGE, balance.used_days),
+        ):
+            if days:
+                entries.append(LeaveLedgerEntry(
+                    employee_id=employee_id,
+                    leave_type_id=balance.leave_type_id,
+                    service_year=balance.service_year,
+                    entry_type=entry_type,
+                    days=days,
+                    note="Açılış bakiyesi"
+                ))
+    db.add_all(entries)
+    return entries
+
+
+def sync_leave_balances(
+    db: Session,
+    employee: Employee,
+    leave_types: Iterable[LeaveType],
+    target_service_year: int,
+    rules: Optional[Dict[int, int]] = None
+) -> Dict[Tuple[int, int], LeaveBalance]:
+    """
+    Çalışanın verilen izin türleri için 0..target_service_year (ve defterde daha
+    ileri yıl varsa o yıla kadar) bakiye zincirini hesaplar ve tek upsert ile yazar.
+
+    - Yıllık İzin hakkı ilk hesaplandığında deftere işlenir, kurallar sonradan
+      değişse de geçmiş yılların hakkı değişmez
+    - Diğer izin türlerinde hak izin türünün max_days değerini izler; fark
+      deftere düzeltme hareketi olarak işlenir
+
+    Returns:
+        (leave_type_id, service_year) -> LeaveBalance
+    """
+    leave_types = list(leave_types)
+    if not leave_types:
+        return {}
+
+    db.execute(select(func.pg_advisory_xact_lock(BALANCE_LOCK_CLASS, employee.id)))
+
+    totals = _ledger_totals(db, employee.id)
+    if not totals:
+        for entry in _seed_ledger_from_balances(db, employee.id):
+            key = (entry.leave_type_id, entry.service_year)
+            bucket = totals.setdefault(key, {"accrued": 0, "accrual_count": 0, "used": 0})
+            if entry.entry_type == LeaveLedgerEntryType.ACCRUAL:
+                bucket["accrued"] += entry.days
+                bucket["accrual_count"] += 1
+            else:
+                bucket["used"] += entry.days
+
+    if rules is None and any(leave_type.name == ANNUAL_LEAVE_NAME for leave_type in leave_types):
+        rules = load_annual_leave_rules()
+
+    last_year = max([target_service_year, *(year for _, year in totals)])
+
+    rows = []
+    accruals = []
+    for leave_type in leave_types:
+        previous_remaining = 0
+        for service_year in range(0, last_year + 1):
+            ledger = totals.get((leave_type.id, service_year), {"accrued": 0, "accrual_count": 0, "used": 0})
+
+            entitlement = ledger["accrued"]
+            if not ledger["accrual_count"] or leave_type.name != ANNUAL_LEAVE_NAME:
+                entitlement = _expected_entitlement(employee, leave_type, service_year, rules or {})
+                if entitlement != ledger["accrued"]:
+                    accruals.append(LeaveLedgerEntry(
+                        employee_id=employee.id,
+                        leave_type_id=leave_type.id,
+                        service_year=service_year,
+                        entry_type=LeaveLedgerEntryType.ACCRUAL,
+                        days=entitlement - ledger["accrued"],
+                        note="Hak ediş"
+                    ))
+
+            carried_over = previous_remaining if service_year > 0 and leave_type.is_cumulative else 0
+            total = carried_over + entitlement
+            remaining = total - ledger["used"]
+            previous_remaining = remaining
+
+            rows.append({
+                "employee_id": employee.id,
+                "leave_type_id": leave_type.id,
+                "service_year": service_year,
+                "carried_over_days": carried_over,
+                "current_year_entitlement": entitlement,
+                "total_days": total,
+                "used_days": ledger["used"],
+                "remaining_days": remaining,
+            })
+
+    db.add_all(accruals)
+
+    statement = insert(LeaveBalance).values(rows)
+    changed = tuple_(*[getattr(LeaveBalance, name) for name in BALANCE_COLUMNS]) != tuple_(
+        *[statement.excluded[name] for name in BALANCE_COLUMNS]
+    )
+    statement = statement.on_conflict_do_update(
+        constraint="_employee_leavetype_serviceyear_uc",
+        set_={
+            **{name: statement.excluded[name] for name in BALANCE_COLUMNS},
+            "updated_at": case((changed, func.now()), else_=LeaveBalance.updated_at),
+        }
+    ).returning(LeaveBalance)
+
+    balances = db.scalars(statement, execution_options={"populate_existing": True}).all()
+    return {(balance.leave_type_id, balance.service_year): balance for balance in balances}
+
+
+def record_leave_usage(
+    db: Session,
+    employee: Employee,
+    leave_type: LeaveType,
+    service_year: int,
+    days: int,
+    leave_request_id: Optional[int] = None,
+    created_by: Optional[int] = None,
+    note: Optional[str] = None
+) -> LeaveBalance:
+    """
+    Kullanım hareketini deftere ekler (iade/iptal için days negatif) ve
+    sonraki yılların devreden günleri dahil zinciri yeniden yazar.
+    """
+    db.execute(select(func.pg_advisory_xact_lock(BALANCE_LOCK_CLASS, employee.id)))
+
+    # Defter boşsa önce mevcut bakiyeler açılış hareketi olarak işlenir
+    has_entries = db.query(
+        select(LeaveLedgerEntry.id).where(LeaveLedgerEntry.employee_id == employee.id).exists()
+    ).scalar()
+    if not has_entries:
+        _seed_ledger_from_balances(db, employee.id)
+
+    db.add(LeaveLedgerEntry(
+        employee_id=employee.id,
+        leave_type_id=leave_type.id,
+        service_year=service_year,
+        entry_type=LeaveLedgerEntryType.USAGE,
+        days=days,
+        leave_request_id=leave_request_id,
+        created_by=created_by,
+        note=note
+    ))
+    db.flush()
+
+    return sync_leave_balances(db, employee, [leave_type], service_year)[(leave_type.id, service_year)]
+
+
+def rebuild_leave_balances(db: Session, employee_ids: Optional[List[int]] = None) -> int:
+    """
+    Bakiyeleri defterden yeniden hesaplar (tüm çalışanlar veya verilen id'ler).
+    Aktif izin türleri ve defterde hareketi olan türler hesaplanır.
+    Çalışan başına commit eder; güncellenen bakiye satırı sayısını döner.
+    """
+    query = db.query(Employee)
+    if employee_ids:
+        query = query.filter(Employee.id.in_(employee_ids))
+    employees = query.order_by(Employee.id).all()
+
+    leave_types = reference_data.snapshot().leave_types
+    rules = load_annual_leave_rules()
+
+    updated = 0
+    for employee in employees:
+        used_type_ids = {
+            type_id for (type_id,) in db.query(LeaveLedgerEntry.leave_type_id).filter(
+                LeaveLedgerEntry.employee_id == employee.id
+            ).distinct()
+        }
+        types = [
+            leave_type for leave_type in leave_types
+            if leave_type.is_active or leave_type.id in used_type_ids
+        ]
+        balances = sync_leave_balances(
+            db, employee, types, calculate_service_year(employee.hire_date), rules
+        )
+        db.commit()
+        updated += len(balances)
+    return updated
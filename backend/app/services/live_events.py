@@ -0,0 +1,259 @@
+"""
+Canlı olaylar (günlük rapor sayfası - GET /daily-visits/events, SSE)
+
+Ziyaret ve izin yazan handler'lar olayı commit'ten önce yayınlar:
+
+    publish_event(db, PHARMACY_VISIT_UPDATED, db_visit.employee_id, data)
+    db.commit()
+
+publish_event olayı pg_notify ile LIVE_EVENTS_CHANNEL'a JSON olarak yazar;
+bildirim sadece commit'te iletilir (rollback olan yazım olay üretmez) ve
+tüm worker'lara ulaşır. Her worker tek bir dinleyici bağlantısıyla olayları
+alır ve bağlı istemcilerden olayı görebilecek olanların kuyruğuna koyar:
+
+    subscription = live_events.subscribe(current_user)
+    event = await subscription.next(timeout)
+
+Görünürlük listeleme endpoint'leriyle aynıdır: ziyaret olaylarını
+manager/admin hepsini, çalışan sadece kendisininkini görür; izin
+olaylarını manager/admin ve view_all_leaves yetkisi olanlar hepsini,
+çalışan kendisininkini görür.
+
+Olaylar saklanmaz. İstemci "ready" olayından sonra listeleri bir kez çeker
+ve sonrasında sadece olayları uygular; bağlantı koparsa ya da kuyruğu
+dolduğu için kapatılırsa yeniden bağlanıp aynı şekilde devam eder. Worker'ın
+dinleyicisi koparsa yeniden bağlanınca istemcilere "resync" gönderilir.
+
+Görünürlük bağlanırken çözülen kullanıcıya göre hesaplanır. Akış her
+heartbeat aralığında ve employees bildirimi geldiğinde kullanıcıyı yeniden
+çözer (viewer_changed); rolü, yetkileri ya da aktifliği değişmişse bağlantı
+kapatılır, istemci yeniden bağlanınca yeni yetkileriyle devam eder.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from enum import Enum
+from typing import Iterable, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.employee import EmployeeRole
+from .reference_data import EMPLOYEES, reference_data
+from ..utils.dependencies import Principal, has_permission, resolve_principal
+
+logger = logging.getLogger(__name__)
+
+LIVE_EVENTS_CHANNEL = "live_events"
+
+DOCTOR_VISIT_CREATED = "doctor_visit.created"
+DOCTOR_VISIT_UPDATED = "doctor_visit.updated"
+DOCTOR_VISIT_DELETED = "doctor_visit.deleted"
+PHARMACY_VISIT_CREATED = "pharmacy_visit.created"
+PHARMACY_VISIT_UPDATED = "pharmacy_visit.updated"
+PHARMACY_VISIT_DELETED = "pharmacy_visit.deleted"
+PHARMACY_VISIT_APPROVAL = "pharmacy_visit.approval"
+LEAVE_REQUEST_APPROVED = "leave_request.approved"
+LEAVE_REQUEST_REJECTED = "leave_request.rejected"
+LEAVE_REQUEST_CANCELLED = "leave_request.cancelled"
+LEAVE_REQUEST_DATES_CHANGED = "leave_request.dates_changed"
+# Dinleyici yeniden bağlandı: aradaki olaylar kaçmış olabilir, istemci listeleri yeniden çeker
+RESYNC = "resync"
+
+# pg_notify payload sınırı 8000 byte; aşan olay sadece kimlik alanlarıyla gönderilir
+MAX_PAYLOAD_BYTES = 7900
+IDENTITY_FIELDS = ("id", "employee_id", "visit_date", "start_date", "end_date")
+
+
+def _json_default(value):
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _payload(event_type: str, employee_id: int, data: dict) -> str:
+    event = {"type": event_type, "employee_id": employee_id, "data": data}
+    payload = json.dumps(event, default=_json_default, ensure_ascii=False)
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        # İstemci bu kaydı kendisi yeniden çeker
+        event["data"] = {name: data[name] for name in IDENTITY_FIELDS if name in data}
+        event["data"]["partial"] = True
+        payload = json.dumps(event, default=_json_default, ensure_ascii=False)
+    return payload
+
+
+def publish_events(db: Session, events: Iterable[Tuple[str, int, dict]]):
+    """
+    (olay türü, çalışan id, veri) olaylarını tek sorguda diğer worker'lara (ve bu
+    worker'ın istemcilerine) bildirir. Commit etmez; bildirimler değişikliği
+    yapan transaction commit edilince iletilir.
+    """
+    if not settings.LIVE_EVENTS_LISTEN:
+        return
+    payloads = [_payload(*event) for event in events]
+    if payloads:
+        db.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": LIVE_EVENTS_CHANNEL, "payloads": payloads}
+        )
+
+
+def publish_event(db: Session, event_type: str, employee_id: int, data: dict):
+    publish_events(db, [(event_type, employee_id, data)])
+
+
+def can_see(viewer: Principal, event: dict) -> bool:
+    """Olay, izleyenin listeleme endpoint'lerinde göreceği bir kayda mı ait"""
+    if event.get("employee_id") == viewer.id:
+        return True
+    if event["type"].startswith("leave_request."):
+        return viewer.role in (EmployeeRole.ADMIN, EmployeeRole.MANAGER) or has_permission(viewer, "view_all_leaves")
+    return viewer.role in (EmployeeRole.ADMIN, EmployeeRole.MANAGER)
+
+
+def viewer_changed(viewer: Principal) -> bool:
+    """
+    Bağlanırken çözülen kullanıcının görünürlüğü değişti mi (rol, yetki, aktiflik)
+    Senkron: cache'te yoksa veritabanına gider, threadpool'da çağrılmalı.
+    """
+    current = resolve_principal(viewer.email)
+    if current is None:
+        return True
+    return (current.id, current.role, current.permissions, current.is_active) != (
+        viewer.id, viewer.role, viewer.permissions, viewer.is_active
+    )
+
+
+class Subscription:
+    """Tek SSE bağlantısının olay kuyruğu (bağlantının event loop'unda okunur)"""
+
+    def __init__(self, viewer: Principal, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.viewer = viewer
+        self.overflowed = False
+        # employees bildirimi geldi: kullanıcı bir sonraki olaydan önce yeniden çözülür
+        self.viewer_stale = False
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def deliver(self, event: dict):
+        """Dinleyici thread'inden çağrılır"""
+        self._loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: dict):
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Yavaş istemci: bağlantı kapatılır, yeniden bağlanıp listeyi tazeler
+            self.overflowed = True
+
+    async def next(self, timeout: float) -> Optional[dict]:
+        """Sıradaki olay; timeout içinde olay gelmezse None"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LiveEventHub:
+    """Worker başına dinleyici thread ve bağlı istemciler"""
+
+    def __init__(self, queue_size: int = settings.LIVE_EVENTS_QUEUE_SIZE):
+        self._queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscriptions: Set[Subscription] = set()
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        self.listening = False
+
+    def subscribe(self, viewer: Principal) -> Subscription:
+        """Çalışan event loop içinden çağrılmalı"""
+        subscription = Subscription(viewer, asyncio.get_running_loop(), self._queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def mark_viewers_stale(self):
+        """employees bildirimi (reference_data dinleyicisinin thread'inden)"""
+        with self._lock:
+            for subscription in self._subscriptions:
+                subscription.viewer_stale = True
+
+    def dispatch(self, payload: str):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Geçersiz canlı olay bildirimi: %r", payload[:200])
+            return
+        self._deliver(event)
+
+    def _deliver(self, event: dict, visible_to_all: bool = False):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if not visible_to_all and not can_see(subscription.viewer, event):
+                continue
+            try:
+                subscription.deliver(event)
+            except RuntimeError:
+                # Event loop kapanmış (worker kapanıyor)
+                self.unsubscribe(subscription)
+
+    def start_listener(self):
+        """LISTEN/NOTIFY dinleyicisini başlat (Postgres dışında ya da kapalıysa olay iletilmez)"""
+        if not settings.LIVE_EVENTS_LISTEN or not settings.DATABASE_URL.startswith("postgresql"):
+            return
+        if self._listener and self._listener.is_alive():
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, name="live-events-listener", daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._listener:
+            self._listener.join(timeout=5)
+
+    def _listen(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(settings.DATABASE_URL)
+                connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {LIVE_EVENTS_CHANNEL}")
+                self.listening = True
+                # Bağlantı yokken kaçan olaylar için
+                self._deliver({"type": RESYNC, "employee_id": None, "data": {}}, visible_to_all=True)
+
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self.dispatch(connection.notifies.pop(0).payload)
+            except Exception:
+                logger.warning("Canlı olay dinleyicisi koptu, yeniden bağlanılacak", exc_info=True)
+                self._stop.wait(5)
+            finally:
+                self.listening = False
+                if connection is not None:
+                    connection.close()
+
+
+live_events = LiveEventHub()
+# Rol/yetki/aktiflik değişikliği açık akışlara da yansısın (bump_table_version(db, EMPLOYEES))
+reference_data.subscribe(EMPLOYEES, live_events.mark_viewers_stale)
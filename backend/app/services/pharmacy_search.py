@@ -0,0 +1,280 @@
+"""
+Eczane arama (autocomplete)
+
+Arama pharmacies.search_key üzerinde yapılır: ad + semt, Türkçe büyük/küçük
+harf ve aksanlar katlanmış, noktalama boşluğa çevrilmiş hali
+
+    "ŞİFA Eczanesi", "Kadıköy"  ->  "sifa eczanesi kadikoy"
+
+Aranan terim de aynı şekilde katlanır. Sıralama:
+    1. anahtar terimle başlıyor
+    2. anahtardaki bir kelime terimle başlıyor
+    3. trigram benzerliği (yazım hatalarına tolerans)
+İlk iki grup kendi içinde ada göre sıralanır. Sonuç sayısı her zaman sınırlıdır.
+
+PHARMACY_SEARCH_IN_MEMORY açıksa her worker ön ekleri bellekte tutar
+(PharmacyPrefixIndex); ön ek eşleşmeleri limiti doldurmuyorsa (ve terim
+trigram aramasına yetecek uzunluktaysa) veritabanı aramasına düşülür, böylece
+iki mod aynı sonucu verir.
+Eczane eklenip güncellendiğinde bump_table_version ile diğer worker'lara
+bildirilir ve indeks bir sonraki aramada yeniden yüklenir.
+"""
+import asyncio
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.employee import Employee
+from ..models.pharmacy import Pharmacy
+from ..models.table_version import TableVersion
+from .reference_data import bump_table_version, reference_data
+
+PHARMACIES = "pharmacies"
+
+# Trigram indeksi 3 karakterden kısa terimlerde işe yaramaz; kısa terimler sadece ön ekle aranır
+MIN_TRIGRAM_TERM_LENGTH = 3
+
+_TURKISH_FOLD = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i",
+    "Ş": "s", "ş": "s",
+    "Ğ": "g", "ğ": "g",
+    "Ü": "u", "ü": "u",
+    "Ö": "o", "ö": "o",
+    "Ç": "c", "ç": "c",
+})
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def fold_search_text(value: Optional[str]) -> str:
+    """Türkçe harfleri ve aksanları katla, küçük harfe çevir, noktalamayı boşluk yap"""
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKD", value.translate(_TURKISH_FOLD))
+    value = "".join(char for char in value if not unicodedata.combining(char)).lower()
+    return _NON_ALNUM.sub(" ", value).strip()
+
+
+def pharmacy_search_key(name: Optional[str], district: Optional[str]) -> str:
+    return " ".join(part for part in (fold_search_text(name), fold_search_text(district)) if part)
+
+
+@dataclass(frozen=True)
+class PharmacySuggestion:
+    id: int
+    name: str
+    city: Optional[str]
+    district: Optional[str]
+    street: Optional[str]
+    employee_name: Optional[str]
+    is_approved: bool
+    search_key: str
+
+    def as_dict(self) -> dict:
+        address_parts = [part for part in (self.district, self.street, self.city) if part]
+        return {
+            "id": self.id,
+            "name": self.name,
+            "city": self.city,
+            "district": self.district,
+            "street": self.street,
+            "address_display": " / ".join(address_parts) if address_parts else "Adres bilgisi yok",
+            "employee_name": self.employee_name,
+            "is_approved": self.is_approved,
+        }
+
+
+def _suggestion_columns():
+    return (
+        Pharmacy.id,
+        Pharmacy.name,
+        Pharmacy.city,
+        Pharmacy.district,
+        Pharmacy.street,
+        Employee.full_name.label("employee_name"),
+        Pharmacy.is_approved,
+        Pharmacy.search_key,
+    )
+
+
+def _suggestion(row) -> PharmacySuggestion:
+    return PharmacySuggestion(
+        id=row.id,
+        name=row.name,
+        city=row.city,
+        district=row.district,
+        street=row.street,
+        employee_name=row.employee_name,
+        is_approved=row.is_approved,
+        search_key=row.search_key or pharmacy_search_key(row.name, row.district),
+    )
+
+
+def search_statement(term: str, limit: int):
+    """
+    Katlanmış terim için sıralı ve sınırlı arama sorgusu
+    (term fold_search_text'ten geçmiş olmalı - LIKE joker karakteri içermez)
+    """
+    key = Pharmacy.search_key
+    prefix = key.like(f"{term}%")
+    word_prefix = key.like(f"% {term}%")
+
+    # Bellekteki indeksle aynı gruplar: terimle başlayan, kelimesi terimle başlayan, geri kalanlar
+    ordering = [case((prefix, 0), (word_prefix, 1), else_=2)]
+    if len(term) < MIN_TRIGRAM_TERM_LENGTH:
+        condition = or_(prefix, word_prefix)
+    else:
+        # "%" operatörü: pg_trgm benzerlik eşiğini (pg_trgm.similarity_threshold) geçenler
+        condition = or_(key.like(f"%{term}%"), key.op("%")(term))
+        # Ön ek grupları ada göre kalsın diye benzerlik sadece geri kalanları sıralar
+        ordering.append(case((or_(prefix, word_prefix), 0.0), else_=func.similarity(key, term)).desc())
+
+    return select(*_suggestion_columns()).outerjoin(
+        Employee, Pharmacy.employee_id == Employee.id
+    ).where(condition).order_by(*ordering, Pharmacy.name, Pharmacy.id).limit(limit)
+
+
+class PharmacyPrefixIndex:
+    """
+    Worker başına bellekte ön ek indeksi
+    (kelime, eczane id) çiftleri sıralı listede tutulur; ön ek araması bisect ile yapılır.
+    Değişiklik bildirimi gelince ya da sürüm tablosu değişince tamamı yeniden yüklenir;
+    aynı anda tek istek yükler, diğerleri yükleme bitene kadar eski kopyayı kullanır.
+    """
+
+    def __init__(self, poll_interval: int = settings.REFERENCE_CACHE_POLL_INTERVAL):
+        self._poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._reload_lock = asyncio.Lock()
+        self._entries: Dict[int, PharmacySuggestion] = {}
+        self._tokens: List[Tuple[str, int]] = []
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._stale = True
+
+    def invalidate(self):
+        self._stale = True
+
+    def _is_fresh(self) -> bool:
+        return not self._stale and time.monotonic() - self._checked_at < self._poll_interval
+
+    async def ensure_fresh(self, db: AsyncSession):
+        if self._is_fresh():
+            return
+        if self._reload_lock.locked() and self._version is not None:
+            # Başka bir istek yeniliyor; eldeki kopya kullanılır
+            return
+
+        async with self._reload_lock:
+            if self._is_fresh():
+                # Beklerken başka bir istek yeniledi
+                return
+
+            # Yükleme sırasında gelen bildirim kaybolmasın: bayrak yüklemeden önce indirilir
+            stale, self._stale = self._stale, False
+            try:
+                version = (await db.execute(
+                    select(TableVersion.version).where(TableVersion.table_name == PHARMACIES)
+                )).scalar() or 0
+                if stale or version != self._version:
+                    rows = (await db.execute(
+                        select(*_suggestion_columns()).outerjoin(Employee, Pharmacy.employee_id == Employee.id)
+                    )).all()
+                    self._load([_suggestion(row) for row in rows], version)
+            except BaseException:
+                self._stale = self._stale or stale
+                raise
+            self._checked_at = time.monotonic()
+
+    def _load(self, suggestions: List[PharmacySuggestion], version: int):
+        entries = {suggestion.id: suggestion for suggestion in suggestions}
+        tokens = sorted(
+            (token, suggestion.id)
+            for suggestion in suggestions
+            for token in set(suggestion.search_key.split())
+        )
+        with self._lock:
+            self._entries, self._tokens = entries, tokens
+            self._version = version
+
+    def search(self, term: str, limit: int) -> List[PharmacySuggestion]:
+        entries, tokens = self._entries, self._tokens
+        first_word = term.split(" ", 1)[0]
+
+        ranked = []
+        seen = set()
+        position = bisect_left(tokens, (first_word,))
+        while position < len(tokens) and tokens[position][0].startswith(first_word):
+            pharmacy_id = tokens[position][1]
+            position += 1
+            if pharmacy_id in seen:
+                continue
+            seen.add(pharmacy_id)
+            suggestion = entries[pharmacy_id]
+            if suggestion.search_key.startswith(term):
+                ranked.append((0, suggestion.name, pharmacy_id))
+            elif f" {term}" in f" {suggestion.search_key}":
+                ranked.append((1, suggestion.name, pharmacy_id))
+
+        ranked.sort()
+        return [entries[pharmacy_id] for _, _, pharmacy_id in ranked[:limit]]
+
+
+prefix_index = PharmacyPrefixIndex()
+reference_data.subscribe(PHARMACIES, prefix_index.invalidate)
+
+
+async def search_pharmacies(db: AsyncSession, query: str, limit: int) -> List[PharmacySuggestion]:
+    term = fold_search_text(query)
+    if not term:
+        return []
+
+    if settings.PHARMACY_SEARCH_IN_MEMORY:
+        await prefix_index.ensure_fresh(db)
+        suggestions = prefix_index.search(term, limit)
+        # Kısa terimlerde veritabanı da sadece ön ekle arar; uzun terimlerde eksik kalan
+        # yerler alt dize / trigram eşleşmeleriyle dolar
+        if len(suggestions) >= limit or len(term) < MIN_TRIGRAM_TERM_LENGTH:
+            return suggestions
+
+    rows = (await db.execute(search_statement(term, limit))).all()
+    return [_suggestion(row) for row in rows]
+
+
+def backfill_search_keys(db: Session, batch_size: int = 1000) -> int:
+    """
+    Boş ya da eski (katlama kuralı değişmiş) anahtarları yeniden yazar.
+    Commit eder; güncellenen satır sayısını döner.
+    """
+
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Pharmacy.id, Pharmacy.name, Pharmacy.district, Pharmacy.search_key)
+            .where(Pharmacy.id > last_id)
+            .order_by(Pharmacy.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            key = pharmacy_search_key(row.name, row.district)
+            if key != row.search_key:
+                db.execute(update(Pharmacy).where(Pharmacy.id == row.id).values(search_key=key))
+                updated += 1
+        last_id = rows[-1].id
+        db.commit()
+
+    if updated:
+        bump_table_version(db, PHARMACIES)
+        db.commit()
+    return updated
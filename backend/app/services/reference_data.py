@@ -0,0 +1,328 @@
+"""
+Referans verisi cache'i (izin türleri, yıllık izin kuralları, ziyaret renk skalası)
+
+Bu tablolar nadiren değişir ama sürekli okunur. Her worker tabloların
+değiştirilemez bir kopyasını (ReferenceSnapshot) bellekte tutar:
+
+    snapshot = reference_data.snapshot()
+    snapshot.annual_leave_days       # {year_of_service: days_entitled}
+    snapshot.leave_type(leave_type_id)
+
+Tabloları değiştiren handler'lar commit'ten önce sürümü artırır:
+
+    bump_table_version(db, LEAVE_TYPES)
+    db.commit()
+    reference_data.invalidate()
+
+bump_table_version sayacı artırır ve pg_notify gönderir (bildirim commit'te
+iletilir). Her worker'daki dinleyici thread bildirimi alınca cache'i
+yeniler; bildirim kaçarsa (bağlantı kopması, PgBouncer) sürüm tablosu en
+geç REFERENCE_CACHE_POLL_INTERVAL saniyede bir kontrol edilir.
+
+Snapshot, içeriği cache'lenmeyen bazı tabloların (employees) sadece sürüm
+bilgisini de taşır; ETag'ler (utils/http_cache.py) bu sürümlerden üretilir.
+"""
+import dataclasses
+import logging
+import select
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.annual_leave_rule import AnnualLeaveRule
+from ..models.leave_type import GenderRestriction, LeaveType
+from ..models.settings import VisitColorScale
+from ..models.table_version import TableVersion
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_CHANNEL = "reference_data"
+
+LEAVE_TYPES = "leave_types"
+ANNUAL_LEAVE_RULES = "annual_leave_rules"
+VISIT_COLOR_SCALES = "visit_color_scale"
+REFERENCE_TABLES = (LEAVE_TYPES, ANNUAL_LEAVE_RULES, VISIT_COLOR_SCALES)
+EMPLOYEES = "employees"
+# Sürümü snapshot'ta tutulan tablolar (içerikleri sadece REFERENCE_TABLES için yüklenir)
+VERSIONED_TABLES = REFERENCE_TABLES + (EMPLOYEES,)
+
+DEFAULT_VISIT_COLOR_SCALES = (
+    ("yellow", 0, 14),
+    ("orange", 15, 19),
+    ("green", 20, None),
+)
+
+
+@dataclass(frozen=True)
+class LeaveTypeEntry:
+    id: int
+    name: str
+    max_days: int
+    is_paid: bool
+    is_active: bool
+    is_cumulative: bool
+    gender_restriction: GenderRestriction
+    description: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+
+@dataclass(frozen=True)
+class AnnualLeaveRuleEntry:
+    id: int
+    year_of_service: int
+    days_entitled: int
+
+
+@dataclass(frozen=True)
+class VisitColorScaleEntry:
+    id: int
+    color: str
+    min_visits: int
+    max_visits: Optional[int]
+    created_at: datetime
+    updated_at: datetime
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    versions: Dict[str, int]
+    modified_at: Dict[str, datetime] = field(default_factory=dict)  # sürümün son artış zamanı
+    leave_types: Tuple[LeaveTypeEntry, ...] = ()  # ada göre sıralı
+    annual_leave_rules: Tuple[AnnualLeaveRuleEntry, ...] = ()  # year_of_service'e göre sıralı
+    visit_color_scales: Tuple[VisitColorScaleEntry, ...] = ()  # min_visits'e göre sıralı
+
+    @property
+    def annual_leave_days(self) -> Dict[int, int]:
+        return {rule.year_of_service: rule.days_entitled for rule in self.annual_leave_rules}
+
+    def leave_type(self, leave_type_id: int) -> Optional[LeaveTypeEntry]:
+        for leave_type in self.leave_types:
+            if leave_type.id == leave_type_id:
+                return leave_type
+        return None
+
+
+def _load_leave_types(db: Session) -> Tuple[LeaveTypeEntry, ...]:
+    return tuple(
+        LeaveTypeEntry(
+            id=row.id,
+            name=row.name,
+            max_days=row.max_days,
+            is_paid=row.is_paid,
+            is_active=row.is_active,
+            is_cumulative=row.is_cumulative,
+            gender_restriction=row.gender_restriction,
+            description=row.description,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
+        for row in db.query(LeaveType).order_by(LeaveType.name)
+    )
+
+
+def _load_annual_leave_rules(db: Session) -> Tuple[AnnualLeaveRuleEntry, ...]:
+    return tuple(
+        AnnualLeaveRuleEntry(id=row.id, year_of_service=row.year_of_service, days_entitled=row.days_entitled)
+        for row in db.query(AnnualLeaveRule).order_by(AnnualLeaveRule.year_of_service)
+    )
+
+
+def _load_visit_color_scales(db: Session) -> Tuple[VisitColorScaleEntry, ...]:
+    return tuple(
+        VisitColorScaleEntry(
+            id=row.id,
+            color=row.color,
+            min_visits=row.min_visits,
+            max_visits=row.max_visits,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
+        for row in db.query(VisitColorScale).order_by(VisitColorScale.min_visits)
+    )
+
+
+# tablo -> (snapshot alanı, yükleyici)
+_LOADERS: Dict[str, Tuple[str, Callable[[Session], tuple]]] = {
+    LEAVE_TYPES: ("leave_types", _load_leave_types),
+    ANNUAL_LEAVE_RULES: ("annual_leave_rules", _load_annual_leave_rules),
+    VISIT_COLOR_SCALES: ("visit_color_scales", _load_visit_color_scales),
+}
+
+
+def _bump_statements(table_name: str) -> tuple:
+    statement = insert(TableVersion).values(table_name=table_name, version=1)
+    statement = statement.on_conflict_do_update(
+        index_elements=[TableVersion.table_name],
+        set_={"version": TableVersion.version + 1, "updated_at": func.now()}
+    )
+    return statement, sql_select(func.pg_notify(REFERENCE_CHANNEL, table_name))
+
+
+def bump_table_version(db: Session, table_name: str):
+    """
+    Tablonun sürüm sayacını artırır ve diğer worker'lara bildirim gönderir.
+    Commit etmez; değişikliği yapan transaction'a dahil olur, bildirim de
+    ancak commit'te iletilir.
+    """
+    for statement in _bump_statements(table_name):
+        db.execute(statement)
+
+
+async def bump_table_version_async(db: AsyncSession, table_name: str):
+    """bump_table_version'ın async session karşılığı"""
+    for statement in _bump_statements(table_name):
+        await db.execute(statement)
+
+
+def seed_default_visit_color_scales(db: Session):
+    """
+    Renk skalası hiç tanımlanmamışsa varsayılanları yazar (uygulama açılışında).
+    Aynı anda açılan worker'lar çakışmasın diye ON CONFLICT DO NOTHING kullanılır.
+    """
+    if db.query(VisitColorScale.id).first():
+        return
+    statement = insert(VisitColorScale).values([
+        {"color": color, "min_visits": min_visits, "max_visits": max_visits}
+        for color, min_visits, max_visits in DEFAULT_VISIT_COLOR_SCALES
+    ]).on_conflict_do_nothing(index_elements=[VisitColorScale.color])
+    if db.execute(statement).rowcount:
+        bump_table_version(db, VISIT_COLOR_SCALES)
+    db.commit()
+
+
+class ReferenceDataCache:
+    """
+    Worker başına referans verisi kopyası
+    Yenileme sırasında okuyanlar eski kopyayı görmeye devam eder; yeni kopya
+    hazır olunca tek atamayla değiştirilir.
+    """
+
+    def __init__(self, session_factory=SessionLocal, poll_interval: int = settings.REFERENCE_CACHE_POLL_INTERVAL):
+        self._session_factory = session_factory
+        self._poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._checked_at = 0.0
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        self._subscribers: Dict[str, List[Callable[[], None]]] = {}
+        self.listening = False
+
+    def subscribe(self, table_name: str, callback: Callable[[], None]):
+        """
+        Referans tabloları dışındaki tablolar için de (ör. eczane arama indeksi)
+        bump_table_version bildirimi geldiğinde callback çağrılır
+        """
+        self._subscribers.setdefault(table_name, []).append(callback)
+
+    def snapshot(self) -> ReferenceSnapshot:
+        if self._snapshot is None or time.monotonic() - self._checked_at >= self._poll_interval:
+            self.refresh()
+        return self._snapshot
+
+    def invalidate(self):
+        """Bir sonraki snapshot() çağrısında sürümler kontrol edilsin"""
+        self._checked_at = 0.0
+
+    def refresh(self, force: bool = False):
+        """
+        Sürüm tablosunu okur, sürümü değişen tabloları yeniden yükler.
+        Veritabanına ulaşılamazsa eldeki kopya kullanılmaya devam eder.
+        """
+        with self._lock:
+            if not force and self._snapshot is not None and time.monotonic() - self._checked_at < self._poll_interval:
+                # Beklerken başka bir thread yeniledi
+                return
+
+            db = self._session_factory()
+            try:
+                rows = db.query(TableVersion.table_name, TableVersion.version, TableVersion.updated_at).filter(
+                    TableVersion.table_name.in_(VERSIONED_TABLES)
+                ).all()
+                versions = {table: 0 for table in VERSIONED_TABLES}
+                versions.update({row.table_name: row.version for row in rows})
+                modified_at = {row.table_name: row.updated_at for row in rows}
+
+                current = self._snapshot
+                changes = {}
+                for table, (snapshot_field, loader) in _LOADERS.items():
+                    if force or current is None or current.versions.get(table) != versions[table]:
+                        changes[snapshot_field] = loader(db)
+
+                if current is None:
+                    self._snapshot = ReferenceSnapshot(versions=versions, modified_at=modified_at, **changes)
+                elif changes or current.versions != versions:
+                    self._snapshot = dataclasses.replace(current, versions=versions, modified_at=modified_at, **changes)
+            except Exception:
+                if self._snapshot is None:
+                    raise
+                logger.exception("Referans verisi yenilenemedi, önceki kopya kullanılıyor")
+            finally:
+                db.close()
+
+            self._checked_at = time.monotonic()
+
+    def start_listener(self):
+        """LISTEN/NOTIFY dinleyicisini başlat (Postgres dışında ya da kapalıysa sadece polling)"""
+        if not settings.REFERENCE_CACHE_LISTEN or not settings.DATABASE_URL.startswith("postgresql"):
+            return
+        if self._listener and self._listener.is_alive():
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, name="reference-data-listener", daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._listener:
+            self._listener.join(timeout=5)
+
+    def _listen(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(settings.DATABASE_URL)
+                connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {REFERENCE_CHANNEL}")
+                self.listening = True
+                # Bağlantı yokken kaçan bildirimler için
+                self.invalidate()
+                for callbacks in self._subscribers.values():
+                    for callback in callbacks:
+                        callback()
+
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        if notify.payload in VERSIONED_TABLES:
+                            self.invalidate()
+                        for callback in self._subscribers.get(notify.payload, ()):
+                            callback()
+            except Exception:
+                logger.warning("Referans verisi dinleyicisi koptu, yeniden bağlanılacak", exc_info=True)
+                self._stop.wait(5)
+            finally:
+                self.listening = False
+                if connection is not None:
+                    connection.close()
+
+
+reference_data = ReferenceDataCache()
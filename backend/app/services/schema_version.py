@@ -0,0 +1,121 @@
+"""
+Şema sürümü (Alembic migration'ları)
+
+Şema değişiklikleri migrations/versions altındaki revizyonlarla yapılır:
+
+    python scripts/migrate.py upgrade              # bekleyen revizyonları uygula
+    python scripts/migrate.py downgrade 0005       # belirtilen revizyona geri dön
+    python scripts/migrate.py current              # veritabanı / kod sürümü
+    python scripts/migrate.py revision -m "..."    # model değişikliğinden yeni revizyon
+
+Uygulama açılışta create_all çalıştırmaz; sadece alembic_version tablosunu
+okuyup kodun beklediği revizyonla karşılaştırır (check_schema_version).
+Böylece çok sayıda worker aynı anda açılabilir ve açılış tek sorgu sürer.
+
+Migration'lardan önce create_all ile kurulmuş veritabanlarında
+alembic_version tablosu yoktur; upgrade() bu durumda baseline revizyonunu
+çalıştırmadan işaretler (stamp), sonraki revizyonlar mevcut tablo/indeksleri
+atlayacak şekilde yazılmıştır.
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Tuple
+
+from alembic import command
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+ALEMBIC_INI = BACKEND_DIR / "alembic.ini"
+
+BASELINE_REVISION = "0001"
+# Bu tablo varsa ama alembic_version yoksa veritabanı create_all ile kurulmuştur
+BASELINE_TABLE = "employees"
+
+# Aynı anda birden fazla upgrade (deploy job'ı, DB_MIGRATE_ON_STARTUP açık worker'lar) çalışmasın
+MIGRATION_LOCK_ID = 7302
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def alembic_config(connection: Connection = None) -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+        # Uygulamanın logging ayarlarını ezme
+        config.attributes["configure_logger"] = False
+    return config
+
+
+@lru_cache(maxsize=1)
+def head_revisions() -> Tuple[str, ...]:
+    """Kodun beklediği revizyon(lar)"""
+    return tuple(sorted(ScriptDirectory.from_config(alembic_config()).get_heads()))
+
+
+def current_revisions(connection: Connection) -> Tuple[str, ...]:
+    """Veritabanının bulunduğu revizyon(lar); alembic_version yoksa boş"""
+    return tuple(sorted(MigrationContext.configure(connection).get_current_heads()))
+
+
+def check_schema_version(engine: Engine) -> Tuple[str, ...]:
+    """
+    Veritabanı kodun beklediği revizyonda değilse SchemaVersionError.
+    Tek bir SELECT (alembic_version) çalıştırır.
+    """
+    with engine.connect() as connection:
+        current = current_revisions(connection)
+
+    heads = head_revisions()
+    if current != heads:
+        raise SchemaVersionError(
+            f"Veritabanı şeması güncel değil (veritabanı: {', '.join(current) or 'yok'}, "
+            f"beklenen: {', '.join(heads)}). 'python scripts/migrate.py upgrade' çalıştırın."
+        )
+    return current
+
+
+def _run_locked(engine: Engine, action: Callable[[Connection, Config], None]):
+    with engine.connect() as connection:
+        # Oturum seviyesinde kilit: revizyonların kendi commit'lerinden etkilenmez
+        connection.execute(text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+        connection.commit()
+        try:
+            action(connection, alembic_config(connection))
+            connection.commit()
+        finally:
+            connection.rollback()
+            connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+            connection.commit()
+
+
+def upgrade(engine: Engine, revision: str = "head", log: Callable[[str], None] = print):
+    """Bekleyen revizyonları uygular (create_all ile kurulmuş veritabanlarını önce baseline'a işaretler)"""
+    def _upgrade(connection: Connection, config: Config):
+        created_without_migrations = (
+            not current_revisions(connection) and inspect(connection).has_table(BASELINE_TABLE)
+        )
+        # Revizyonlar kendi transaction'larını açar (CONCURRENTLY için autocommit_block gerekir)
+        connection.commit()
+
+        if created_without_migrations:
+            log(f"Mevcut şema baseline ({BASELINE_REVISION}) olarak işaretleniyor")
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
+
+    _run_locked(engine, _upgrade)
+
+
+def downgrade(engine: Engine, revision: str):
+    _run_locked(engine, lambda connection, config: command.downgrade(config, revision))
+
+
+def stamp(engine: Engine, revision: str):
+    """Revizyonu çalıştırmadan işaretle (şema elle uygulanmışsa)"""
+    _run_locked(engine, lambda connection, config: command.stamp(config, revision))
@@ -0,0 +1,176 @@
+"""
+Özet istatistikler (dashboard ve eczane istatistik endpoint'leri)
+
+Endpoint'ler aynı dönem çözümlemesini ve aynı sorguyu kullanır:
+
+    spec = StatsSpec.for_request(current_user, employee_id, period, start_date, end_date)
+    row = db.execute(stats_query(spec, "activity", "sales")).one()
+    row.pharmacy_visit_count, row.sold_quantity
+
+Her metrik grubu kendi kaynağında tek geçişte toplanır (koşullu metrikler
+FILTER ile), gruplar tek satırlık alt sorgular olarak tek SELECT'te
+birleşir - istenen grup sayısından bağımsız olarak tek round-trip.
+Sync ve async session'larla kullanılabilir.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select, true
+
+from ..models.daily_activity import DailyActivityRollup
+from ..models.employee import Employee, EmployeeRole
+from ..models.goal import Goal
+from ..models.pharmacy import Pharmacy
+from ..models.sale import Sale
+from .activity_rollup import ROLLUP_COUNTERS
+
+# Query(regex=...) ile endpoint parametrelerini doğrulamak için
+PERIOD_PATTERN = "^(day|week|last-week|month|year)$"
+
+
+def period_range(period: str, today: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Dönemin tarih aralığı
+    - day: bugün
+    - week / month / year: son 7 / 30 / 365 gün
+    - last-week: geçen hafta (Pazar - Cumartesi)
+    """
+    today = today or date.today()
+    if period == "day":
+        return today, today
+    if period == "week":
+        return today - timedelta(days=7), today
+    if period == "last-week":
+        # weekday: Pazartesi=0 ... Pazar=6 - bu haftanın Pazar'ından bir hafta geri
+        last_sunday = today - timedelta(days=(today.weekday() + 1) % 7)
+        return last_sunday - timedelta(days=7), last_sunday - timedelta(days=1)
+    if period == "month":
+        return today - timedelta(days=30), today
+    if period == "year":
+        return today - timedelta(days=365), today
+    raise ValueError(f"Invalid period: {period}")
+
+
+def resolve_date_range(
+    period: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    default_period: Optional[str] = None
+) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Açıkça verilen tarihler önceliklidir; eksik olan uç period'dan
+    (period yoksa default_period'dan) tamamlanır. İkisi de yoksa aralık açık kalır.
+    """
+    period = period or default_period
+    if (start_date and end_date) or not period:
+        return start_date, end_date
+    period_start, period_end = period_range(period)
+    return start_date or period_start, end_date or period_end
+
+
+def scoped_employee_id(current_user: Employee, employee_id: Optional[int]) -> Optional[int]:
+    """EMPLOYEE sadece kendi verisini görür; yönetici seçtiği çalışanı (None: herkes)"""
+    if current_user.role not in (EmployeeRole.ADMIN, EmployeeRole.MANAGER):
+        return current_user.id
+    return employee_id
+
+
+@dataclass(frozen=True)
+class StatsSpec:
+    """İstatistiğin kapsamı: çalışan (None: herkes) ve tarih aralığı (uçlar dahil)"""
+    employee_id: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    @classmethod
+    def for_request(
+        cls,
+        current_user: Employee,
+        employee_id: Optional[int],
+        period: Optional[str],
+        start_date: Optional[date],
+        end_date: Optional[date],
+        default_period: Optional[str] = None
+    ) -> "StatsSpec":
+        start_date, end_date = resolve_date_range(period, start_date, end_date, default_period)
+        return cls(scoped_employee_id(current_user, employee_id), start_date, end_date)
+
+    def filters(self, date_column, employee_column=None) -> list:
+        conditions = []
+        if self.start_date:
+            conditions.append(date_column >= self.start_date)
+        if self.end_date:
+            conditions.append(date_column <= self.end_date)
+        if self.employee_id and employee_column is not None:
+            conditions.append(employee_column == self.employee_id)
+        return conditions
+
+
+def _activity(spec: StatsSpec):
+    """Ziyaret, ürün ve MF toplamları (günlük özet tablosundan)"""
+    return select(*[
+        func.coalesce(func.sum(getattr(DailyActivityRollup, name)), 0).label(name)
+        for name in ROLLUP_COUNTERS
+    ]).where(*spec.filters(DailyActivityRollup.activity_date, DailyActivityRollup.employee_id))
+
+
+def _sales(spec: StatsSpec):
+    """Satış adedi, satılan ürün miktarı ve ciro"""
+    return select(
+        func.count(Sale.id).label("sale_count"),
+        func.coalesce(func.sum(Sale.quantity), 0).label("sold_quantity"),
+        func.coalesce(func.sum(Sale.total_amount), 0).label("sales_revenue"),
+    ).where(*spec.filters(Sale.sale_date, Sale.employee_id))
+
+
+def _pharmacies(spec: StatsSpec):
+    """Eczane sayıları (dönemden bağımsız)"""
+    return select(
+        func.count(Pharmacy.id).label("pharmacy_count"),
+        func.count(Pharmacy.id).filter(Pharmacy.is_approved.is_(True)).label("approved_pharmacy_count"),
+    )
+
+
+def _goal(spec: StatsSpec):
+    """Dönemle çakışan ilk hedef (hedef yoksa satır dönmez)"""
+    conditions = []
+    if spec.start_date:
+        conditions.append(Goal.end_date >= spec.start_date)
+    if spec.end_date:
+        conditions.append(Goal.start_date <= spec.end_date)
+    if spec.employee_id:
+        conditions.append(Goal.employee_id == spec.employee_id)
+    return select(
+        Goal.target_visits.label("goal_target_visits"),
+        Goal.target_sales.label("goal_target_sales"),
+    ).where(*conditions).order_by(Goal.start_date, Goal.id).limit(1)
+
+
+_GROUPS = {
+    "activity": _activity,
+    "sales": _sales,
+    "pharmacies": _pharmacies,
+    "goal": _goal,
+}
+
+
+def stats_query(spec: StatsSpec, *groups: str):
+    """
+    İstenen metrik gruplarını tek satırda döndüren sorgu
+    Gruplar: activity (ROLLUP_COUNTERS), sales (sale_count, sold_quantity,
+    sales_revenue), pharmacies (pharmacy_count, approved_pharmacy_count),
+    goal (goal_target_visits, goal_target_sales - hedef yoksa NULL)
+    """
+    unknown = set(groups) - set(_GROUPS)
+    if unknown or not groups:
+        raise ValueError(f"Invalid stats groups: {sorted(unknown) or groups}")
+
+    subqueries = [_GROUPS[name](spec).subquery(name) for name in groups]
+    # Sabit tek satır üzerine LEFT JOIN: satır dönmeyen grup (goal) sonucu boşaltmaz
+    query = select(
+        *[column for subquery in subqueries for column in subquery.c]
+    ).select_from(select(true().label("anchor")).subquery("anchor"))
+    for subquery in subqueries:
+        query = query.outerjoin(subquery, true())
+    return query
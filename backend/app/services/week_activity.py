@@ -0,0 +1,200 @@
+"""
+Bu haftanın canlı sayaçları (haftanın yıldızı, haftalık sıralama)
+
+Her worker bu haftanın (Pazar'dan bugüne) çalışan başına ürün ve eczane
+ziyareti toplamlarını bellekte tutar. Eczane ziyareti yazan handler'lar
+commit'ten sonra aynı delta'ları sayaçlara uygular:
+
+    delta = pharmacy_visit_delta(db_visit)
+    apply_rollup_deltas(db, delta)   # bu haftanın sayaçlarını değiştiriyorsa NOTIFY de gönderir
+    db.commit()
+    week_activity.apply(delta)
+
+Diğer worker'lar reference_data dinleyicisi üzerinden gelen bildirimle
+sayaçlarını eskimiş sayar ve ilk okumada günlük özetten yeniden yükler
+(delta'yı zaten uygulamış worker kendi bildirimini atlar). Sayaçları
+değiştirmeyen yazımlar (hekim ziyareti, onay) bildirim göndermez.
+Bildirim kaçarsa ya da sayaçlar kayarsa (commit ile apply arasındaki
+yükleme) en geç WEEK_COUNTERS_RECONCILE_INTERVAL saniyede bir veritabanıyla
+eşitlenir. Gün değişince sayaçlar sıfırdan yüklenir.
+
+Okumalar (haftanın yıldızı, ilk N) sıralı listeden yapılır; liste sadece
+sayaç değiştikten sonraki ilk okumada yeniden sıralanır.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.daily_activity import DailyActivityRollup
+from ..models.employee import Employee, EmployeeRole
+from .chart_buckets import bucket_start
+from .reference_data import REFERENCE_CHANNEL, reference_data
+
+# NOTIFY payload'ı (reference_data dinleyicisinin subscribe anahtarı)
+DAILY_ACTIVITY = "daily_activity_rollups"
+
+
+@dataclass(frozen=True)
+class WeekStanding:
+    rank: int
+    employee_id: int
+    employee_name: str
+    product_count: int
+    pharmacy_visit_count: int
+
+
+def current_week_start(today: Optional[date] = None) -> date:
+    return bucket_start(today or date.today(), "week")
+
+
+def _in_week(activity_date: date, today: date) -> bool:
+    """Bu haftanın bugüne kadarki günleri (ileri tarihli ziyaretler sayılmaz)"""
+    return current_week_start(today) <= activity_date <= today
+
+
+def week_counter_changes(deltas, today: date) -> Dict[int, Tuple[int, int]]:
+    """Delta'ların bu haftanın sayaçlarına net etkisi: çalışan -> (ürün, eczane ziyareti), sıfırlar hariç"""
+    changes: Dict[int, Tuple[int, int]] = {}
+    for delta in deltas:
+        if not _in_week(delta.activity_date, today):
+            continue
+        products, visits = changes.get(delta.employee_id, (0, 0))
+        changes[delta.employee_id] = (
+            products + delta.counters.get("product_count", 0),
+            visits + delta.counters.get("pharmacy_visit_count", 0),
+        )
+    return {employee_id: change for employee_id, change in changes.items() if any(change)}
+
+
+class WeekActivityCounters:
+    def __init__(self, session_factory=SessionLocal, reconcile_interval: int = settings.WEEK_COUNTERS_RECONCILE_INTERVAL):
+        self._session_factory = session_factory
+        self._reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._today: Optional[date] = None  # sayaçların yüklendiği gün
+        self._names: Dict[int, str] = {}  # bu hafta aktivitesi olan EMPLOYEE'ler
+        self._others: set = set()  # EMPLOYEE rolünde olmayanlar (sıralamaya girmez)
+        self._products: Dict[int, int] = {}
+        self._pharmacy_visits: Dict[int, int] = {}
+        self._ranking: Optional[Tuple[WeekStanding, ...]] = None
+        self._loaded_at = 0.0
+        self._stale = True
+        self._own_notices = 0  # apply edilmiş, dinleyiciden geri gelecek kendi bildirimlerimiz
+
+    def invalidate(self):
+        with self._lock:
+            if self._own_notices:
+                self._own_notices -= 1
+                return
+            self._stale = True
+
+    def publish(self, db: Session, deltas):
+        """Delta'lar bu haftanın sayaçlarını değiştiriyorsa diğer worker'lara bildir (commit'te iletilir)"""
+        if not settings.WEEK_COUNTERS_NOTIFY:
+            return
+        if week_counter_changes(deltas, date.today()):
+            db.execute(select(func.pg_notify(REFERENCE_CHANNEL, DAILY_ACTIVITY)))
+
+    def apply(self, *deltas):
+        """Commit edilmiş rollup delta'larını (services/activity_rollup.RollupDelta) sayaçlara uygular"""
+        with self._lock:
+            if self._stale or self._today is None:
+                return  # bir sonraki okumada zaten yeniden yüklenecek
+            changes = week_counter_changes(deltas, self._today)
+            if not changes:
+                return  # publish de bildirim göndermedi
+            if settings.WEEK_COUNTERS_NOTIFY and reference_data.listening:
+                self._own_notices += 1  # transaction başına tek NOTIFY
+            if any(employee_id not in self._names and employee_id not in self._others for employee_id in changes):
+                # Adı/rolü bilinmeyen çalışan: yeniden yükle
+                self._stale = True
+                return
+            for employee_id, (products, visits) in changes.items():
+                self._products[employee_id] = self._products.get(employee_id, 0) + products
+                self._pharmacy_visits[employee_id] = self._pharmacy_visits.get(employee_id, 0) + visits
+            self._ranking = None
+
+    def reconcile(self, db: Session, today: Optional[date] = None):
+        """Bu haftanın sayaçlarını günlük özetten yeniden yükler"""
+        today = today or date.today()
+        rows = db.execute(
+            select(
+                Employee.id,
+                Employee.full_name,
+                Employee.role,
+                func.sum(DailyActivityRollup.product_count).label("product_count"),
+                func.sum(DailyActivityRollup.pharmacy_visit_count).label("pharmacy_visit_count"),
+            ).join(
+                DailyActivityRollup, DailyActivityRollup.employee_id == Employee.id
+            ).where(
+                DailyActivityRollup.activity_date >= current_week_start(today),
+                DailyActivityRollup.activity_date <= today
+            ).group_by(Employee.id, Employee.full_name, Employee.role)
+        ).all()
+
+        with self._lock:
+            self._today = today
+            self._names = {row.id: row.full_name for row in rows if row.role == EmployeeRole.EMPLOYEE}
+            self._others = {row.id for row in rows if row.role != EmployeeRole.EMPLOYEE}
+            self._products = {row.id: int(row.product_count or 0) for row in rows}
+            self._pharmacy_visits = {row.id: int(row.pharmacy_visit_count or 0) for row in rows}
+            self._ranking = None
+            self._loaded_at = time.monotonic()
+            self._stale = False
+            self._own_notices = 0
+
+    def _ensure_fresh(self):
+        if (
+            self._stale
+            or self._today != date.today()
+            or time.monotonic() - self._loaded_at >= self._reconcile_interval
+        ):
+            db = self._session_factory()
+            try:
+                self.reconcile(db)
+            finally:
+                db.close()
+
+    def ranking(self) -> Tuple[WeekStanding, ...]:
+        """Bu haftanın ürün sıralaması (eczane ziyareti olan EMPLOYEE'ler)"""
+        self._ensure_fresh()
+        with self._lock:
+            if self._ranking is None:
+                ordered = sorted(
+                    (
+                        (-self._products.get(employee_id, 0), name, employee_id)
+                        for employee_id, name in self._names.items()
+                        if self._pharmacy_visits.get(employee_id, 0) > 0
+                    )
+                )
+                standings: List[WeekStanding] = []
+                for position, (negative_products, name, employee_id) in enumerate(ordered, 1):
+                    # Eşit ürün sayısında aynı sıra
+                    rank = standings[-1].rank if standings and standings[-1].product_count == -negative_products else position
+                    standings.append(WeekStanding(
+                        rank=rank,
+                        employee_id=employee_id,
+                        employee_name=name,
+                        product_count=-negative_products,
+                        pharmacy_visit_count=self._pharmacy_visits[employee_id],
+                    ))
+                self._ranking = tuple(standings)
+            return self._ranking
+
+    def week_star(self) -> Optional[WeekStanding]:
+        ranking = self.ranking()
+        return ranking[0] if ranking else None
+
+    def top(self, limit: int) -> Tuple[WeekStanding, ...]:
+        return self.ranking()[:limit]
+
+
+week_activity = WeekActivityCounters()
+reference_data.subscribe(DAILY_ACTIVITY, week_activity.invalidate)
@@ -1,11 +1,27 @@
-from .auth import get_password_hash, verify_password, create_access_token, authenticate_user
-from .dependencies import get_current_user, get_current_admin_user
+from .auth import (
+    get_password_hash,
+    verify_password,
+    create_access_token,
+    authenticate_user,
+    authenticate_user_async,
+    get_login_metrics,
+)
+from .dependencies import (
+    Principal,
+    get_current_user,
+    get_current_admin_user,
+    invalidate_principal,
+)
 
 __all__ = [
     "get_password_hash",
     "verify_password",
     "create_access_token",
     "authenticate_user",
+    "authenticate_user_async",
+    "get_login_metrics",
     "get_current_user",
     "get_current_admin_user",
+    "Principal",
+    "invalidate_principal",
 ]
@@ -1,13 +1,144 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ..models.employee import Employee
 from ..config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+class PasswordQueueFull(Exception):
+    """Bekleyen şifre doğrulaması PASSWORD_HASH_MAX_QUEUE sınırında"""
+
+
+class PasswordHasherPool:
+    """
+    bcrypt işlerini event loop dışında çalıştıran sınırlı thread havuzu
+    bcrypt C tarafında GIL'i bıraktığı için thread'ler paralel çalışır.
+    Havuz doluyken gelen işler kuyruğa alınır; kuyruk da doluysa
+    PasswordQueueFull fırlatılır (login 503 döner).
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_queued = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    @property
+    def queued(self) -> int:
+        return max(self.in_flight - self.max_workers, 0)
+
+    async def run(self, func: Callable, *args):
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordQueueFull()
+            self.in_flight += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "rejected": self.rejected,
+            }
+
+
+class LoginStats:
+    """
+    Login süreleri (kullanıcı sorgusu + bcrypt + gerekirse rehash) ve sonuçları
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)  # son login süreleri (saniye)
+        self.succeeded = 0
+        self.failed = 0
+        self.rehashed = 0
+        self.max_latency = 0.0
+
+    def record(self, latency: float, success: bool):
+        with self._lock:
+            self._recent.append(latency)
+            self.max_latency = max(self.max_latency, latency)
+            if success:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def record_rehash(self):
+        with self._lock:
+            self.rehashed += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+        def percentile(p: float) -> float:
+            if not recent:
+                return 0.0
+            return round(recent[min(int(len(recent) * p), len(recent) - 1)] * 1000, 2)
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "rehashed": self.rehashed,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_latency * 1000, 2),
+        }
+
+
+password_pool = PasswordHasherPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+login_stats = LoginStats()
+
+
+def get_login_metrics() -> dict:
+    """
+    Login süreleri ve şifre doğrulama kuyruğunun durumu
+    """
+    return {
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "logins": login_stats.snapshot(),
+        "password_pool": password_pool.snapshot(),
+    }
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -49,3 +180,44 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[Employ
     if not verify_password(password, user.hashed_password):
         return None
     return user
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password; if the hash uses outdated settings (e.g. lower
+    bcrypt rounds) also return a new hash to store
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> Optional[Employee]:
+    """
+    Authenticate a user by email and password (async session)
+    bcrypt doğrulaması password_pool'da çalışır, event loop bloklanmaz.
+
+    Raises:
+        PasswordQueueFull: doğrulama kuyruğu doluysa
+    """
+    started = time.perf_counter()
+
+    result = await db.execute(select(Employee).where(Employee.email == email))
+    user = result.scalars().first()
+    if not user:
+        login_stats.record(time.perf_counter() - started, success=False)
+        return None
+
+    verified, new_hash = await password_pool.run(
+        verify_and_update_password, password, user.hashed_password
+    )
+    if not verified:
+        login_stats.record(time.perf_counter() - started, success=False)
+        return None
+
+    # Eski work factor ile hash'lenmiş şifreyi güncel ayarlarla kaydet
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        login_stats.record_rehash()
+
+    login_stats.record(time.perf_counter() - started, success=True)
+    return user
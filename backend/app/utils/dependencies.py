@@ -1,22 +1,150 @@
-from fastapi import Depends, HTTPException, status
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..models.employee import Employee, EmployeeRole
+from ..database import SessionLocal, get_db
+from ..models.employee import Employee, EmployeeRole, Gender
 from ..config import settings
+from ..services.reference_data import EMPLOYEES, reference_data
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Employee:
+@dataclass(frozen=True)
+class Principal:
     """
-    Get current authenticated user from JWT token
+    Token'dan çözülen kullanıcı (get_current_user dönüşü)
+    Employee ile aynı alan adlarını taşır; hashed_password içermez.
+    Şifre doğrulaması veya kullanıcı kaydını değiştirmek gereken yerlerde
+    Employee satırı id ile ayrıca okunmalı.
+    """
+    id: int
+    email: str
+    full_name: str
+    role: EmployeeRole
+    permissions: Optional[Dict[str, Any]]
+    is_active: bool
+    phone: Optional[str]
+    gender: Optional[Gender]
+    hire_date: Optional[date]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_employee(cls, employee: Employee) -> "Principal":
+        return cls(
+            id=employee.id,
+            email=employee.email,
+            full_name=employee.full_name,
+            role=employee.role,
+            permissions=dict(employee.permissions) if employee.permissions else employee.permissions,
+            is_active=employee.is_active,
+            phone=employee.phone,
+            gender=employee.gender,
+            hire_date=employee.hire_date,
+            created_at=employee.created_at,
+            updated_at=employee.updated_at,
+        )
+
+
+class PrincipalCache:
+    """
+    Token subject (email) -> Principal, TTL + LRU
+    Çalışan güncellenince invalidate() ile düşürülür (routers/employees.py);
+    diğer worker'larda employees bildirimiyle tamamı düşürülür.
+    """
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Her invalidate'te artar; DB okuması sırasında invalidate olduysa
+        # okunan (artık eski) kayıt cache'e yazılmaz
+        self.generation = 0
+
+    def get(self, subject: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return principal
+
+    def set(self, subject: str, principal: Principal, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[subject] = (principal, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, employee_id: int):
+        with self._lock:
+            self.generation += 1
+            for subject in [key for key, (principal, _) in self._entries.items() if principal.id == employee_id]:
+                del self._entries[subject]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL,
+    max_size=settings.AUTH_CACHE_SIZE,
+)
+# Yetki/rol/aktiflik değişikliği tüm worker'larda hemen geçerli olsun (bump_table_version(db, EMPLOYEES))
+reference_data.subscribe(EMPLOYEES, principal_cache.clear)
+
+
+def invalidate_principal(employee_id: int):
+    """
+    Çalışanın cache'teki kaydını düşür (rol, yetki, aktiflik, ad... değişince)
+    """
+    principal_cache.invalidate(employee_id)
+
+
+def _lookup_principal(email: str, db: Session) -> Optional[Principal]:
+    user = principal_cache.get(email)
+    if user is None:
+        generation = principal_cache.generation
+        employee = db.query(Employee).filter(Employee.email == email).first()
+        if employee is None:
+            return None
+        user = Principal.from_employee(employee)
+        principal_cache.set(email, user, generation)
+    return user
+
+
+def resolve_principal(email: str) -> Optional[Principal]:
+    """
+    Uzun süreli akışta kullanıcıyı yeniden çöz (cache, yoksa kısa ömürlü session)
+    Kullanıcı silinmişse None
     """
+    db = SessionLocal()
+    try:
+        return _lookup_principal(email, db)
+    finally:
+        db.close()
+
+
+def _principal_for_token(token: str, db: Session) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -31,7 +159,7 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(Employee).filter(Employee.email == email).first()
+    user = _lookup_principal(email, db)
     if user is None:
         raise credentials_exception
 
@@ -41,9 +169,43 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """
+    Get current authenticated user from JWT token
+    Kullanıcı kaydı AUTH_CACHE_TTL süresince cache'ten döner (DB sorgusu yok).
+    """
+    return _principal_for_token(token, db)
+
+
+def get_stream_user(
+    access_token: Optional[str] = Query(None, description="EventSource header gönderemediği için token"),
+    token: Optional[str] = Depends(optional_oauth2_scheme)
+) -> Principal:
+    """
+    Uzun süreli akışlar (SSE) için get_current_user
+    - Token Authorization header'ından ya da access_token query parametresinden
+    - Cache'te yoksa kısa ömürlü bir session açılır; akış boyunca veritabanı bağlantısı tutulmaz
+    """
+    token = token or access_token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    db = SessionLocal()
+    try:
+        return _principal_for_token(token, db)
+    finally:
+        db.close()
+
+
 def get_current_admin_user(
-    current_user: Employee = Depends(get_current_user)
-) -> Employee:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Get current authenticated user and verify admin role
     """
@@ -55,7 +217,7 @@ def get_current_admin_user(
     return current_user
 
 
-def has_permission(user: Employee, permission_key: str) -> bool:
+def has_permission(user: Principal, permission_key: str) -> bool:
     """
     Check if user has a specific permission
     - MANAGER always returns True (has all permissions)
@@ -78,7 +240,7 @@ def require_permission(permission_key: str):
     Dependency to require a specific permission
     Usage: current_user: Employee = Depends(require_permission("view_all_leaves"))
     """
-    def _check_permission(current_user: Employee = Depends(get_current_user)) -> Employee:
+    def _check_permission(current_user: Principal = Depends(get_current_user)) -> Principal:
         if not has_permission(current_user, permission_key):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -88,7 +250,7 @@ def require_permission(permission_key: str):
     return _check_permission
 
 
-def can_manage_user_permissions(current_user: Employee) -> bool:
+def can_manage_user_permissions(current_user: Principal) -> bool:
     """
     Check if user can manage other users' permissions
     Only MANAGER can manage permissions
@@ -0,0 +1,132 @@
+"""
+Excel export motoru - write-only (satır satır) workbook
+
+Satırlar bellekte tutulmaz, openpyxl tarafından geçici dosyaya yazılır.
+Stiller hücre başına Font/PatternFill nesnesi yerine workbook'a bir kez
+kaydedilen NamedStyle'lar ile uygulanır.
+"""
+import os
+import tempfile
+from typing import Iterable, Iterator, List, Optional
+
+from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Veritabanından tek seferde okunacak satır sayısı (Query.yield_per)
+EXPORT_CHUNK_SIZE = 1000
+
+# Response'a yazılan parça boyutu
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _named_style(name: str, font: Font, fill_color: Optional[str] = None,
+                 alignment: Optional[Alignment] = None) -> NamedStyle:
+    style = NamedStyle(name=name)
+    style.font = font
+    if fill_color:
+        style.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
+    if alignment:
+        style.alignment = alignment
+    return style
+
+
+def _default_styles() -> List[NamedStyle]:
+    center = Alignment(horizontal="center", vertical="center")
+    center_wrap = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    return [
+        _named_style("header", Font(color="FFFFFF", bold=True, size=11), "4472C4", center_wrap),
+        _named_style("header_dark", Font(color="FFFFFF", bold=True), "366092", center),
+        _named_style("header_purple", Font(color="FFFFFF", bold=True, size=11), "9966CC", center_wrap),
+        _named_style("title", Font(color="FFFFFF", bold=True, size=14), "4472C4", center),
+        _named_style("title_purple", Font(color="FFFFFF", bold=True, size=14), "9966CC", center),
+        _named_style("subheader", Font(bold=True, size=11), "B4C7E7",
+                     Alignment(horizontal="left", vertical="center")),
+        _named_style("bold", Font(bold=True)),
+        _named_style("muted", Font(italic=True, color="999999"), alignment=center),
+        _named_style("growth", Font(), "C6E0B4"),
+        _named_style("decline", Font(), "F4B084"),
+    ]
+
+
+class StreamingWorkbook:
+    """
+    Write-only workbook sarmalayıcısı
+
+    Kullanım:
+        book = StreamingWorkbook()
+        ws = book.add_sheet("Rapor", column_widths=[20, 30])
+        book.append_header(ws, ["Çalışan", "Eczane"])
+        for row in query.yield_per(EXPORT_CHUNK_SIZE):
+            ws.append([row.full_name, row.pharmacy_name])
+        return book.to_response("rapor.xlsx")
+    """
+
+    def __init__(self):
+        self.workbook = Workbook(write_only=True)
+        for style in _default_styles():
+            self.workbook.add_named_style(style)
+
+    def add_sheet(self, title: str, column_widths: Optional[Iterable[float]] = None):
+        ws = self.workbook.create_sheet(title=title)
+        # Write-only modda sütun genişlikleri satırlardan önce ayarlanmalı
+        for col_num, width in enumerate(column_widths or [], 1):
+            ws.column_dimensions[get_column_letter(col_num)].width = width
+        return ws
+
+    @staticmethod
+    def cell(ws, value, style: Optional[str] = None) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        if style:
+            cell.style = style
+        return cell
+
+    def append_header(self, ws, headers: Iterable, style: str = "header"):
+        ws.append([self.cell(ws, header, style) for header in headers])
+
+    @staticmethod
+    def merge(ws, cell_range: str):
+        ws.merged_cells.add(cell_range)
+
+    def save(self, path: str):
+        self.workbook.save(path)
+
+    def to_response(self, filename: str) -> StreamingResponse:
+        """
+        Workbook'u geçici dosyaya yazar ve parça parça stream eder.
+        Dosya stream bitince (veya istemci bağlantıyı kapatınca) silinir.
+        """
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            self.save(path)
+        except Exception:
+            os.remove(path)
+            raise
+
+        return StreamingResponse(
+            iter_file(path, remove=True),
+            media_type=XLSX_MEDIA_TYPE,
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}",
+                "Content-Length": str(os.path.getsize(path)),
+            }
+        )
+
+
+def iter_file(path: str, remove: bool = False) -> Iterator[bytes]:
+    """Dosyayı STREAM_CHUNK_SIZE parçalar halinde okur"""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if remove:
+            os.remove(path)
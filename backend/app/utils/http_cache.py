@@ -0,0 +1,85 @@
+"""
+Koşullu GET (ETag / Last-Modified) yardımcıları
+
+Sık okunan ama nadiren değişen endpoint'ler ETag'i içerikten değil tablo
+sürüm sayacından (table_versions, services/reference_data.py) üretir; bu
+yüzden istemcinin kopyası güncelse 304 sorgu çalıştırılmadan ve cevap
+serileştirilmeden döner:
+
+    snapshot = reference_data.snapshot()
+    cached = not_modified(request, response, etag_for(LEAVE_TYPES, snapshot.versions[LEAVE_TYPES]))
+    if cached:
+        return cached
+
+ETag'ler zayıftır (W/"..."): aynı sürümün gövdesi bayt bayt aynı olmayabilir.
+Cache-Control "private, no-cache": tarayıcı saklar ama her kullanımda doğrular.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_for(*parts) -> str:
+    """Parçalardan (tablo adı, sürüm, sorgu parametreleri...) zayıf ETag"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match zayıf karşılaştırma (RFC 9110 13.1.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in if_none_match.split(",")}
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def not_modified(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None
+) -> Optional[Response]:
+    """
+    Doğrulayıcı header'ları (ETag, Last-Modified, Cache-Control) cevaba yazar.
+    İstemcinin kopyası güncelse gövdesiz 304 cevabı döner, değilse None.
+    If-None-Match varsa If-Modified-Since'e bakılmaz.
+    """
+    if last_modified is not None and last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    return None
@@ -0,0 +1,48 @@
+"""
+Keyset (cursor) pagination yardımcıları
+
+Cursor, son dönen satırın sıralama anahtarını taşıyan opak bir string'dir
+(urlsafe base64 JSON). Liste endpoint'leri cevap gövdesini değiştirmemek
+için sonraki sayfanın cursor'ını NEXT_CURSOR_HEADER header'ında döner;
+son sayfada header gönderilmez.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cursor değeri serileştirilemiyor: {type(value).__name__}")
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, default=_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Raises:
+        HTTPException(400): cursor bozuksa
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return payload
+
+
+def set_next_cursor(response: Response, payload: Optional[Dict[str, Any]]):
+    """Sonraki sayfa varsa cursor'ı header olarak ekle"""
+    if payload is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(payload)
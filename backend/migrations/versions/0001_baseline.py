@@ -0,0 +1,254 @@
+"""baseline schema
+
+Tabloların migration'lara geçilmeden önceki (init_db / create_all ile oluşan) hali.
+Bu tablolar zaten varsa scripts/migrate.py bu revizyonu çalıştırmadan işaretler (stamp).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('annual_leave_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('year_of_service', sa.Integer(), nullable=False),
+    sa.Column('days_entitled', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('year_of_service')
+    )
+    op.create_index(op.f('ix_annual_leave_rules_id'), 'annual_leave_rules', ['id'], unique=False)
+    op.create_table('employees',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('role', sa.Enum('ADMIN', 'MANAGER', 'EMPLOYEE', name='employeerole'), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('gender', sa.Enum('MALE', 'FEMALE', 'OTHER', name='gender'), nullable=True),
+    sa.Column('hire_date', sa.Date(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('permissions', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_employees_email'), 'employees', ['email'], unique=True)
+    op.create_index(op.f('ix_employees_id'), 'employees', ['id'], unique=False)
+    op.create_table('leave_types',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('max_days', sa.Integer(), nullable=False),
+    sa.Column('is_paid', sa.Boolean(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_cumulative', sa.Boolean(), nullable=True),
+    sa.Column('gender_restriction', sa.Enum('NONE', 'MALE_ONLY', 'FEMALE_ONLY', name='genderrestriction'), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_leave_types_id'), 'leave_types', ['id'], unique=False)
+    op.create_index(op.f('ix_leave_types_name'), 'leave_types', ['name'], unique=True)
+    op.create_table('visit_color_scale',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('color', sa.String(length=20), nullable=False),
+    sa.Column('min_visits', sa.Integer(), nullable=False),
+    sa.Column('max_visits', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('color')
+    )
+    op.create_index(op.f('ix_visit_color_scale_id'), 'visit_color_scale', ['id'], unique=False)
+    op.create_table('doctor_visits',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('visit_date', sa.Date(), nullable=False),
+    sa.Column('doctor_name', sa.String(), nullable=False),
+    sa.Column('hospital_name', sa.String(), nullable=False),
+    sa.Column('specialty', sa.String(), nullable=True),
+    sa.Column('supported_product', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('start_time', sa.Time(), nullable=True),
+    sa.Column('end_time', sa.Time(), nullable=True),
+    sa.Column('is_approved', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_doctor_visits_employee_id'), 'doctor_visits', ['employee_id'], unique=False)
+    op.create_index(op.f('ix_doctor_visits_id'), 'doctor_visits', ['id'], unique=False)
+    op.create_index(op.f('ix_doctor_visits_visit_date'), 'doctor_visits', ['visit_date'], unique=False)
+    op.create_table('goals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('target_visits', sa.Integer(), nullable=True),
+    sa.Column('target_sales', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_goals_id'), 'goals', ['id'], unique=False)
+    op.create_table('leave_balances',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('leave_type_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=True),
+    sa.Column('service_year', sa.Integer(), nullable=True),
+    sa.Column('carried_over_days', sa.Integer(), nullable=False),
+    sa.Column('current_year_entitlement', sa.Integer(), nullable=False),
+    sa.Column('total_days', sa.Integer(), nullable=False),
+    sa.Column('used_days', sa.Integer(), nullable=False),
+    sa.Column('remaining_days', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.ForeignKeyConstraint(['leave_type_id'], ['leave_types.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('employee_id', 'leave_type_id', 'service_year', name='_employee_leavetype_serviceyear_uc')
+    )
+    op.create_index(op.f('ix_leave_balances_id'), 'leave_balances', ['id'], unique=False)
+    op.create_table('leave_requests',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('leave_type_id', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('return_to_work_date', sa.Date(), nullable=False),
+    sa.Column('total_days', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'APPROVED', 'REJECTED', 'CANCELLED', name='leaverequeststatus'), nullable=False),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('rejection_reason', sa.Text(), nullable=True),
+    sa.Column('approved_by', sa.Integer(), nullable=True),
+    sa.Column('approved_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['approved_by'], ['employees.id'], ),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.ForeignKeyConstraint(['leave_type_id'], ['leave_types.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_leave_requests_id'), 'leave_requests', ['id'], unique=False)
+    op.create_table('pharmacies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.Column('district', sa.String(), nullable=True),
+    sa.Column('street', sa.String(), nullable=True),
+    sa.Column('employee_id', sa.Integer(), nullable=True),
+    sa.Column('is_approved', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pharmacies_employee_id'), 'pharmacies', ['employee_id'], unique=False)
+    op.create_index(op.f('ix_pharmacies_id'), 'pharmacies', ['id'], unique=False)
+    op.create_index(op.f('ix_pharmacies_name'), 'pharmacies', ['name'], unique=False)
+    op.create_table('weekly_programs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('week_start', sa.Date(), nullable=False),
+    sa.Column('week_end', sa.Date(), nullable=False),
+    sa.Column('days_json', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('submitted', sa.Boolean(), nullable=True),
+    sa.Column('submitted_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_weekly_programs_employee_id'), 'weekly_programs', ['employee_id'], unique=False)
+    op.create_index(op.f('ix_weekly_programs_id'), 'weekly_programs', ['id'], unique=False)
+    op.create_index(op.f('ix_weekly_programs_week_start'), 'weekly_programs', ['week_start'], unique=False)
+    op.create_table('pharmacy_visits',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('pharmacy_id', sa.Integer(), nullable=False),
+    sa.Column('visit_date', sa.Date(), nullable=False),
+    sa.Column('pharmacy_name', sa.String(), nullable=False),
+    sa.Column('pharmacy_address', sa.String(), nullable=True),
+    sa.Column('start_time', sa.Time(), nullable=True),
+    sa.Column('end_time', sa.Time(), nullable=True),
+    sa.Column('product_count', sa.Integer(), nullable=False),
+    sa.Column('mf_count', sa.Integer(), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('is_approved', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.ForeignKeyConstraint(['pharmacy_id'], ['pharmacies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pharmacy_visits_employee_id'), 'pharmacy_visits', ['employee_id'], unique=False)
+    op.create_index(op.f('ix_pharmacy_visits_id'), 'pharmacy_visits', ['id'], unique=False)
+    op.create_index(op.f('ix_pharmacy_visits_pharmacy_id'), 'pharmacy_visits', ['pharmacy_id'], unique=False)
+    op.create_index(op.f('ix_pharmacy_visits_visit_date'), 'pharmacy_visits', ['visit_date'], unique=False)
+    op.create_table('sales',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('pharmacy_id', sa.Integer(), nullable=True),
+    sa.Column('product_name', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('sale_date', sa.Date(), nullable=False),
+    sa.Column('notes', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.ForeignKeyConstraint(['pharmacy_id'], ['pharmacies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sales_id'), 'sales', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_sales_id'), table_name='sales')
+    op.drop_table('sales')
+    op.drop_index(op.f('ix_pharmacy_visits_visit_date'), table_name='pharmacy_visits')
+    op.drop_index(op.f('ix_pharmacy_visits_pharmacy_id'), table_name='pharmacy_visits')
+    op.drop_index(op.f('ix_pharmacy_visits_id'), table_name='pharmacy_visits')
+    op.drop_index(op.f('ix_pharmacy_visits_employee_id'), table_name='pharmacy_visits')
+    op.drop_table('pharmacy_visits')
+    op.drop_index(op.f('ix_weekly_programs_week_start'), table_name='weekly_programs')
+    op.drop_index(op.f('ix_weekly_programs_id'), table_name='weekly_programs')
+    op.drop_index(op.f('ix_weekly_programs_employee_id'), table_name='weekly_programs')
+    op.drop_table('weekly_programs')
+    op.drop_index(op.f('ix_pharmacies_name'), table_name='pharmacies')
+    op.drop_index(op.f('ix_pharmacies_id'), table_name='pharmacies')
+    op.drop_index(op.f('ix_pharmacies_employee_id'), table_name='pharmacies')
+    op.drop_table('pharmacies')
+    op.drop_index(op.f('ix_leave_requests_id'), table_name='leave_requests')
+    op.drop_table('leave_requests')
+    op.drop_index(op.f('ix_leave_balances_id'), table_name='leave_balances')
+    op.drop_table('leave_balances')
+    op.drop_index(op.f('ix_goals_id'), table_name='goals')
+    op.drop_table('goals')
+    op.drop_index(op.f('ix_doctor_visits_visit_date'), table_name='doctor_visits')
+    op.drop_index(op.f('ix_doctor_visits_id'), table_name='doctor_visits')
+    op.drop_index(op.f('ix_doctor_visits_employee_id'), table_name='doctor_visits')
+    op.drop_table('doctor_visits')
+    op.drop_index(op.f('ix_visit_color_scale_id'), table_name='visit_color_scale')
+    op.drop_table('visit_color_scale')
+    op.drop_index(op.f('ix_leave_types_name'), table_name='leave_types')
+    op.drop_index(op.f('ix_leave_types_id'), table_name='leave_types')
+    op.drop_table('leave_types')
+    op.drop_index(op.f('ix_employees_id'), table_name='employees')
+    op.drop_index(op.f('ix_employees_email'), table_name='employees')
+    op.drop_table('employees')
+    op.drop_index(op.f('ix_annual_leave_rules_id'), table_name='annual_leave_rules')
+    op.drop_table('annual_leave_rules')
+    for enum_name in ("leaverequeststatus", "genderrestriction", "gender", "employeerole"):
+        sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,71 @@
+"""daily activity rollups
+
+Çalışan başına günlük ziyaret özeti (services/activity_rollup.py).
+Tablo yeni oluşturuluyorsa mevcut ziyaretlerden doldurulur; create_all ile
+önceden oluşmuşsa dokunulmaz.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("daily_activity_rollups"):
+        return
+
+    op.create_table('daily_activity_rollups',
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('activity_date', sa.Date(), nullable=False),
+    sa.Column('doctor_visit_count', sa.Integer(), nullable=False),
+    sa.Column('pharmacy_visit_count', sa.Integer(), nullable=False),
+    sa.Column('product_count', sa.Integer(), nullable=False),
+    sa.Column('mf_count', sa.Integer(), nullable=False),
+    sa.Column('pharmacy_approved_count', sa.Integer(), nullable=False),
+    sa.Column('pharmacy_pending_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('employee_id', 'activity_date')
+    )
+    op.create_index(op.f('ix_daily_activity_rollups_activity_date'), 'daily_activity_rollups', ['activity_date'], unique=False)
+
+    op.execute("""
+        INSERT INTO daily_activity_rollups (
+            employee_id, activity_date, doctor_visit_count, pharmacy_visit_count,
+            product_count, mf_count, pharmacy_approved_count, pharmacy_pending_count, updated_at
+        )
+        SELECT
+            employee_id, activity_date,
+            SUM(doctor_visit_count), SUM(pharmacy_visit_count),
+            SUM(product_count), SUM(mf_count),
+            SUM(pharmacy_approved_count), SUM(pharmacy_pending_count),
+            now()
+        FROM (
+            SELECT employee_id, visit_date AS activity_date,
+                   COUNT(*) AS doctor_visit_count, 0 AS pharmacy_visit_count,
+                   0 AS product_count, 0 AS mf_count,
+                   0 AS pharmacy_approved_count, 0 AS pharmacy_pending_count
+            FROM doctor_visits
+            GROUP BY employee_id, visit_date
+            UNION ALL
+            SELECT employee_id, visit_date,
+                   0, COUNT(*),
+                   COALESCE(SUM(product_count), 0), COALESCE(SUM(mf_count), 0),
+                   COUNT(*) FILTER (WHERE is_approved), COUNT(*) FILTER (WHERE NOT is_approved)
+            FROM pharmacy_visits
+            GROUP BY employee_id, visit_date
+        ) activity
+        GROUP BY employee_id, activity_date
+    """)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_daily_activity_rollups_activity_date'), table_name='daily_activity_rollups')
+    op.drop_table('daily_activity_rollups')
@@ -0,0 +1,49 @@
+"""leave ledger entries
+
+İzin bakiyesi hareketleri (services/leave_balances.py). Mevcut bakiyeler
+ilk kullanımda "Açılış bakiyesi" hareketleri olarak deftere aktarılır;
+burada veri taşınmaz.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("leave_ledger_entries"):
+        return
+
+    op.create_table('leave_ledger_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('leave_type_id', sa.Integer(), nullable=False),
+    sa.Column('service_year', sa.Integer(), nullable=False),
+    sa.Column('entry_type', sa.Enum('ACCRUAL', 'USAGE', name='leaveledgerentrytype'), nullable=False),
+    sa.Column('days', sa.Integer(), nullable=False),
+    sa.Column('leave_request_id', sa.Integer(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('note', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['employees.id'], ),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.ForeignKeyConstraint(['leave_request_id'], ['leave_requests.id'], ),
+    sa.ForeignKeyConstraint(['leave_type_id'], ['leave_types.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_leave_ledger_employee_type_year', 'leave_ledger_entries', ['employee_id', 'leave_type_id', 'service_year'], unique=False)
+    op.create_index(op.f('ix_leave_ledger_entries_id'), 'leave_ledger_entries', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_leave_ledger_entries_id'), table_name='leave_ledger_entries')
+    op.drop_index('ix_leave_ledger_employee_type_year', table_name='leave_ledger_entries')
+    op.drop_table('leave_ledger_entries')
+    sa.Enum(name='leaveledgerentrytype').drop(op.get_bind(), checkfirst=True)
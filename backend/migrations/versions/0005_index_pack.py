@@ -0,0 +1,60 @@
+"""composite, partial and trigram indexes
+
+İndeksler CONCURRENTLY oluşturulur (tabloya yazma kilitlenmez); bu komutlar
+transaction dışında çalışmak zorunda olduğu için autocommit_block içindedir.
+IF NOT EXISTS sayesinde scripts/apply_indexes.py ile önceden uygulanmış
+veritabanlarında da güvenle çalışır.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_doctor_visits_employee_date", "ON doctor_visits (employee_id, visit_date)"),
+    ("ix_doctor_visits_pending", "ON doctor_visits (visit_date) WHERE is_approved = false"),
+    ("ix_pharmacy_visits_employee_date", "ON pharmacy_visits (employee_id, visit_date)"),
+    (
+        "ix_pharmacy_visits_pharmacy_totals",
+        "ON pharmacy_visits (pharmacy_id) INCLUDE (product_count, mf_count, employee_id)"
+    ),
+    ("ix_pharmacy_visits_pending", "ON pharmacy_visits (visit_date) WHERE is_approved = false"),
+    ("ix_pharmacy_visits_pharmacy_name_trgm", "ON pharmacy_visits USING gin (pharmacy_name gin_trgm_ops)"),
+    (
+        "ix_leave_requests_employee_status_dates",
+        "ON leave_requests (employee_id, status, start_date, end_date)"
+    ),
+    ("ix_sales_employee_date", "ON sales (employee_id, sale_date)"),
+    ("ix_weekly_programs_employee_week", "ON weekly_programs (employee_id, week_start)"),
+)
+
+# Composite indekslerin ilk kolonu olduğu için gereksizleşen tek kolonlu indeksler
+RETIRED_INDEXES = (
+    ("ix_doctor_visits_employee_id", "ON doctor_visits (employee_id)"),
+    ("ix_pharmacy_visits_employee_id", "ON pharmacy_visits (employee_id)"),
+    ("ix_pharmacy_visits_pharmacy_id", "ON pharmacy_visits (pharmacy_id)"),
+    ("ix_weekly_programs_employee_id", "ON weekly_programs (employee_id)"),
+)
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+        for name, _ in RETIRED_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, definition in RETIRED_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+        for name, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,80 @@
+"""pharmacy search key
+
+Eczane araması için pharmacies.search_key kolonu (services/pharmacy_search.py).
+Mevcut satırlar burada doldurulur; katlama kuralı bu revizyona sabitlenmiştir,
+kurallar değişirse scripts/rebuild_pharmacy_search_keys.py çalıştırılır.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+_TURKISH_FOLD = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i",
+    "Ş": "s", "ş": "s",
+    "Ğ": "g", "ğ": "g",
+    "Ü": "u", "ü": "u",
+    "Ö": "o", "ö": "o",
+    "Ç": "c", "ç": "c",
+})
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def _fold(value):
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKD", value.translate(_TURKISH_FOLD))
+    value = "".join(char for char in value if not unicodedata.combining(char)).lower()
+    return _NON_ALNUM.sub(" ", value).strip()
+
+
+def upgrade():
+    op.execute("ALTER TABLE pharmacies ADD COLUMN IF NOT EXISTS search_key VARCHAR")
+
+    connection = op.get_bind()
+    pharmacies = sa.table(
+        "pharmacies",
+        sa.column("id", sa.Integer),
+        sa.column("name", sa.String),
+        sa.column("district", sa.String),
+        sa.column("search_key", sa.String),
+    )
+    rows = connection.execute(
+        sa.select(pharmacies.c.id, pharmacies.c.name, pharmacies.c.district).where(pharmacies.c.search_key.is_(None))
+    ).all()
+    updates = [
+        {"pharmacy_id": row.id, "key": " ".join(part for part in (_fold(row.name), _fold(row.district)) if part)}
+        for row in rows
+    ]
+    if updates:
+        connection.execute(
+            pharmacies.update().where(pharmacies.c.id == sa.bindparam("pharmacy_id")).values(search_key=sa.bindparam("key")),
+            updates
+        )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_pharmacies_search_key_prefix "
+            "ON pharmacies (search_key text_pattern_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_pharmacies_search_key_trgm "
+            "ON pharmacies USING gin (search_key gin_trgm_ops)"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_pharmacies_search_key_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_pharmacies_search_key_prefix")
+    op.drop_column("pharmacies", "search_key")
@@ -0,0 +1,46 @@
+"""daily reports
+
+Biten günlerin snapshot tablosu (services/daily_reports.py). create_all ile
+kurulmuş veritabanlarında tablo olabilir; o durumda sadece updated_at eklenir.
+Geçmiş günler scripts/backfill_daily_reports.py ile doldurulur.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("daily_reports"):
+        op.execute("ALTER TABLE daily_reports ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITHOUT TIME ZONE")
+        return
+
+    op.create_table('daily_reports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('report_date', sa.Date(), nullable=False),
+    sa.Column('total_visits', sa.Integer(), nullable=True),
+    sa.Column('total_sales', sa.Float(), nullable=True),
+    sa.Column('top_employee_id', sa.Integer(), nullable=True),
+    sa.Column('open_cases_count', sa.Integer(), nullable=True),
+    sa.Column('summary_json', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['top_employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_daily_reports_id'), 'daily_reports', ['id'], unique=False)
+    op.create_index(op.f('ix_daily_reports_report_date'), 'daily_reports', ['report_date'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_daily_reports_report_date'), table_name='daily_reports')
+    op.drop_index(op.f('ix_daily_reports_id'), table_name='daily_reports')
+    op.drop_table('daily_reports')
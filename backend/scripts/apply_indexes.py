@@ -0,0 +1,60 @@
+"""
+Apply the model index pack to an existing database without blocking writes
+
+Usage:
+    python scripts/apply_indexes.py           # eksik indeksleri CONCURRENTLY oluştur
+    python scripts/apply_indexes.py --check   # eksik / geçersiz / kullanılmayan indeksleri raporla
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import engine
+from app.services.db_indexes import apply_index_pack, index_report
+
+
+def print_report():
+    with engine.connect() as connection:
+        report = index_report(connection)
+
+    for key, title in (("missing", "Eksik"), ("invalid", "Geçersiz")):
+        print(f"{title} indeksler: {len(report[key])}")
+        for item in report[key]:
+            print(f"  - {item['index']} ({item['table']})")
+
+    print(f"Kaldırılması gereken eski indeksler: {len(report['retired'])}")
+    for name in report["retired"]:
+        print(f"  - {name}")
+
+    print(f"Kullanılmayan indeksler (istatistik başlangıcı: {report['stats_since']}): {len(report['unused'])}")
+    for item in report["unused"]:
+        print(f"  - {item['index']} ({item['table']}, {item['size_bytes'] // 1024} KB)")
+
+    return not (report["missing"] or report["invalid"] or report["retired"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply or check the model index pack")
+    parser.add_argument("--check", action="store_true", help="Sadece raporla, değişiklik yapma")
+    args = parser.parse_args()
+
+    try:
+        if args.check:
+            if not print_report():
+                sys.exit(1)
+            return
+        result = apply_index_pack(engine)
+        print(
+            f"✅ Indexes applied: {len(result['created'])} created, "
+            f"{len(result['rebuilt'])} rebuilt, {len(result['dropped'])} dropped"
+        )
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
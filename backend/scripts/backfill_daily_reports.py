@@ -0,0 +1,61 @@
+"""
+Write daily report snapshots (daily_reports) for past days
+
+Usage:
+    python scripts/backfill_daily_reports.py                        # ilk aktiviteden düne kadar
+    python scripts/backfill_daily_reports.py --start 2025-01-01 --end 2025-01-31
+
+Var olan snapshot'lar yeniden üretilir. Aralık ayrı transaction'larda
+--batch-days günlük parçalar halinde yazılır.
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models.daily_activity import DailyActivityRollup
+from app.models.sale import Sale
+from app.services.daily_reports import close_days
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill daily report snapshots")
+    parser.add_argument("--start", type=date.fromisoformat, help="İlk gün (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Son gün (YYYY-MM-DD, varsayılan: dün)")
+    parser.add_argument("--batch-days", type=int, default=31, help="Transaction başına gün sayısı")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        start = args.start or db.execute(select(func.least(
+            select(func.min(DailyActivityRollup.activity_date)).scalar_subquery(),
+            select(func.min(Sale.sale_date)).scalar_subquery(),
+        ))).scalar()
+        end = args.end or date.today() - timedelta(days=1)
+        if start is None:
+            print("ℹ️  No activity yet, nothing to backfill")
+            return
+
+        total = 0
+        while start <= end:
+            batch_end = min(end, start + timedelta(days=args.batch_days - 1))
+            total += close_days(db, start, batch_end)
+            db.commit()
+            start = batch_end + timedelta(days=1)
+        print(f"✅ Daily reports written: {total} days")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,24 @@
 """
 Database initialization script
-Creates all tables and optionally loads demo data
+Creates or upgrades all tables by applying the schema migrations
+(same as: python scripts/migrate.py upgrade)
 """
 import sys
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.append(str(Path(__file__).parent))
+# Add backend directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import engine
+from app.services.schema_version import upgrade
 
-from app.database import engine, Base
-from app import models
 
 def init_database():
-    """Create all database tables"""
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully!")
-    print("\nCreated tables:")
-    for table in Base.metadata.sorted_tables:
-        print(f"  - {table.name}")
+    """Apply all migrations"""
+    print("Applying database migrations...")
+    upgrade(engine)
+    print("✅ Database schema is up to date!")
+
 
 if __name__ == "__main__":
     init_database()
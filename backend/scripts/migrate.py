@@ -0,0 +1,79 @@
+"""
+Database schema migrations (Alembic)
+
+Usage:
+    python scripts/migrate.py upgrade [revision]     # varsayılan: head
+    python scripts/migrate.py downgrade <revision>   # ör. 0005, -1, base
+    python scripts/migrate.py current                # veritabanı ve kod sürümü
+    python scripts/migrate.py history
+    python scripts/migrate.py stamp <revision>       # çalıştırmadan işaretle
+    python scripts/migrate.py revision -m "add x"    # model değişikliğinden yeni revizyon (autogenerate)
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from alembic import command
+
+from app.database import engine
+from app.services import schema_version
+
+
+def print_current():
+    with engine.connect() as connection:
+        current = schema_version.current_revisions(connection)
+    heads = schema_version.head_revisions()
+    print(f"Veritabanı: {', '.join(current) or 'yok'}")
+    print(f"Kod (head): {', '.join(heads)}")
+    return current == heads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    upgrade_parser = subparsers.add_parser("upgrade", help="Bekleyen revizyonları uygula")
+    upgrade_parser.add_argument("revision", nargs="?", default="head")
+
+    downgrade_parser = subparsers.add_parser("downgrade", help="Belirtilen revizyona geri dön")
+    downgrade_parser.add_argument("revision")
+
+    stamp_parser = subparsers.add_parser("stamp", help="Revizyonu çalıştırmadan işaretle")
+    stamp_parser.add_argument("revision")
+
+    subparsers.add_parser("current", help="Veritabanı ve kod sürümünü göster")
+    subparsers.add_parser("history", help="Revizyon geçmişi")
+
+    revision_parser = subparsers.add_parser("revision", help="Yeni revizyon oluştur")
+    revision_parser.add_argument("-m", "--message", required=True)
+    revision_parser.add_argument("--empty", action="store_true", help="Autogenerate kullanma")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "upgrade":
+            schema_version.upgrade(engine, args.revision)
+            print_current()
+        elif args.command == "downgrade":
+            schema_version.downgrade(engine, args.revision)
+            print_current()
+        elif args.command == "stamp":
+            schema_version.stamp(engine, args.revision)
+            print_current()
+        elif args.command == "current":
+            if not print_current():
+                sys.exit(1)
+        elif args.command == "history":
+            command.history(schema_version.alembic_config())
+        elif args.command == "revision":
+            command.revision(schema_version.alembic_config(), message=args.message, autogenerate=not args.empty)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Rebuild the daily activity rollup (daily_activity_rollups) from raw visits
+
+Usage:
+    python scripts/rebuild_activity_rollup.py                       # tüm geçmiş (backfill)
+    python scripts/rebuild_activity_rollup.py --start 2025-01-01 --end 2025-01-31
+"""
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal
+from app.services.activity_rollup import rebuild_activity_rollup
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily activity rollup")
+    parser.add_argument("--start", type=date.fromisoformat, help="İlk gün (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Son gün (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rows = rebuild_activity_rollup(db, start_date=args.start, end_date=args.end)
+        print(f"✅ Rollup rebuilt: {rows} (employee, day) rows")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
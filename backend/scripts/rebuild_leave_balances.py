@@ -0,0 +1,40 @@
+"""
+Rebuild leave balances (leave_balances) from the leave ledger (leave_ledger_entries)
+
+Defterde hareketi olmayan çalışanların mevcut bakiyeleri önce açılış hareketi
+olarak deftere işlenir.
+
+Usage:
+    python scripts/rebuild_leave_balances.py                  # tüm çalışanlar
+    python scripts/rebuild_leave_balances.py --employee 3 --employee 7
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal
+from app.services.leave_balances import rebuild_leave_balances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild leave balances from the ledger")
+    parser.add_argument("--employee", type=int, action="append", help="Çalışan id (birden fazla verilebilir)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rows = rebuild_leave_balances(db, employee_ids=args.employee)
+        print(f"✅ Leave balances rebuilt: {rows} (employee, leave type, service year) rows")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Rebuild pharmacies.search_key (Turkish-folded name + district) used by /pharmacies/search
+(kolon ve indeksler migration 0006 ile gelir; katlama kuralı değişirse bu script çalıştırılır)
+
+Usage:
+    python scripts/rebuild_pharmacy_search_keys.py
+"""
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal
+from app.services.pharmacy_search import backfill_search_keys
+
+
+def main():
+    db = SessionLocal()
+    try:
+        rows = backfill_search_keys(db)
+        print(f"✅ Pharmacy search keys rebuilt: {rows} rows updated")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
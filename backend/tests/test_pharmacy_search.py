@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models.employee import Employee
+from app.models.pharmacy import Pharmacy
+from app.services.pharmacy_search import (
+    PharmacyPrefixIndex,
+    _suggestion,
+    pharmacy_search_key,
+    search_statement,
+)
+
+PHARMACIES = [
+    # (ad, semt)
+    ("Ayşe Eczanesi", "Ataşehir"),  # hem ön ek hem kelime ön eki
+    ("Ali Eczanesi", "Kadıköy"),  # sadece ön ek
+    ("Merkez Eczanesi", "Avcılar"),  # sadece kelime ön eki
+    ("Ballı Eczanesi", "Beşiktaş"),  # eşleşmiyor
+]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Employee.__table__.create(engine)
+    Pharmacy.__table__.create(engine)
+    with Session(engine) as session:
+        session.add_all(
+            Pharmacy(name=name, district=district, search_key=pharmacy_search_key(name, district))
+            for name, district in PHARMACIES
+        )
+        session.commit()
+        yield session
+
+
+def test_database_search_ranks_like_prefix_index(db):
+    suggestions = [_suggestion(row) for row in db.execute(search_statement("a", 10)).all()]
+    index = PharmacyPrefixIndex()
+    index._load(suggestions, version=1)
+
+    assert [suggestion.name for suggestion in suggestions] == ["Ali Eczanesi", "Ayşe Eczanesi", "Merkez Eczanesi"]
+    assert index.search("a", 10) == suggestions
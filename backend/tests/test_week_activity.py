@@ -0,0 +1,96 @@
+from collections import namedtuple
+from datetime import date
+
+import pytest
+
+from app.models.employee import EmployeeRole
+from app.services.activity_rollup import RollupDelta
+from app.services.reference_data import reference_data
+from app.services.week_activity import WeekActivityCounters
+
+Row = namedtuple("Row", "id full_name role product_count pharmacy_visit_count")
+
+
+class RecordingSession:
+    """reconcile sorgusuna sabit satır döner, çalıştırılan ifadeleri kaydeder"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def all(self):
+        return self.rows
+
+
+def _no_reload():
+    raise AssertionError("Sayaçlar veritabanından yeniden yüklenmemeli")
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    monkeypatch.setattr(reference_data, "listening", True)
+    counters = WeekActivityCounters(session_factory=_no_reload, reconcile_interval=3600)
+    counters.reconcile(RecordingSession([
+        Row(1, "Ali", EmployeeRole.EMPLOYEE, 10, 2),
+        Row(2, "Ayşe", EmployeeRole.EMPLOYEE, 4, 1),
+    ]))
+    return counters
+
+
+def _doctor_visit(employee_id, sign=1):
+    return RollupDelta(employee_id, date.today(), {"doctor_visit_count": sign})
+
+
+def _pharmacy_visit(employee_id, products, sign=1, approved=False):
+    return RollupDelta(employee_id, date.today(), {
+        "pharmacy_visit_count": sign,
+        "product_count": sign * products,
+        "pharmacy_approved_count": sign if approved else 0,
+        "pharmacy_pending_count": 0 if approved else sign,
+    })
+
+
+def test_doctor_visit_write_keeps_counters_fresh(counters):
+    db = RecordingSession()
+    delta = _doctor_visit(1)
+
+    counters.publish(db, [delta])
+    counters.apply(delta)
+
+    assert db.statements == []  # NOTIFY yok: diğer worker'lar da eskimiş saymaz
+    assert [(standing.employee_id, standing.product_count) for standing in counters.ranking()] == [(1, 10), (2, 4)]
+
+
+def test_approval_toggle_keeps_counters_fresh(counters):
+    db = RecordingSession()
+    deltas = (_pharmacy_visit(2, 3, sign=-1), _pharmacy_visit(2, 3, approved=True))
+
+    counters.publish(db, deltas)
+    counters.apply(*deltas)
+
+    assert db.statements == []
+    assert counters.week_star().employee_id == 1
+
+
+def test_pharmacy_visit_write_skips_own_notification(counters):
+    db = RecordingSession()
+    delta = _pharmacy_visit(2, 8)
+
+    counters.publish(db, [delta])
+    counters.apply(delta)
+    counters.invalidate()  # dinleyiciden geri gelen kendi bildirimi
+
+    assert len(db.statements) == 1
+    star = counters.week_star()
+    assert (star.employee_id, star.product_count, star.pharmacy_visit_count) == (2, 12, 2)
+
+
+def test_foreign_notification_marks_counters_stale(counters):
+    counters.invalidate()
+
+    with pytest.raises(AssertionError):
+        counters.ranking()